@@ -1,10 +1,4 @@
 import sys
-from trnasimtools.simulate import SimulateSingleCodonSingleTranscript
+from trnasimtools.batch import parse_script_args
 
-
-simulator = SimulateSingleCodonSingleTranscript(config_file=sys.argv[1],
-                                                seed=int(sys.argv[2]),
-                                                ribosome_params = (int(sys.argv[6]), 15)
-                                                )
-
-simulator.simulate(output_dir=sys.argv[3], time_limit=int(sys.argv[4]), time_step=float(sys.argv[5]))
\ No newline at end of file
+parse_script_args(__file__, sys.argv[1:]).run()
@@ -0,0 +1,166 @@
+"""
+Times the stages of a two codon, multi transcript simulation (the setup used in
+tests/test_multi_transcript.py) across scaled cases, and appends the results
+to a JSON history so runs before and after a change (or a pinetree upgrade)
+can be compared:
+
+    python benchmarks/run_benchmarks.py               # full scaling sweep
+    python benchmarks/run_benchmarks.py --quick       # base case only
+    python benchmarks/run_benchmarks.py --compare     # also diff against the previous entry
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from trnasimtools.serialize import SerializeTwoCodonMultiTranscript
+from trnasimtools.simulate import SimulateTwoCodonMultiTranscript
+from trnasimtools.config import load_config, clear_config_cache
+
+HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.json")
+
+TRNA_PROPORTIONS = (0.9, 0.1)
+TRNA_CHRG_RATES = [100.0, 100.0]
+RBS_STRENGTH = [10000.0, 5000.0]
+TOTAL_TRNA = 1000
+TIME_LIMIT = 50
+TIME_STEP = 5
+SEED = 1
+
+# base case, and the values each parameter is scaled through (one at a time)
+BASE_CASE = {"ribosomes": 100, "transcripts": 10, "length": 300}
+SCALING = {"ribosomes": [100, 500, 1000, 5000],
+           "transcripts": [10, 100, 1000],
+           "length": [300, 1000, 3000]}
+
+def cases(quick):
+    if quick:
+        return [dict(BASE_CASE)]
+    scaled = []
+    for (param, values) in SCALING.items():
+        for value in values:
+            case = dict(BASE_CASE, **{param: value})
+            if case not in scaled:
+                scaled.append(case)
+    return scaled
+
+def case_name(case):
+    return "_".join(f"{param}-{value}" for (param, value) in case.items())
+
+def _timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+def time_case(case, dir):
+    """
+    Returns the wall time of each stage of one simulation.
+    """
+    transcripts = case["transcripts"]
+    serializer = SerializeTwoCodonMultiTranscript(transcript_lens=[case["length"], case["length"]],
+                                                   codon_comps=[(0.1, 0.9), (0.4, 0.6)],
+                                                   transcript_names=["proteinX", "proteinY"],
+                                                   trna_proportion=TRNA_PROPORTIONS,
+                                                   transcript_copy_numbers=[transcripts // 2, transcripts - transcripts // 2],
+                                                   ribosome_binding_rates=RBS_STRENGTH,
+                                                   ribosome_copy_number=case["ribosomes"],
+                                                   total_trna=TOTAL_TRNA,
+                                                   trna_charging_rates=TRNA_CHRG_RATES,
+                                                   time_limit=TIME_LIMIT,
+                                                   time_step=TIME_STEP)
+    serializer.serialize(dir)
+    config = f"{dir}/{serializer.filename()}"
+
+    timings = {}
+    clear_config_cache()
+    timings["load_config"] = _timed(lambda: load_config(config))
+    simulator = SimulateTwoCodonMultiTranscript(config_file=config, seed=SEED)
+    simulator.model.seed(SEED)
+    timings["add_transcripts"] = _timed(simulator._add_transcripts)
+    timings["add_trna"] = _timed(simulator._add_trna)
+    simulator._add_ribosomes()
+    output = f"{dir}/{simulator.filename()}"
+    timings["simulate"] = _timed(lambda: simulator.model.simulate(time_limit=TIME_LIMIT, time_step=TIME_STEP, output=output))
+    try:
+        from trnasimtools.io import read_output
+    except ImportError:
+        # output parsing needs pandas
+        pass
+    else:
+        timings["read_output"] = _timed(lambda: read_output(output))
+    return timings
+
+def run(quick, repeat):
+    results = {}
+    dir = tempfile.mkdtemp()
+    try:
+        for case in cases(quick):
+            # keep the fastest of the repeats, which is the least noisy estimate
+            trials = [time_case(case, dir) for _ in range(repeat)]
+            results[case_name(case)] = {stage: min(trial[stage] for trial in trials) for stage in trials[0]}
+            print(case_name(case), " ".join(f"{stage}={seconds:.4f}" for (stage, seconds) in results[case_name(case)].items()),
+                  flush=True)
+    finally:
+        shutil.rmtree(dir)
+    return results
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    try:
+        from importlib.metadata import version
+        pinetree_version = version("pinetree")
+    except Exception:
+        pinetree_version = ""
+    return {"time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": commit,
+            "pinetree": pinetree_version,
+            "python": platform.python_version(),
+            "host": platform.node()}
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as stream:
+        return json.load(stream)
+
+def compare(previous, current, threshold):
+    """
+    Prints the ratio current/previous for every stage both entries timed,
+    flagging slowdowns beyond threshold (e.g. 1.2 = 20% slower).
+    """
+    print(f"compared to {previous['environment']['commit']} ({previous['environment']['time']}):")
+    for (case, stages) in current["results"].items():
+        for (stage, seconds) in stages.items():
+            before = previous["results"].get(case, {}).get(stage)
+            if not before:
+                continue
+            ratio = seconds / before
+            flag = "  SLOWER" if ratio > threshold else ""
+            print(f"  {case} {stage}: {ratio:.2f}x{flag}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark trnasimtools model setup and simulation throughput.")
+    parser.add_argument("--quick", action="store_true", help="only time the base case")
+    parser.add_argument("--repeat", type=int, default=3, help="trials per case (the fastest is kept)")
+    parser.add_argument("--history", default=HISTORY, help="JSON file to append results to")
+    parser.add_argument("--compare", action="store_true", help="compare against the previous history entry")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio flagged by --compare")
+    args = parser.parse_args(argv)
+
+    entry = {"environment": environment(), "results": run(args.quick, args.repeat)}
+    history = load_history(args.history)
+    if args.compare and history:
+        compare(history[-1], entry, args.threshold)
+    history.append(entry)
+    with open(args.history, "w") as stream:
+        json.dump(history, stream, indent=1)
+
+if __name__ == "__main__":
+    main()
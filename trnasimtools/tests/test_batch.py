@@ -0,0 +1,201 @@
+import os
+import time
+import pytest
+import tempfile
+import shutil
+import filecmp
+from trnasimtools.serialize import SerializeTwoCodonMultiTranscript
+from trnasimtools.simulate import SimulateTwoCodonMultiTranscript
+from trnasimtools.batch import parse_launcher_line, format_launcher_line, run_sweep, main, \
+                              parse_time_budget, write_sweep_spec, parse_sweep_spec, OVER_BUDGET
+from trnasimtools.catalog import Catalog
+
+TS_COPY = [100, 20]
+RB_COPY = 100
+TOTAL_TRNA = 100
+RBS_STRENGTH = [10000.0, 5000.0]
+TRNA_CHRG_RATES = [100.0, 100.0]
+TIME_LIMIT = 50
+TIME_STEP = 5
+SEEDS = [1, 2]
+
+def serialize_config(dir):
+    serializer = SerializeTwoCodonMultiTranscript(transcript_lens=[100, 100],
+                                                   codon_comps=[(0.1, 0.9), (0.4, 0.6)],
+                                                   transcript_names=["proteinX", "proteinY"],
+                                                   trna_proportion=(0.9, 0.1),
+                                                   time_limit=TIME_LIMIT,
+                                                   time_step=TIME_STEP)
+    serializer.serialize(dir)
+    return f"{dir}/{serializer.filename()}"
+
+def launcher_line(config, seed, output_dir):
+    return f"python3 ./scripts/twocodonmultitranscript.py {config} {seed} {TS_COPY[0]} {TS_COPY[1]} " + \
+           f"{RB_COPY} {TOTAL_TRNA} {RBS_STRENGTH[0]} {RBS_STRENGTH[1]} " + \
+           f"{TRNA_CHRG_RATES[0]} {TRNA_CHRG_RATES[1]} {output_dir} 0.5 15"
+
+def test_parse_launcher_line():
+    task = parse_launcher_line(launcher_line("config.yaml", 3, "out"))
+    assert task.simulator is SimulateTwoCodonMultiTranscript
+    assert task.config_file == "config.yaml"
+    assert task.seed == 3
+    assert task.output_dir == "out"
+    assert task.kwargs["transcript_copy_numbers"] == TS_COPY
+    assert task.kwargs["ribosome_binding_rates"] == RBS_STRENGTH
+    assert task.kwargs["ribosome_params"] == (0.5, 15)
+
+def test_parse_launcher_line_unknown_script():
+    with pytest.raises(ValueError):
+        parse_launcher_line("python3 ./scripts/unknown.py config.yaml 1")
+
+def test_batch_matches_direct_run():
+    """
+    Runs a launcher file through the batch runner and checks that each output
+    is identical to running the same simulation directly.
+    """
+    tmpdir = tempfile.mkdtemp()
+    config = serialize_config(tmpdir)
+    with open(f"{tmpdir}/launcher.txt", "w") as stream:
+        for seed in SEEDS:
+            stream.write(launcher_line(config, seed, f"{tmpdir}/batch") + "\n")
+    os.mkdir(f"{tmpdir}/batch")
+    os.mkdir(f"{tmpdir}/direct")
+    main([f"{tmpdir}/launcher.txt", "-n", "2"])
+    for seed in SEEDS:
+        simulator = SimulateTwoCodonMultiTranscript(config_file=config,
+                                                     seed=seed,
+                                                     transcript_copy_numbers=TS_COPY,
+                                                     ribosome_copy_number=RB_COPY,
+                                                     total_trna=TOTAL_TRNA,
+                                                     ribosome_binding_rates=RBS_STRENGTH,
+                                                     trna_charging_rates=TRNA_CHRG_RATES,
+                                                     ribosome_params=(0.5, 15))
+        simulator.simulate(f"{tmpdir}/direct")
+        outfile = simulator.filename()
+        assert filecmp.cmp(f"{tmpdir}/batch/{outfile}", f"{tmpdir}/direct/{outfile}")
+    shutil.rmtree(tmpdir)
+
+def test_run_sweep():
+    tmpdir = tempfile.mkdtemp()
+    config = serialize_config(tmpdir)
+    overrides = {"transcript_copy_numbers": TS_COPY,
+                 "ribosome_copy_number": RB_COPY,
+                 "total_trna": TOTAL_TRNA,
+                 "ribosome_binding_rates": RBS_STRENGTH,
+                 "trna_charging_rates": TRNA_CHRG_RATES}
+    results = run_sweep([(config, seed, overrides) for seed in SEEDS], output_dir=tmpdir, max_workers=2)
+    assert len(results) == len(SEEDS)
+    for result in results:
+        assert result.error is None
+        assert result.wall_time > 0
+        assert os.path.exists(f"{tmpdir}/{result.outfile}")
+    shutil.rmtree(tmpdir)
+
+def test_run_sweep_skip_complete():
+    tmpdir = tempfile.mkdtemp()
+    config = serialize_config(tmpdir)
+    overrides = {"transcript_copy_numbers": TS_COPY,
+                 "ribosome_copy_number": RB_COPY,
+                 "total_trna": TOTAL_TRNA,
+                 "ribosome_binding_rates": RBS_STRENGTH,
+                 "trna_charging_rates": TRNA_CHRG_RATES}
+    tasks = [(config, seed, overrides) for seed in SEEDS]
+    first = run_sweep(tasks, output_dir=tmpdir, max_workers=2, skip_complete=True)
+    assert not any(result.skipped for result in first)
+    second = run_sweep(tasks, output_dir=tmpdir, max_workers=2, skip_complete=True)
+    assert all(result.skipped for result in second)
+    shutil.rmtree(tmpdir)
+
+def test_run_sweep_catalog():
+    tmpdir = tempfile.mkdtemp()
+    config = serialize_config(tmpdir)
+    overrides = {"transcript_copy_numbers": TS_COPY,
+                 "ribosome_copy_number": RB_COPY,
+                 "total_trna": TOTAL_TRNA,
+                 "ribosome_binding_rates": RBS_STRENGTH,
+                 "trna_charging_rates": TRNA_CHRG_RATES}
+    catalog = Catalog(f"{tmpdir}/catalog.sqlite")
+    run_sweep([(config, seed, overrides) for seed in SEEDS], output_dir=tmpdir, max_workers=2, catalog=catalog)
+    runs = catalog.select(proteinX_copy_number=TS_COPY[0], status="complete")
+    assert sorted(run["seed"] for run in runs) == SEEDS
+    assert all(run["runtime"] > 0 for run in runs)
+    assert all(0 <= run["setup_time"] <= run["runtime"] for run in runs)
+    catalog.close()
+    shutil.rmtree(tmpdir)
+
+def test_run_sweep_fork_seeds():
+    tmpdir = tempfile.mkdtemp()
+    config = serialize_config(tmpdir)
+    overrides = {"transcript_copy_numbers": TS_COPY,
+                 "ribosome_copy_number": RB_COPY,
+                 "total_trna": TOTAL_TRNA,
+                 "ribosome_binding_rates": RBS_STRENGTH,
+                 "trna_charging_rates": TRNA_CHRG_RATES}
+    catalog = Catalog(f"{tmpdir}/catalog.sqlite")
+    results = run_sweep([(config, seed, overrides) for seed in SEEDS], output_dir=tmpdir, max_workers=2,
+                        catalog=catalog, fork_seeds=True)
+    assert sorted(result.task.seed for result in results) == SEEDS
+    for result in results:
+        assert result.error is None and not result.skipped
+        assert result.params["seed"] == result.task.seed
+        assert os.path.exists(f"{tmpdir}/{result.outfile}")
+    assert len(catalog.select(status="complete")) == len(SEEDS)
+    catalog.close()
+    shutil.rmtree(tmpdir)
+
+def test_run_sweep_deadline():
+    tmpdir = tempfile.mkdtemp()
+    config = serialize_config(tmpdir)
+    overrides = {"transcript_copy_numbers": TS_COPY,
+                 "ribosome_copy_number": RB_COPY,
+                 "total_trna": TOTAL_TRNA,
+                 "ribosome_binding_rates": RBS_STRENGTH,
+                 "trna_charging_rates": TRNA_CHRG_RATES}
+    tasks = [(config, seed, overrides) for seed in SEEDS]
+    deadline = time.time() + 3600
+    # the first seed only just fits in the time left when the sweep starts,
+    # so it no longer does once the other seed has run
+    cost = lambda task: deadline - time.time() - 1e-3 if task.seed == SEEDS[0] else 1.0
+    reported = []
+    results = run_sweep(tasks, output_dir=tmpdir, max_workers=1, callback=reported.append,
+                        priority=lambda task: task.seed != SEEDS[0], deadline=deadline, cost=cost)
+    deferred = [result for result in results if result.deferred]
+    assert [result.task.seed for result in deferred] == [SEEDS[0]]
+    assert len(reported) == len(SEEDS)
+    assert all(result.error is None for result in reported)
+    assert not os.path.exists(f"{tmpdir}/{SimulateTwoCodonMultiTranscript(config, SEEDS[0], **overrides).filename()}")
+    write_sweep_spec([result.task for result in deferred], f"{tmpdir}/remaining.yaml")
+    remaining = parse_sweep_spec(f"{tmpdir}/remaining.yaml")
+    assert [(task.seed, task.kwargs) for task in remaining] == [(SEEDS[0], overrides)]
+    shutil.rmtree(tmpdir)
+
+def test_run_sweep_over_budget():
+    tmpdir = tempfile.mkdtemp()
+    config = serialize_config(tmpdir)
+    overrides = {"transcript_copy_numbers": TS_COPY,
+                 "ribosome_copy_number": RB_COPY,
+                 "total_trna": TOTAL_TRNA,
+                 "ribosome_binding_rates": RBS_STRENGTH,
+                 "trna_charging_rates": TRNA_CHRG_RATES}
+    # the first seed is predicted to take far longer than the whole hour
+    cost = lambda task: 1e6 if task.seed == SEEDS[0] else 1.0
+    results = run_sweep([(config, seed, overrides) for seed in SEEDS], output_dir=tmpdir, max_workers=2,
+                        deadline=time.time() + 3600, cost=cost)
+    assert not any(result.deferred for result in results)
+    failed = [result for result in results if result.error is not None]
+    assert [result.task.seed for result in failed] == [SEEDS[0]]
+    assert failed[0].error.startswith(OVER_BUDGET)
+    shutil.rmtree(tmpdir)
+
+def test_parse_time_budget():
+    assert parse_time_budget("5:00:00") == 5 * 3600
+    assert parse_time_budget("90:30") == 90 * 60 + 30
+    assert parse_time_budget("120") == 120
+
+def test_format_launcher_line():
+    line = launcher_line("config.yaml", 3, "out") + " --skip-complete --output-format=parquet"
+    task = parse_launcher_line(line)
+    assert format_launcher_line(task) == line
+    task.time_limit = 100
+    with pytest.raises(ValueError):
+        format_launcher_line(task)
@@ -0,0 +1,48 @@
+import pytest
+import tempfile
+import shutil
+from trnasimtools.catalog import Catalog
+
+def make_catalog(dir):
+    catalog = Catalog(f"{dir}/catalog.sqlite")
+    for speed in [0.5, 1.0]:
+        for seed in [1, 2]:
+            params = {"seed": seed, "ribosome_speed": speed, "TTT_charging_rate": 100.0}
+            catalog.record(f"{dir}/run_{speed}_{seed}.tsv", params, "complete", runtime=10 * speed)
+    return catalog
+
+def test_select():
+    tmpdir = tempfile.mkdtemp()
+    catalog = make_catalog(tmpdir)
+    runs = catalog.select(ribosome_speed=0.5)
+    assert sorted(run["seed"] for run in runs) == [1, 2]
+    runs = catalog.select(ribosome_speed=1.0, seed=2, TTT_charging_rate=100)
+    assert [run["output_path"] for run in runs] == [f"{tmpdir}/run_1.0_2.tsv"]
+    assert runs[0]["runtime"] == 10.0
+    assert len(catalog.select()) == 4
+    with pytest.raises(KeyError):
+        catalog.select(speed=0.5)
+    catalog.close()
+    shutil.rmtree(tmpdir)
+
+def test_record_replaces_and_adds_columns():
+    tmpdir = tempfile.mkdtemp()
+    catalog = make_catalog(tmpdir)
+    catalog.record(f"{tmpdir}/run_0.5_1.tsv", {"seed": 1, "ribosome_speed": 0.5, "total_trna": 2500}, "failed")
+    assert len(catalog.select()) == 4
+    assert catalog.select(total_trna=2500)[0]["status"] == "failed"
+    catalog.close()
+    # entries persist and columns are picked up on reopening
+    catalog = Catalog(f"{tmpdir}/catalog.sqlite")
+    assert len(catalog.select(status="complete")) == 3
+    assert catalog.get(f"{tmpdir}/run_0.5_1.tsv")["total_trna"] == 2500
+    catalog.close()
+    shutil.rmtree(tmpdir)
+
+def test_invalid_column_name():
+    tmpdir = tempfile.mkdtemp()
+    catalog = Catalog(f"{tmpdir}/catalog.sqlite")
+    with pytest.raises(ValueError):
+        catalog.record(f"{tmpdir}/run.tsv", {'seed"; DROP TABLE runs; --': 1}, "complete")
+    catalog.close()
+    shutil.rmtree(tmpdir)
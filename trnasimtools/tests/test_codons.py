@@ -0,0 +1,46 @@
+import random
+import pytest
+from trnasimtools.codons import codon_counts, shuffled_sequence, generate_sequences
+from trnasimtools.serialize import SerializeTwoCodonMultiTranscript
+
+CODONS = ("AAA", "TAT")
+
+def list_shuffle(length, codon_comp, seed):
+    # how configs were generated before trnasimtools.codons
+    codons = ["AAA"] * round(length * codon_comp[0]) + ["TAT"] * round(length * codon_comp[1])
+    random.Random(seed).shuffle(codons)
+    return "".join(codons)
+
+def test_compat_matches_list_shuffle():
+    for length in [1, 300, 1000]:
+        for codon_comp in [(0.1, 0.9), (0.5, 0.5), (1.0, 0), (0.33, 0.67)]:
+            for seed in [1, 4]:
+                assert shuffled_sequence(CODONS, codon_counts(length, codon_comp), seed) == \
+                       list_shuffle(length, codon_comp, seed)
+    sequences = generate_sequences(CODONS, [300, 100], [(0.1, 0.9), (0.4, 0.6)], 4)
+    assert sequences == [list_shuffle(300, (0.1, 0.9), 4), list_shuffle(100, (0.4, 0.6), 4)]
+
+def test_batched_generation():
+    pytest.importorskip("numpy")
+    lengths = [1000, 1000, 300]
+    codon_comps = [(0.1, 0.9), (0.7, 0.3), (0.5, 0.5)]
+    sequences = generate_sequences(CODONS, lengths, codon_comps, 4, compat=False)
+    for (sequence, length, codon_comp) in zip(sequences, lengths, codon_comps):
+        codons = [sequence[i:i + 3] for i in range(0, len(sequence), 3)]
+        assert [codons.count(codon) for codon in CODONS] == codon_counts(length, codon_comp)
+    assert sequences[0] != list_shuffle(1000, (0.1, 0.9), 4)
+    assert generate_sequences(CODONS, lengths, codon_comps, 4, compat=False) == sequences
+
+def test_serializer_compat():
+    pytest.importorskip("numpy")
+    kwargs = {"transcript_lens": [300, 100],
+              "codon_comps": [(0.1, 0.9), (0.4, 0.6)],
+              "transcript_names": ["proteinX", "proteinY"],
+              "trna_proportion": (0.9, 0.1)}
+    compat = SerializeTwoCodonMultiTranscript(**kwargs)
+    fast = SerializeTwoCodonMultiTranscript(compat=False, **kwargs)
+    assert compat.params["transcript_data"][0]["transcript_seq"] == "A"*30 + list_shuffle(300, (0.1, 0.9), 4) + "A"*20
+    assert "compat" not in fast.params
+    for (a, b) in zip(compat.params["transcript_data"], fast.params["transcript_data"]):
+        assert len(a["transcript_seq"]) == len(b["transcript_seq"])
+        assert a["transcript_seq"].count("TAT") == b["transcript_seq"].count("TAT")
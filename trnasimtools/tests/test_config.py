@@ -0,0 +1,64 @@
+import os
+import pickle
+import tempfile
+import shutil
+import yaml
+from trnasimtools import config
+from trnasimtools.config import load_config, clear_config_cache, SIDECAR_SUFFIX
+
+CONFIG = {"total_trna": 100, "transcript_data": [{"transcript_seq": "AAA" * 100}]}
+
+def write_config(dir, data=CONFIG):
+    path = f"{dir}/config.yaml"
+    with open(path, "w") as stream:
+        yaml.dump(data, stream)
+    return path
+
+def test_load_config_cached():
+    tmpdir = tempfile.mkdtemp()
+    clear_config_cache()
+    path = write_config(tmpdir)
+    data = load_config(path)
+    assert data == CONFIG
+    assert load_config(path) is data
+    shutil.rmtree(tmpdir)
+
+def test_load_config_reloads_modified_file():
+    tmpdir = tempfile.mkdtemp()
+    clear_config_cache()
+    path = write_config(tmpdir)
+    load_config(path)
+    write_config(tmpdir, {"total_trna": 200})
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert load_config(path) == {"total_trna": 200}
+    shutil.rmtree(tmpdir)
+
+def test_load_config_sidecar():
+    tmpdir = tempfile.mkdtemp()
+    clear_config_cache()
+    path = write_config(tmpdir)
+    assert load_config(path, sidecar=True) == CONFIG
+    assert os.path.exists(path + SIDECAR_SUFFIX)
+    # a fresh process (empty cache) takes the data from the sidecar, not the YAML
+    with open(path + SIDECAR_SUFFIX, "rb") as stream:
+        stamp, data = pickle.load(stream)
+    with open(path + SIDECAR_SUFFIX, "wb") as stream:
+        pickle.dump((stamp, {"from": "sidecar"}), stream)
+    clear_config_cache()
+    assert load_config(path, sidecar=True) == {"from": "sidecar"}
+    clear_config_cache()
+    assert load_config(path, sidecar=False) == CONFIG
+    shutil.rmtree(tmpdir)
+
+def test_load_config_lru_eviction(monkeypatch):
+    tmpdir = tempfile.mkdtemp()
+    clear_config_cache()
+    monkeypatch.setattr(config, "CACHE_SIZE", 1)
+    first = write_config(tmpdir)
+    second = f"{tmpdir}/other.yaml"
+    shutil.copy(first, second)
+    data = load_config(first)
+    load_config(second)
+    assert load_config(first) is not data
+    shutil.rmtree(tmpdir)
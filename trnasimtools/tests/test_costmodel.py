@@ -0,0 +1,95 @@
+import pytest
+import tempfile
+import shutil
+from trnasimtools.costmodel import CostModel, predict_costs, pack, plan_nodes, write_slurm, format_walltime
+from trnasimtools.batch import Task
+from trnasimtools.serialize import SerializeTwoCodonMultiTranscript
+
+TEMPLATE = """#!/bin/bash
+#SBATCH -J trna-may-28              # job name
+#SBATCH -o may-28-2024.o%j          # output and error file name (%j expands to SLURM jobID)
+#SBATCH -N 5                        # number of nodes requested
+#SBATCH -n 600                      # total number of tasks to run in parallel
+#SBATCH -t 20:00:00                 # run time (hh:mm:ss) 
+
+module load launcher
+export LAUNCHER_WORKDIR=/work/tRNA-dynamics
+export LAUNCHER_JOB_FILE=/work/tRNA-dynamics/tacc/launcher/may-28-2024.txt 
+
+${LAUNCHER_DIR}/paramrun
+"""
+
+def runtime(params):
+    # 2e-4 s per simulated second per ribosome, slower at low charging rates
+    return 2e-4 * params["ribosome_copy_number"] * params["TTT_charging_rate"] ** -0.5 * params["time_limit"]
+
+def test_fit_and_predict():
+    samples = []
+    for ribosomes in (100, 500, 2500):
+        for rate in (10.0, 100.0):
+            for time_limit in (100, 1000):
+                params = {"seed": 1, "ribosome_copy_number": ribosomes, "TTT_charging_rate": rate,
+                          "ribosome_footprint": 15, "time_limit": time_limit, "config_filename": "a.yaml"}
+                samples.append((params, runtime(params)))
+    model = CostModel.fit(samples)
+    assert model.names == ["TTT_charging_rate", "ribosome_copy_number"]
+    params = {"ribosome_copy_number": 5000, "TTT_charging_rate": 50.0, "time_limit": 3000}
+    assert model.predict(params) == pytest.approx(runtime(params), rel=1e-4)
+
+def test_fit_collinear():
+    # ribosome_footprint moves with ribosome_copy_number, so the fit can't tell them apart
+    samples = []
+    for (ribosomes, footprint) in ((100, 10), (500, 50), (2500, 250)):
+        params = {"ribosome_copy_number": ribosomes, "ribosome_footprint": footprint,
+                  "TTT_charging_rate": 10.0, "time_limit": 100}
+        samples.append((params, runtime(params)))
+    model = CostModel.fit(samples)
+    params = {"ribosome_copy_number": 1000, "ribosome_footprint": 100, "TTT_charging_rate": 10.0, "time_limit": 100}
+    assert model.predict(params) == pytest.approx(runtime(params), rel=1e-6)
+
+def test_predict_costs():
+    tmpdir = tempfile.mkdtemp()
+    serializer = SerializeTwoCodonMultiTranscript(transcript_lens=[100, 100],
+                                                   codon_comps=[(0.1, 0.9), (0.4, 0.6)],
+                                                   transcript_names=["proteinX", "proteinY"],
+                                                   trna_proportion=(0.9, 0.1),
+                                                   transcript_copy_numbers=[100, 20],
+                                                   ribosome_binding_rates=[10000.0, 5000.0],
+                                                   ribosome_copy_number=100,
+                                                   total_trna=100,
+                                                   trna_charging_rates=[100.0, 100.0],
+                                                   time_limit=100,
+                                                   time_step=5)
+    serializer.serialize(tmpdir)
+    config = f"{tmpdir}/{serializer.filename()}"
+    # 1 s per simulated second per ribosome
+    model = CostModel(["ribosome_copy_number"], [0.0, 1.0])
+    tasks = [Task("SimulateTwoCodonMultiTranscript", config, 1, tmpdir, ribosome_copy_number=ribosomes)
+             for ribosomes in (10, 30, 0)]
+    # no cost can be predicted for a run with no ribosomes; it gets the median
+    assert predict_costs(model, tasks) == pytest.approx([1000.0, 3000.0, 2000.0])
+    assert predict_costs(CostModel(["no_such_param"], [0.0, 1.0]), tasks) == [1.0, 1.0, 1.0]
+    shutil.rmtree(tmpdir)
+
+def test_pack():
+    costs = [7, 5, 4, 3, 3, 2, 2]
+    bins, loads = pack(costs, 3)
+    assert sorted(i for slot in bins for i in slot) == list(range(len(costs)))
+    assert loads == [sum(costs[i] for i in slot) for slot in bins]
+    assert max(loads) == 9
+    assert plan_nodes([3600.0] * 8, tasks_per_node=2, hours=2, margin=1.0) == 2
+
+def test_write_slurm():
+    tmpdir = tempfile.mkdtemp()
+    with open(f"{tmpdir}/template.bash", "w") as stream:
+        stream.write(TEMPLATE)
+    write_slurm(f"{tmpdir}/template.bash", f"{tmpdir}/packed.bash", f"{tmpdir}/packed.txt", nodes=2, tasks=256, seconds=3 * 3600 + 1)
+    with open(f"{tmpdir}/packed.bash", "r") as stream:
+        script = stream.read()
+    assert "#SBATCH -N 2 " in script
+    assert "#SBATCH -n 256 " in script
+    assert "#SBATCH -t 03:01:00 " in script
+    assert "/tacc/launcher/packed.txt" in script
+    assert "export LAUNCHER_SCHED=dynamic" in script
+    assert format_walltime(59) == "00:01:00"
+    shutil.rmtree(tmpdir)
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+import tempfile
+import shutil
+from trnasimtools.cube import SweepCube, CubeCollector
+from trnasimtools.batch import Task, run_sweep
+from trnasimtools.io import read_output
+from trnasimtools.serialize import SerializeTwoCodonMultiTranscript
+
+SPECIES = ["proteinX", "TTT_charged"]
+
+def write_output(path, offset):
+    with open(path, "w") as stream:
+        stream.write("time\tspecies\tprotein\ttranscript\tribo_density\n")
+        for time in [5.0, 10.0]:
+            for (i, species) in enumerate(SPECIES):
+                stream.write(f"{time}\t{species}\t{offset + time + i}\t0\t0.0\n")
+
+def test_sweep_cube():
+    tmpdir = tempfile.mkdtemp()
+    cube = SweepCube.create(f"{tmpdir}/sweep.cube", {"ribosome_speed": [0.5, 1.0], "TTT_charging_rate": [10.0, 100.0]},
+                            seeds=[1, 2], times=[0.0, 5.0, 10.0], species=sorted(SPECIES))
+    for speed in [0.5, 1.0]:
+        for rate in [10.0, 100.0]:
+            path = f"{tmpdir}/run_{speed}_{rate}.tsv"
+            write_output(path, speed * rate)
+            cube.add_output({"ribosome_speed": speed, "TTT_charging_rate": rate}, 2, path)
+    cube.flush()
+    del cube
+    cube = SweepCube.open(f"{tmpdir}/sweep.cube")
+    assert cube.values.shape == (2, 2, 2, 3, 2)
+    heatmap = cube.sel(seed=2, time=10.0, species="proteinX")
+    assert isinstance(heatmap, np.memmap)
+    assert heatmap.tolist() == [[15.0, 60.0], [20.0, 110.0]]
+    assert np.isnan(cube.sel(ribosome_speed=0.5, TTT_charging_rate=10.0, seed=2, time=0.0)).all()
+    assert cube.filled[:, :, 1].all() and not cube.filled[:, :, 0].any()
+    with pytest.raises(KeyError):
+        cube.sel(ribosome_speed=2.0)
+    with pytest.raises(KeyError):
+        cube.sel(speed=0.5)
+    shutil.rmtree(tmpdir)
+
+def test_cube_collector():
+    # real runs; proteinY's RBS is too weak for it to be made, so its rows
+    # never appear in any output and the species axis must come from the config
+    tmpdir = tempfile.mkdtemp()
+    serializer = SerializeTwoCodonMultiTranscript(transcript_lens=[100, 100],
+                                                   codon_comps=[(0.1, 0.9), (0.4, 0.6)],
+                                                   transcript_names=["proteinX", "proteinY"],
+                                                   trna_proportion=(0.9, 0.1),
+                                                   transcript_copy_numbers=[100, 1],
+                                                   ribosome_binding_rates=[10000.0, 1e-9],
+                                                   ribosome_copy_number=100,
+                                                   total_trna=100,
+                                                   time_limit=20,
+                                                   time_step=5)
+    serializer.serialize(tmpdir)
+    tasks = [Task("SimulateTwoCodonMultiTranscript", f"{tmpdir}/{serializer.filename()}", seed, tmpdir,
+                  trna_charging_rates=[rate, rate])
+             for rate in [10.0, 100.0] for seed in [1, 2]]
+    collector = CubeCollector(f"{tmpdir}/sweep.cube", tasks, ["TTT_charging_rate"])
+    results = run_sweep(tasks, max_workers=2, callback=collector)
+    assert all(result.error is None for result in results)
+    cube = SweepCube.open(f"{tmpdir}/sweep.cube")
+    assert cube.axes == ["TTT_charging_rate", "seed", "time", "species"]
+    assert cube.coords["time"] == [0.0, 5.0, 10.0, 15.0, 20.0]
+    assert cube.coords["species"] == ["ATA_charged", "ATA_uncharged", "TTT_charged", "TTT_uncharged",
+                                      "__proteinX_rbs", "__proteinY_rbs", "__ribosome", "proteinX", "proteinY"]
+    assert cube.filled.all()
+    for result in results:
+        output = read_output(f"{tmpdir}/{result.outfile}")
+        assert "proteinY" not in set(output["species"])
+        last = output[output["time"] == output["time"].max()]
+        expected = float(last[last["species"] == "proteinX"]["protein"].iloc[0])
+        cell = cube.sel(TTT_charging_rate=result.params["TTT_charging_rate"], seed=result.task.seed,
+                        time=15.0, species="proteinX")
+        assert float(cell) <= expected
+    assert np.isnan(cube.sel(time=15.0, species="proteinY")).all()
+    # a resumed sweep reopens the cube rather than starting over
+    assert CubeCollector(f"{tmpdir}/sweep.cube", tasks, ["TTT_charging_rate"]).cube.filled.all()
+    shutil.rmtree(tmpdir)
@@ -0,0 +1,104 @@
+import os
+import csv
+import statistics
+import pytest
+import tempfile
+import shutil
+from trnasimtools.ensemble import EnsembleAggregator, EnsembleCollector, read_ensemble, ensemble_filename
+from trnasimtools.batch import Task, TaskResult, run_sweep
+from trnasimtools.serialize import SerializeTwoCodonMultiTranscript
+
+TIME_LIMIT = 50
+TIME_STEP = 5
+
+def sweep(dir, seeds, callback=None):
+    # real runs of one parameter point, with time_limit/time_step left to the config
+    serializer = SerializeTwoCodonMultiTranscript(transcript_lens=[100, 100],
+                                                   codon_comps=[(0.1, 0.9), (0.4, 0.6)],
+                                                   transcript_names=["proteinX", "proteinY"],
+                                                   trna_proportion=(0.9, 0.1),
+                                                   transcript_copy_numbers=[100, 20],
+                                                   ribosome_binding_rates=[10000.0, 5000.0],
+                                                   ribosome_copy_number=100,
+                                                   total_trna=100,
+                                                   trna_charging_rates=[100.0, 100.0],
+                                                   time_limit=TIME_LIMIT,
+                                                   time_step=TIME_STEP)
+    serializer.serialize(dir)
+    tasks = [Task("SimulateTwoCodonMultiTranscript", f"{dir}/{serializer.filename()}", seed, dir) for seed in seeds]
+    if callback is not None:
+        callback = callback(tasks)
+    results = run_sweep(tasks, max_workers=2, callback=callback)
+    assert all(result.error is None for result in results)
+    return tasks, [f"{dir}/{result.outfile}" for result in sorted(results, key=lambda result: result.task.seed)]
+
+def counts(paths):
+    # (i * time step, species) -> counts across runs, from each run's i-th time point
+    counts = {}
+    for path in paths:
+        with open(path, "r") as stream:
+            times = []
+            for row in csv.DictReader(stream, delimiter="\t"):
+                if not times or row["time"] != times[-1]:
+                    times.append(row["time"])
+                key = ((len(times) - 1) * TIME_STEP, row["species"])
+                counts.setdefault(key, []).append(float(row["protein"]))
+    return counts
+
+def test_aggregator_matches_exact_statistics():
+    tmpdir = tempfile.mkdtemp()
+    _, paths = sweep(tmpdir, range(1, 31))
+    aggregator = EnsembleAggregator(time_step=TIME_STEP)
+    for path in paths:
+        aggregator.add_run(path)
+    aggregator.write(f"{tmpdir}/run.ensemble.tsv", {"ribosome_speed": 0.5})
+    header, rows = read_ensemble(f"{tmpdir}/run.ensemble.tsv")
+    assert header == {"runs": 30, "params": {"ribosome_speed": 0.5}}
+    expected = counts(paths)
+    assert {(row["time"], row["species"]) for row in rows} == set(expected)
+    # seeds write each time point at a different time, but they are matched up
+    assert [row["n"] for row in rows if row["time"] == TIME_STEP and row["species"] == "__ribosome"] == [30]
+    for row in rows:
+        values = expected[(row["time"], row["species"])]
+        assert row["n"] == len(values)
+        assert row["mean"] == pytest.approx(statistics.mean(values))
+        if len(values) > 1:
+            assert row["variance"] == pytest.approx(statistics.variance(values))
+        assert row["q0.05"] <= row["q0.5"] <= row["q0.95"]
+    shutil.rmtree(tmpdir)
+
+def test_small_ensembles_are_exact():
+    tmpdir = tempfile.mkdtemp()
+    _, paths = sweep(tmpdir, range(1, 4))
+    aggregator = EnsembleAggregator(quantiles=[0.5], time_step=TIME_STEP)
+    for path in paths:
+        aggregator.add_run(path)
+    expected = counts(paths)
+    for row in aggregator.rows():
+        assert row[5] == statistics.median(expected[(row[0], row[1])])
+    shutil.rmtree(tmpdir)
+
+def test_collector():
+    tmpdir = tempfile.mkdtemp()
+    _, paths = sweep(tmpdir, [1, 2, 3], callback=EnsembleCollector)
+    ensemble = ensemble_filename(paths[0])
+    assert ensemble == ensemble_filename(paths[2]) and ensemble.endswith(".ensemble.tsv")
+    header, rows = read_ensemble(ensemble)
+    assert header["runs"] == 3 and header["params"]["time_step"] == TIME_STEP
+    assert "seed" not in header["params"]
+    assert {row["time"] for row in rows} <= {float(time) for time in range(0, TIME_LIMIT, TIME_STEP)}
+    assert [row["n"] for row in rows if row["time"] == TIME_STEP and row["species"] == "__ribosome"] == [3]
+    expected = counts(paths)
+    assert all(row["n"] == len(expected[(row["time"], row["species"])]) for row in rows)
+    shutil.rmtree(tmpdir)
+
+def test_collector_skips_deferred_points():
+    tmpdir = tempfile.mkdtemp()
+    tasks = [Task("SimulateTwoCodonMultiTranscript", "config.yaml", seed, tmpdir, total_trna=100) for seed in (1, 2)]
+    collector = EnsembleCollector(tasks)
+    collector(TaskResult(tasks[1], None, 0.0, deferred=True))
+    collector(TaskResult(tasks[0], "run_1.tsv", 1.0, params={"seed": 1, "total_trna": 100, "time_step": 5}))
+    collector.close()
+    # the next job writes it, from both seeds
+    assert not os.path.exists(f"{tmpdir}/run.ensemble.tsv")
+    shutil.rmtree(tmpdir)
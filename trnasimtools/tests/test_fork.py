@@ -0,0 +1,79 @@
+import os
+import subprocess
+import pytest
+import tempfile
+import shutil
+from trnasimtools.fork import fork_each
+from trnasimtools.serialize import SerializeTwoCodonMultiTranscript
+from trnasimtools.simulate import SimulateTwoCodonMultiTranscript
+
+TIME_LIMIT = 60
+TIME_STEP = 5
+
+def test_fork_each():
+    tmpdir = tempfile.mkdtemp()
+    def touch(item):
+        if item == 3:
+            raise ValueError("fails on purpose")
+        open(f"{tmpdir}/{item}", "w").close()
+    assert fork_each(range(5), touch, max_children=2) == {0: True, 1: True, 2: True, 3: False, 4: True}
+    assert sorted(os.listdir(tmpdir)) == ["0", "1", "2", "4"]
+    shutil.rmtree(tmpdir)
+
+def test_fork_each_leaves_other_children():
+    other = subprocess.Popen(["sleep", "0.2"])
+    assert fork_each(range(2), lambda item: None) == {0: True, 1: True}
+    assert other.wait() == 0
+
+def serialize_config(dir):
+    serializer = SerializeTwoCodonMultiTranscript(transcript_lens=[100, 100],
+                                                   codon_comps=[(0.1, 0.9), (0.4, 0.6)],
+                                                   transcript_names=["proteinX", "proteinY"],
+                                                   trna_proportion=(0.9, 0.1),
+                                                   transcript_copy_numbers=[100, 100],
+                                                   ribosome_binding_rates=[10000.0, 5000.0],
+                                                   ribosome_copy_number=100,
+                                                   total_trna=100,
+                                                   trna_charging_rates=[100.0, 100.0],
+                                                   time_limit=TIME_LIMIT,
+                                                   time_step=TIME_STEP)
+    serializer.serialize(dir)
+    return f"{dir}/{serializer.filename()}"
+
+def read_rows(path):
+    with open(path, "r") as stream:
+        return stream.readlines()
+
+def test_simulate_seeds():
+    tmpdir = tempfile.mkdtemp()
+    config = serialize_config(tmpdir)
+    os.makedirs(f"{tmpdir}/direct")
+    names = {}
+    for seed in [1, 2]:
+        direct = SimulateTwoCodonMultiTranscript(config_file=config, seed=seed)
+        direct.simulate(f"{tmpdir}/direct")
+        names[seed] = direct.filename()
+    simulator = SimulateTwoCodonMultiTranscript(config_file=config, seed=1)
+    assert simulator.simulate_seeds(tmpdir, [1, 2], max_children=1) == {1: True, 2: True}
+    for seed in [1, 2]:
+        assert read_rows(f"{tmpdir}/{names[seed]}") == read_rows(f"{tmpdir}/direct/{names[seed]}")
+    # the model is built once, and only ever run in the children
+    assert simulator.simulate_seeds(tmpdir, [1, 2, 3], skip_complete=True) == {1: False, 2: False, 3: True}
+    direct = SimulateTwoCodonMultiTranscript(config_file=config, seed=3)
+    direct.simulate(f"{tmpdir}/direct")
+    assert read_rows(f"{tmpdir}/{direct.filename()}") == read_rows(f"{tmpdir}/direct/{direct.filename()}")
+    shutil.rmtree(tmpdir)
+
+def test_simulator_reuse():
+    tmpdir = tempfile.mkdtemp()
+    config = serialize_config(tmpdir)
+    simulator = SimulateTwoCodonMultiTranscript(config_file=config, seed=1)
+    simulator.simulate(tmpdir)
+    with pytest.raises(RuntimeError):
+        simulator.simulate(tmpdir)
+    stale = SimulateTwoCodonMultiTranscript(config_file=config, seed=2)
+    stale.simulate_seeds(tmpdir, [2])
+    SimulateTwoCodonMultiTranscript(config_file=config, seed=3).simulate(tmpdir)
+    with pytest.raises(RuntimeError):
+        stale.simulate_seeds(tmpdir, [4])
+    shutil.rmtree(tmpdir)
@@ -0,0 +1,97 @@
+import os
+import pytest
+import tempfile
+import shutil
+import numpy as np
+import pandas as pd
+from trnasimtools.io import read_tsv, to_wide, to_long, convert_output, read_output, load_runs, load_cube, resample
+
+SPECIES = ["proteinX", "TTT_charged", "__ribosome"]
+TIME_LIMIT = 50
+TIME_STEP = 5
+
+def write_output(path, seed=1):
+    with open(path, "w") as stream:
+        stream.write("time\tspecies\tprotein\ttranscript\tribo_density\n")
+        for time in range(0, TIME_LIMIT, TIME_STEP):
+            for i, species in enumerate(SPECIES):
+                transcript = 100 if species == "proteinX" else 0
+                density = 0.5 * seed if species == "proteinX" else 0.0
+                stream.write(f"{float(time)}\t{species}\t{time * (i + 1) + seed}\t{transcript}\t{density}\n")
+
+def test_wide_round_trip():
+    tmpdir = tempfile.mkdtemp()
+    write_output(f"{tmpdir}/run_1.tsv")
+    df = read_tsv(f"{tmpdir}/run_1.tsv")
+    wide = to_wide(df)
+    assert list(wide["time"]) == [float(t) for t in range(0, TIME_LIMIT, TIME_STEP)]
+    assert set(SPECIES) < set(wide.columns)
+    assert "proteinX.transcript" in wide.columns
+    assert "__ribosome.transcript" not in wide.columns
+    expected = df.sort_values(["time", "species"], kind="stable").reset_index(drop=True)
+    pd.testing.assert_frame_equal(to_long(wide), expected, check_categorical=False)
+    shutil.rmtree(tmpdir)
+
+@pytest.mark.parametrize("output_format", ["parquet", "feather"])
+def test_convert_output(output_format):
+    tmpdir = tempfile.mkdtemp()
+    write_output(f"{tmpdir}/run_1.tsv")
+    expected = read_output(f"{tmpdir}/run_1.tsv")
+    path = convert_output(f"{tmpdir}/run_1.tsv", output_format)
+    assert path == f"{tmpdir}/run_1.{output_format}"
+    assert not os.path.exists(f"{tmpdir}/run_1.tsv")
+    pd.testing.assert_frame_equal(read_output(path),
+                                  expected.sort_values(["time", "species"], kind="stable").reset_index(drop=True),
+                                  check_categorical=False)
+    shutil.rmtree(tmpdir)
+
+def test_load_runs():
+    tmpdir = tempfile.mkdtemp()
+    for seed in [1, 2, 3]:
+        write_output(f"{tmpdir}/run_{seed}.tsv", seed)
+    convert_output(f"{tmpdir}/run_3.tsv", "parquet")
+    df = load_runs(f"{tmpdir}/run", 3)
+    assert list(df.index.names) == ["seed", "time", "species"]
+    assert len(df) == 3 * len(SPECIES) * (TIME_LIMIT // TIME_STEP)
+    assert list(df.index.get_level_values("seed").categories) == [1, 2, 3]
+    assert df.loc[(2, 5.0, "proteinX"), "protein"] == 7
+    assert df.loc[(3, 5.0, "proteinX"), "ribo_density"] == 1.5
+    df = load_runs(f"{tmpdir}/run", [1, 2], time_limit=20)
+    assert df.index.get_level_values("time").max() == 15.0
+    shutil.rmtree(tmpdir)
+
+def test_load_runs_missing_seed():
+    tmpdir = tempfile.mkdtemp()
+    write_output(f"{tmpdir}/run_1.tsv")
+    with pytest.raises(FileNotFoundError):
+        load_runs(f"{tmpdir}/run", [1, 2])
+    shutil.rmtree(tmpdir)
+
+def test_load_cube():
+    tmpdir = tempfile.mkdtemp()
+    for seed in [1, 2]:
+        write_output(f"{tmpdir}/run_{seed}.tsv", seed)
+    cube = load_cube(f"{tmpdir}/run", 2)
+    assert cube.values.shape == (2, TIME_LIMIT // TIME_STEP, len(SPECIES))
+    assert cube.species == sorted(SPECIES)
+    assert cube.time_step == TIME_STEP
+    # proteinX of seed 2 at t = 5: time * 1 + seed
+    assert cube.at(5.0)[1, cube.species_index("proteinX")] == 7
+    assert cube.at(5.4)[1, cube.species_index("proteinX")] == 7
+    window = cube.values[:, cube.window(10, 20), cube.species_index("TTT_charged")]
+    assert window.tolist() == [[21, 31, 41], [22, 32, 42]]
+    with pytest.raises(KeyError):
+        cube.time_index(1000.0)
+    frame = cube.to_frame()
+    assert frame.loc[(1, 45.0, "__ribosome"), "protein"] == 136
+    shutil.rmtree(tmpdir)
+
+def test_resample():
+    # records drift off the grid and one species starts late
+    df = pd.DataFrame({"time": [0.999999999, 1.0, 2.0, 3.5, 3.5],
+                       "species": ["a", "b", "a", "a", "b"],
+                       "protein": [1, 10, 2, 3, 30]})
+    values = resample(df, np.array([1.0, 2.0, 3.0, 4.0]), ["a", "b", "c"])
+    assert values[:, 0].tolist() == [1, 2, 2, 3]
+    assert values[:, 1].tolist() == [10, 10, 10, 30]
+    assert np.isnan(values[:, 2]).all()
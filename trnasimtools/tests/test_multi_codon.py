@@ -0,0 +1,76 @@
+import os
+import pytest
+import tempfile
+import shutil
+from trnasimtools.common import add_trna_species, add_two_trna_species
+from trnasimtools.serialize import SerializeMultiCodonMultiTranscript
+from trnasimtools.simulate import SimulateMultiCodonMultiTranscript
+
+# GCC and GCA are read by one tRNA through wobble pairing
+CODON_TABLE = {"AAA": ["TTT"], "GAA": ["TTC"], "GCC": ["TGC"], "GCA": ["TGC"]}
+TRNA_PROPORTIONS = {"TTT": 0.5, "TTC": 0.3, "TGC": 0.2}
+CODON_USAGES = [{"AAA": 0.4, "GAA": 0.3, "GCC": 0.2, "GCA": 0.1},
+                {"AAA": 0.1, "GAA": 0.1, "GCC": 0.8}]
+
+class RecordingModel():
+
+    def add_trna(self, trna_map, counts_map, rates_map):
+        self.trna = (trna_map, counts_map, rates_map)
+
+def make_serializer(codon_table=CODON_TABLE, seed=4):
+    return SerializeMultiCodonMultiTranscript(name="test",
+                                              transcript_lens=[101, 50],
+                                              transcript_names=["proteinX", "proteinY"],
+                                              codon_usages=CODON_USAGES,
+                                              trna_proportion=TRNA_PROPORTIONS,
+                                              codon_table=codon_table,
+                                              seed=seed,
+                                              time_limit=50,
+                                              time_step=5)
+
+def test_add_trna_species():
+    model = RecordingModel()
+    add_trna_species(CODON_TABLE, TRNA_PROPORTIONS, 100, {"TTT": 1.0, "TTC": 2.0, "TGC": 3.0}, model)
+    assert model.trna == (CODON_TABLE,
+                          {"TTT": [50, 0], "TTC": [30, 0], "TGC": [20, 0]},
+                          {"TTT": 1.0, "TTC": 2.0, "TGC": 3.0})
+    # the two codon path is a special case
+    two_codon = RecordingModel()
+    add_two_trna_species({"trna_proportion": {"TTT": 0.9, "ATA": 0.1}}, 100, [10.0, 20.0], two_codon)
+    assert two_codon.trna == ({"AAA": ["TTT"], "TAT": ["ATA"]},
+                              {"TTT": [90, 0], "ATA": [10, 0]},
+                              {"TTT": 10.0, "ATA": 20.0})
+
+def test_serialize_multi_codon():
+    serializer = make_serializer()
+    assert serializer.params["codon_table"] == CODON_TABLE
+    for (data, length, usage) in zip(serializer.params["transcript_data"], [101, 50], CODON_USAGES):
+        body = data["transcript_seq"][30:-20]
+        assert len(body) == 3 * length
+        assert sum(data["codon_counts"].values()) == length
+        assert set(data["codon_counts"]) == {codon for (codon, fraction) in usage.items() if fraction}
+        assert all(body[i:i + 3] in usage for i in range(0, len(body), 3))
+    assert make_serializer().filename() == serializer.filename()
+    assert make_serializer(seed=5).filename() != serializer.filename()
+    with pytest.raises(ValueError):
+        make_serializer(codon_table={"AAA": ["TTT"], "GAA": ["TTC"], "GCC": ["TGC"]})
+
+def test_simulate_multi_codon():
+    tmpdir = tempfile.mkdtemp()
+    serializer = make_serializer()
+    serializer.serialize(tmpdir)
+    simulator = SimulateMultiCodonMultiTranscript(config_file=f"{tmpdir}/{serializer.filename()}",
+                                                  seed=1,
+                                                  trna_charging_rates=100.0,
+                                                  ribosome_binding_rates=[10000.0, 5000.0],
+                                                  transcript_copy_numbers=[10, 10],
+                                                  ribosome_copy_number=50,
+                                                  total_trna=100)
+    assert simulator.trna_charging_rates == {"TTT": 100.0, "TTC": 100.0, "TGC": 100.0}
+    params = simulator.params()
+    assert params["TGC_proportion"] == 0.2
+    assert params["TGC_charging_rate"] == 100.0
+    assert "_100.0_1.tsv" in simulator.filename()
+    simulator.simulate(tmpdir)
+    assert os.path.getsize(f"{tmpdir}/{simulator.filename()}") > 0
+    shutil.rmtree(tmpdir)
@@ -1,3 +1,5 @@
+import os
+import csv
 import pytest
 import tempfile
 import shutil
@@ -6,6 +8,8 @@ import pinetree as pt
 import yaml
 from trnasimtools.serialize import SerializeTwoCodonMultiTranscript
 from trnasimtools.simulate import SimulateTwoCodonMultiTranscript
+from trnasimtools.output import open_output, output_complete
+from trnasimtools.ensemble import EnsembleAggregator
 
 RB_COPY = 100
 TS_COPY = [100, 100]
@@ -82,3 +86,76 @@ def test_twocodonmultitranscript():
     output2 = sim_using_classes_multi_transcript(tmpdir)
     assert filecmp.cmp(f"{tmpdir}/{output1}", f"{tmpdir}/{output2}")
     shutil.rmtree(tmpdir)
+
+def test_output_complete():
+    # rows for a protein only start once it is made, and times are those of
+    # the first event after each step
+    tmpdir = tempfile.mkdtemp()
+    output = f"{tmpdir}/{sim_using_classes_multi_transcript(tmpdir)}"
+    assert output_complete(output, TIME_LIMIT, TIME_STEP)
+    assert not output_complete(output, TIME_LIMIT + 2 * TIME_STEP, TIME_STEP)
+    shutil.rmtree(tmpdir)
+
+def test_summary_window():
+    tmpdir = tempfile.mkdtemp()
+    serializer = SerializeTwoCodonMultiTranscript(transcript_lens=[100, 100],
+                                                   codon_comps=[(0.1, 0.9), (0.4, 0.6)],
+                                                   transcript_names=["proteinX", "proteinY"],
+                                                   trna_proportion=TRNA_PROPORTIONS,
+                                                   transcript_copy_numbers=TS_COPY,
+                                                   ribosome_binding_rates=RBS_STRENGTH,
+                                                   ribosome_copy_number=RB_COPY,
+                                                   total_trna=TOTAL_TRNA,
+                                                   trna_charging_rates=TRNA_CHRG_RATES,
+                                                   time_limit=TIME_LIMIT,
+                                                   time_step=TIME_STEP)
+    serializer.serialize(tmpdir)
+    simulator = SimulateTwoCodonMultiTranscript(config_file=f"{tmpdir}/{serializer.filename()}",
+                                                 seed=SEED)
+    simulator.simulate(tmpdir, summary_window=20)
+    summary = f"{tmpdir}/{simulator.filename()}".replace(".tsv", ".summary.tsv")
+    with open(summary, "r") as stream:
+        rows = list(csv.DictReader(stream, delimiter="\t"))
+    species = [row["species"] for row in rows]
+    assert "proteinX" in species and "proteinY" in species
+    assert all(row["proteinY_binding_rate"] == str(RBS_STRENGTH[1]) for row in rows)
+    assert all(row["seed"] == str(SEED) for row in rows)
+    shutil.rmtree(tmpdir)
+
+def test_compressed_output():
+    tmpdir = tempfile.mkdtemp()
+    sim_using_classes_multi_transcript(tmpdir)
+    config = [name for name in os.listdir(tmpdir) if name.endswith(".yaml")][0]
+    simulator = SimulateTwoCodonMultiTranscript(config_file=f"{tmpdir}/{config}", seed=SEED)
+    simulator.simulate(tmpdir, output_format="tsv.gz", summary_window=20)
+    compressed = f"{tmpdir}/{simulator.output_filename('tsv.gz')}"
+    with open(f"{tmpdir}/{simulator.filename()}", "r") as plain, open_output(compressed, "rt") as stream:
+        assert stream.read() == plain.read()
+    assert simulator.is_complete(tmpdir, output_format="tsv.gz")
+    assert os.path.exists(compressed.replace(".tsv.gz", ".summary.tsv"))
+    ensemble = EnsembleAggregator()
+    ensemble.add_run(compressed)
+    assert ensemble.runs == 1 and ensemble.cells
+    shutil.rmtree(tmpdir)
+
+def test_recorded_output():
+    tmpdir = tempfile.mkdtemp()
+    sim_using_classes_multi_transcript(tmpdir)
+    config = [name for name in os.listdir(tmpdir) if name.endswith(".yaml")][0]
+    simulator = SimulateTwoCodonMultiTranscript(config_file=f"{tmpdir}/{config}", seed=SEED)
+    with open(f"{tmpdir}/{simulator.filename()}", "r") as stream:
+        full = list(csv.DictReader(stream, delimiter="\t"))
+    os.remove(f"{tmpdir}/{simulator.filename()}")
+    species = ["proteinX", "__ribosome"]
+    simulator.simulate(tmpdir, record_species=species, record_interval=2 * TIME_STEP)
+    with open(f"{tmpdir}/{simulator.filename()}", "r") as stream:
+        recorded = list(csv.DictReader(stream, delimiter="\t"))
+    # every other time point, wherever in its step pinetree wrote it
+    times = sorted({row["time"] for row in full}, key=float)
+    assert recorded == [row for row in full if row["species"] in species and times.index(row["time"]) % 2 == 0]
+    assert len({row["time"] for row in recorded}) == (len(times) + 1) // 2
+    assert simulator.is_complete(tmpdir, record_interval=2 * TIME_STEP)
+    assert not simulator.simulate(tmpdir, skip_complete=True, record_species=species, record_interval=2 * TIME_STEP)
+    with pytest.raises(ValueError):
+        simulator.simulate(tmpdir, record_interval=TIME_STEP / 2)
+    shutil.rmtree(tmpdir)
@@ -0,0 +1,100 @@
+import os
+import gzip
+import pytest
+import tempfile
+import shutil
+from trnasimtools.output import output_complete, output_stem, simulate_piped, \
+                                RecordFilter
+
+SPECIES = ["proteinX", "TTT_charged", "TTT_uncharged", "__ribosome"]
+TIME_LIMIT = 50
+TIME_STEP = 5
+
+def write_output(path, time_limit=TIME_LIMIT):
+    lines = ["time\tspecies\tprotein\ttranscript\tribo_density\n"]
+    time = 0
+    while time < time_limit:
+        for species in SPECIES:
+            lines.append(f"{float(time)}\t{species}\t10\t0\t0.0\n")
+        time += TIME_STEP
+    with open(path, "w") as stream:
+        stream.writelines(lines)
+
+def test_output_complete():
+    tmpdir = tempfile.mkdtemp()
+    write_output(f"{tmpdir}/run.tsv")
+    assert output_complete(f"{tmpdir}/run.tsv", TIME_LIMIT, TIME_STEP)
+    shutil.rmtree(tmpdir)
+
+def test_output_missing():
+    tmpdir = tempfile.mkdtemp()
+    assert not output_complete(f"{tmpdir}/run.tsv", TIME_LIMIT, TIME_STEP)
+    shutil.rmtree(tmpdir)
+
+def test_output_stopped_early():
+    tmpdir = tempfile.mkdtemp()
+    write_output(f"{tmpdir}/run.tsv", time_limit=TIME_LIMIT - 2 * TIME_STEP)
+    assert not output_complete(f"{tmpdir}/run.tsv", TIME_LIMIT, TIME_STEP)
+    shutil.rmtree(tmpdir)
+
+def test_output_truncated_mid_line():
+    tmpdir = tempfile.mkdtemp()
+    write_output(f"{tmpdir}/run.tsv")
+    with open(f"{tmpdir}/run.tsv", "a") as stream:
+        stream.write("45.0\t__ribo")
+    assert not output_complete(f"{tmpdir}/run.tsv", TIME_LIMIT, TIME_STEP)
+    shutil.rmtree(tmpdir)
+
+class FakeModel():
+    # writes its output the way pinetree does: by opening the path it is given
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def simulate(self, time_limit, time_step, output):
+        if self.fail:
+            raise RuntimeError("simulation failed")
+        write_output(output, time_limit)
+
+def test_output_stem():
+    assert output_stem("out/run_1.tsv") == "out/run_1"
+    assert output_stem("out/run_1.tsv.gz") == "out/run_1"
+    assert output_stem("out/run_1.parquet") == "out/run_1"
+
+def test_simulate_piped():
+    tmpdir = tempfile.mkdtemp()
+    write_output(f"{tmpdir}/plain.tsv")
+    simulate_piped(FakeModel(), f"{tmpdir}/run.tsv.gz", TIME_LIMIT, TIME_STEP)
+    with open(f"{tmpdir}/plain.tsv", "rb") as plain, gzip.open(f"{tmpdir}/run.tsv.gz", "rb") as compressed:
+        assert compressed.read() == plain.read()
+    assert os.path.getsize(f"{tmpdir}/run.tsv.gz") < os.path.getsize(f"{tmpdir}/plain.tsv")
+    assert output_complete(f"{tmpdir}/run.tsv.gz", TIME_LIMIT, TIME_STEP)
+    assert sorted(os.listdir(tmpdir)) == ["plain.tsv", "run.tsv.gz"]
+    shutil.rmtree(tmpdir)
+
+def test_simulate_piped_failure():
+    tmpdir = tempfile.mkdtemp()
+    with pytest.raises(RuntimeError):
+        simulate_piped(FakeModel(fail=True), f"{tmpdir}/run.tsv.gz", TIME_LIMIT, TIME_STEP)
+    assert not output_complete(f"{tmpdir}/run.tsv.gz", TIME_LIMIT, TIME_STEP)
+    shutil.rmtree(tmpdir)
+
+def test_simulate_piped_record():
+    tmpdir = tempfile.mkdtemp()
+    record = RecordFilter(["TTT_charged", "__ribosome"], 2 * TIME_STEP, TIME_STEP)
+    simulate_piped(FakeModel(), f"{tmpdir}/run.tsv", TIME_LIMIT, TIME_STEP, record)
+    with open(f"{tmpdir}/run.tsv", "r") as stream:
+        lines = stream.readlines()
+    assert lines[0].startswith("time\t")
+    rows = [line.split("\t") for line in lines[1:]]
+    assert {row[1] for row in rows} == {"TTT_charged", "__ribosome"}
+    assert sorted({float(row[0]) for row in rows}) == [0.0, 10.0, 20.0, 30.0, 40.0]
+    assert output_complete(f"{tmpdir}/run.tsv", TIME_LIMIT, record.interval)
+    with pytest.raises(ValueError):
+        RecordFilter(interval=7, time_step=TIME_STEP)
+    shutil.rmtree(tmpdir)
+
+def test_output_complete_checks_compression():
+    tmpdir = tempfile.mkdtemp()
+    write_output(f"{tmpdir}/run.tsv.gz")
+    assert not output_complete(f"{tmpdir}/run.tsv.gz", TIME_LIMIT, TIME_STEP)
+    shutil.rmtree(tmpdir)
@@ -0,0 +1,39 @@
+import time
+import pytest
+import tempfile
+import shutil
+from trnasimtools.profiling import RunProfile, load_profiles, aggregate_profiles
+
+def test_run_profile():
+    tmpdir = tempfile.mkdtemp()
+    profile = RunProfile()
+    with profile.phase("add_transcripts"):
+        time.sleep(0.01)
+    with profile.phase("simulate", output=f"{tmpdir}/run.tsv"):
+        with open(f"{tmpdir}/run.tsv", "w") as stream:
+            stream.write("x" * 100)
+    assert profile.phases["add_transcripts"]["wall"] >= 0.01
+    assert profile.phases["simulate"]["output_bytes"] == 100
+    assert profile.phases["simulate"]["peak_rss"] > 0
+    timings = profile.timings()
+    assert timings["setup"] == profile.phases["add_transcripts"]["wall"]
+    assert timings["simulate"] == profile.phases["simulate"]["wall"]
+    shutil.rmtree(tmpdir)
+
+def test_write_and_aggregate():
+    tmpdir = tempfile.mkdtemp()
+    for (speed, seed) in [(0.125, 1), (0.125, 2), (8.0, 1)]:
+        profile = RunProfile()
+        with profile.phase("simulate"):
+            pass
+        profile.phases["simulate"]["wall"] = 10.0 / speed
+        profile.write(f"{tmpdir}/profiles.jsonl", {"ribosome_speed": speed, "seed": seed})
+    profiles = load_profiles(f"{tmpdir}/profiles.jsonl")
+    assert len(profiles) == 3
+    groups = aggregate_profiles(profiles, by=["ribosome_speed"])
+    assert [group["ribosome_speed"] for group in groups] == [0.125, 8.0]
+    assert groups[0]["runs"] == 2
+    assert groups[0]["wall"] == pytest.approx(160.0)
+    assert groups[0]["mean_wall"] == pytest.approx(80.0)
+    assert groups[0]["phases"]["simulate"] == pytest.approx(160.0)
+    shutil.rmtree(tmpdir)
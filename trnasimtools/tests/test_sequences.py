@@ -0,0 +1,54 @@
+import os
+import pytest
+import tempfile
+import shutil
+from trnasimtools.serialize import SerializeTwoCodonMultiTranscript
+from trnasimtools.config import load_config, clear_config_cache
+from trnasimtools.sequences import dedupe_configs
+
+def make_serializer(codon_comp):
+    return SerializeTwoCodonMultiTranscript(transcript_lens=[100, 100],
+                                            codon_comps=[codon_comp, (0.4, 0.6)],
+                                            transcript_names=["proteinX", "GFP"],
+                                            trna_proportion=(0.9, 0.1),
+                                            time_limit=50,
+                                            time_step=5)
+
+def transcripts(config):
+    return [(data["transcript_name"], data["transcript_seq"]) for data in config["transcript_data"]]
+
+def test_sequence_store():
+    tmpdir = tempfile.mkdtemp()
+    os.mkdir(f"{tmpdir}/full")
+    os.mkdir(f"{tmpdir}/deduped")
+    for codon_comp in [(0.1, 0.9), (0.5, 0.5)]:
+        serializer = make_serializer(codon_comp)
+        serializer.serialize(f"{tmpdir}/full")
+        serializer.serialize(f"{tmpdir}/deduped", sequence_store=f"{tmpdir}/sequences")
+        full = load_config(f"{tmpdir}/full/{serializer.filename()}")
+        deduped = load_config(f"{tmpdir}/deduped/{serializer.filename()}")
+        assert transcripts(deduped) == transcripts(full)
+        # the serializer's own params are left alone
+        assert "transcript_seq" in serializer.params["transcript_data"][0]
+    # the GFP sequence is shared by both configs
+    assert len(os.listdir(f"{tmpdir}/sequences")) == 3
+    clear_config_cache()
+    shutil.rmtree(tmpdir)
+
+def test_dedupe_configs():
+    tmpdir = tempfile.mkdtemp()
+    serializer = make_serializer((0.1, 0.9))
+    serializer.serialize(tmpdir)
+    path = f"{tmpdir}/{serializer.filename()}"
+    full = transcripts(load_config(path))
+    assert dedupe_configs([path], f"{tmpdir}/sequences") > 0
+    assert transcripts(load_config(path)) == full
+    # a corrupted sequence file is caught
+    clear_config_cache()
+    for name in os.listdir(f"{tmpdir}/sequences"):
+        with open(f"{tmpdir}/sequences/{name}", "a") as stream:
+            stream.write("A")
+    with pytest.raises(ValueError):
+        load_config(path)
+    clear_config_cache()
+    shutil.rmtree(tmpdir)
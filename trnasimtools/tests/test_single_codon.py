@@ -67,3 +67,20 @@ def test_singlecodonsingletranscript():
     shutil.rmtree(tmpdir)
 
 
+
+def test_default_times():
+    # single-codon configs hold no time_limit/time_step
+    tmpdir = tempfile.mkdtemp()
+    serializer = SerializeSingleCodonSingleTranscript(transcript_len=100,
+                                                      transcript_copy_number=TS_COPY,
+                                                      ribosome_binding_rate=RBS_STRENGTH,
+                                                      ribosome_copy_number=RB_COPY,
+                                                      total_trna=TOTAL_TRNA,
+                                                      trna_charging_rate=TRNA_CHRG_RATE)
+    serializer.serialize(tmpdir)
+    simulator = SimulateSingleCodonSingleTranscript(config_file=f"{tmpdir}/{serializer.filename()}", seed=SEED)
+    assert simulator.run_params(TIME_LIMIT, TIME_STEP)["time_limit"] == TIME_LIMIT
+    assert not simulator.is_complete(tmpdir, TIME_LIMIT, TIME_STEP)
+    with pytest.raises(ValueError):
+        simulator.is_complete(tmpdir)
+    shutil.rmtree(tmpdir)
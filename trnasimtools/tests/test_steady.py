@@ -0,0 +1,115 @@
+import os
+import gzip
+import pytest
+import tempfile
+import shutil
+from trnasimtools.steady import SteadyStateMonitor, simulate_until_steady, steady_filename, read_steady
+from trnasimtools.serialize import SerializeTwoCodonMultiTranscript
+from trnasimtools.simulate import SimulateTwoCodonMultiTranscript
+
+HEADER = "time\tspecies\tprotein\ttranscript\tribo_density\n"
+
+def lines(times):
+    # charged tRNA falls to 50 by time 50, then holds; proteinX is made at a constant 2/s
+    out = []
+    for time in times:
+        out.append(f"{float(time)}\tTTT_charged\t{max(50, 100 - time)}\t0\t0.0\n")
+        out.append(f"{float(time)}\tproteinX\t{2 * time}\t10\t0.5\n")
+        out.append(f"{float(time)}\tTTT_uncharged\t{time}\t0\t0.0\n")
+    return out
+
+class FakeModel():
+    # stands in for a pinetree model, writing every time point in one simulate() call
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def simulate(self, time_limit, time_step, output):
+        if self.fail:
+            raise RuntimeError("simulation failed")
+        with open(output, "w") as stream:
+            stream.write(HEADER)
+            stream.writelines(lines(range(time_step, time_limit + 1, time_step)))
+
+def test_monitor():
+    monitor = SteadyStateMonitor(window=20, tolerance=0.05)
+    monitor.add_lines(lines(range(0, 61, 5)), HEADER)
+    assert not monitor.check()
+    assert monitor.steady_time is None
+    monitor.add_lines(lines(range(65, 71, 5)), HEADER)
+    # TTT_uncharged keeps climbing but is not watched
+    assert monitor.check()
+    assert monitor.steady_time == 70.0
+
+def test_monitor_needs_full_window():
+    monitor = SteadyStateMonitor(window=100)
+    monitor.add_lines(lines(range(50, 101, 5)), HEADER)
+    assert not monitor.check()
+
+def test_monitor_species():
+    monitor = SteadyStateMonitor(window=20, species=["TTT_uncharged"])
+    monitor.add_lines(lines(range(0, 101, 5)), HEADER)
+    assert not monitor.check()
+
+def test_simulate_until_steady():
+    tmpdir = tempfile.mkdtemp()
+    output = f"{tmpdir}/run_1.tsv"
+    monitor = SteadyStateMonitor(window=20)
+    end = simulate_until_steady(FakeModel(), output, 1000, 5, monitor)
+    assert end == 65
+    assert monitor.steady_time == 65.0
+    with open(output) as stream:
+        written = stream.readlines()
+    assert written == [HEADER] + lines(range(5, 66, 5))
+    assert sorted(os.listdir(tmpdir)) == ["run_1.tsv"]
+    shutil.rmtree(tmpdir)
+
+def test_simulate_until_steady_failure():
+    tmpdir = tempfile.mkdtemp()
+    with pytest.raises(RuntimeError):
+        simulate_until_steady(FakeModel(fail=True), f"{tmpdir}/run_1.tsv", 1000, 5, SteadyStateMonitor(window=20))
+    assert os.listdir(tmpdir) == []
+    shutil.rmtree(tmpdir)
+
+def test_adaptive_simulate():
+    # stopping early must leave exactly what an uninterrupted run writes up to then
+    tmpdir = tempfile.mkdtemp()
+    serializer = SerializeTwoCodonMultiTranscript(transcript_lens=[100, 100],
+                                                   codon_comps=[(0.1, 0.9), (0.4, 0.6)],
+                                                   transcript_names=["proteinX", "proteinY"],
+                                                   trna_proportion=(0.9, 0.1),
+                                                   transcript_copy_numbers=[100, 100],
+                                                   ribosome_binding_rates=[10000.0, 5000.0],
+                                                   ribosome_copy_number=100,
+                                                   total_trna=100,
+                                                   trna_charging_rates=[100.0, 100.0],
+                                                   time_limit=200,
+                                                   time_step=5)
+    serializer.serialize(tmpdir)
+    simulator = SimulateTwoCodonMultiTranscript(config_file=f"{tmpdir}/{serializer.filename()}", seed=1)
+    output = f"{tmpdir}/{simulator.filename()}"
+    assert simulator.simulate(tmpdir)
+    with open(output) as stream:
+        uninterrupted = stream.readlines()
+    os.remove(output)
+    # a model is built once per simulator
+    simulator = SimulateTwoCodonMultiTranscript(config_file=f"{tmpdir}/{serializer.filename()}", seed=1)
+    assert simulator.simulate(tmpdir, steady_window=40, steady_tolerance=0.5, summary_window=20)
+    steady = read_steady(steady_filename(output))
+    assert steady["steady_time"] == simulator.steady_time is not None
+    assert steady["time_limit"] == 200 and steady["end_time"] < 190
+    with open(output) as stream:
+        adaptive = stream.readlines()
+    assert adaptive == uninterrupted[:len(adaptive)]
+    assert float(adaptive[-1].split("\t")[0]) == steady["end_time"]
+    assert float(uninterrupted[len(adaptive)].split("\t")[0]) > steady["end_time"]
+    assert simulator.is_complete(tmpdir)
+    assert not simulator.simulate(tmpdir, skip_complete=True, steady_window=40)
+    shutil.rmtree(tmpdir)
+
+def test_simulate_until_steady_compressed():
+    tmpdir = tempfile.mkdtemp()
+    output = f"{tmpdir}/run_1.tsv.gz"
+    simulate_until_steady(FakeModel(), output, 1000, 5, SteadyStateMonitor(window=20))
+    with gzip.open(output, "rt") as stream:
+        assert stream.readlines() == [HEADER] + lines(range(5, 66, 5))
+    shutil.rmtree(tmpdir)
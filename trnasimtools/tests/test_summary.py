@@ -0,0 +1,50 @@
+import math
+import pytest
+import tempfile
+import shutil
+import csv
+from trnasimtools.summary import summarize_output, write_summary, summary_filename
+
+TIME_LIMIT = 100
+TIME_STEP = 5
+
+def write_output(path):
+    with open(path, "w") as stream:
+        stream.write("time\tspecies\tprotein\ttranscript\tribo_density\n")
+        for time in range(0, TIME_LIMIT, TIME_STEP):
+            # proteinX grows at 2/s, tRNA alternates around a fixed level
+            stream.write(f"{float(time)}\tproteinX\t{2 * time}\t10\t0.5\n")
+            stream.write(f"{float(time)}\tTTT_charged\t{50 + (1 if time % 10 else -1)}\t0\t0.0\n")
+
+def test_summarize_output():
+    tmpdir = tempfile.mkdtemp()
+    write_output(f"{tmpdir}/run_1.tsv")
+    stats = summarize_output(f"{tmpdir}/run_1.tsv", start_time=50)
+    assert stats["proteinX"]["n"] == 10
+    assert stats["proteinX"]["mean"] == pytest.approx(2 * 72.5)
+    assert stats["proteinX"]["slope"] == pytest.approx(2.0)
+    assert stats["proteinX"]["ribo_density"] == pytest.approx(0.5)
+    assert stats["TTT_charged"]["mean"] == pytest.approx(50.0)
+    assert stats["TTT_charged"]["variance"] == pytest.approx(10 / 9)
+    assert abs(stats["TTT_charged"]["slope"]) < 0.05
+    shutil.rmtree(tmpdir)
+
+def test_summarize_single_time_point():
+    tmpdir = tempfile.mkdtemp()
+    write_output(f"{tmpdir}/run_1.tsv")
+    stats = summarize_output(f"{tmpdir}/run_1.tsv", start_time=TIME_LIMIT - TIME_STEP)
+    assert stats["proteinX"]["n"] == 1
+    assert math.isnan(stats["proteinX"]["slope"])
+    shutil.rmtree(tmpdir)
+
+def test_write_summary():
+    tmpdir = tempfile.mkdtemp()
+    write_output(f"{tmpdir}/run_1.tsv")
+    assert summary_filename(f"{tmpdir}/run_1.tsv") == f"{tmpdir}/run_1.summary.tsv"
+    params = {"seed": 1, "ribosome_speed": 0.5}
+    write_summary(f"{tmpdir}/run_1.tsv", summary_filename(f"{tmpdir}/run_1.tsv"), params, 50)
+    with open(f"{tmpdir}/run_1.summary.tsv") as stream:
+        rows = list(csv.DictReader(stream, delimiter="\t"))
+    assert [row["species"] for row in rows] == ["proteinX", "TTT_charged"]
+    assert all(row["ribosome_speed"] == "0.5" and row["seed"] == "1" for row in rows)
+    shutil.rmtree(tmpdir)
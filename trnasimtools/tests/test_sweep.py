@@ -0,0 +1,63 @@
+import os
+import tempfile
+import shutil
+from trnasimtools.sweep import Sweep, expand
+from trnasimtools.batch import parse_launcher_line, parse_sweep_spec
+
+def make_spec(dir, chunk_size=1, shards=1):
+    return {"name": "test-sweep",
+            "simulator": "SimulateTwoCodonMultiTranscript",
+            "seeds": 2,
+            "config_dir": f"{dir}/yaml",
+            "output_dir": f"{dir}/output/speed_{{ribosome_params[0]}}",
+            "config": {"transcript_lens": [100, 100],
+                       "transcript_names": ["proteinX", "proteinY"],
+                       "trna_proportion": [0.9, 0.1],
+                       "time_limit": 50,
+                       "time_step": 5},
+            "config_grid": {"codon_comps": [[[0.1, 0.9], [0.4, 0.6]], [[0.5, 0.5], [0.4, 0.6]]]},
+            "run": {"transcript_copy_numbers": [100, 20],
+                    "ribosome_copy_number": 100,
+                    "total_trna": 100,
+                    "ribosome_binding_rates": [10000.0, 5000.0]},
+            "run_grid": {"ribosome_params": [[0.5, 15], [1.0, 15]],
+                         "trna_charging_rates": [[10.0, 10.0], [100.0, 100.0]]},
+            "launcher": {"dir": f"{dir}/launcher", "chunk_size": chunk_size, "shards": shards}}
+
+def test_expand():
+    combos = expand({"a": 1}, {"b": [1, 2], "c": [3, 4]})
+    assert combos == [{"a": 1, "b": 1, "c": 3}, {"a": 1, "b": 1, "c": 4},
+                      {"a": 1, "b": 2, "c": 3}, {"a": 1, "b": 2, "c": 4}]
+    assert expand({"a": 1}, None) == [{"a": 1}]
+
+def test_sweep_launcher():
+    tmpdir = tempfile.mkdtemp()
+    launcher_files = Sweep(make_spec(tmpdir)).write(make_output_dirs=True)
+    assert launcher_files == [f"{tmpdir}/launcher/test-sweep.txt"]
+    assert len(os.listdir(f"{tmpdir}/yaml")) == 2
+    assert sorted(os.listdir(f"{tmpdir}/output")) == ["speed_0.5", "speed_1.0"]
+    with open(launcher_files[0], "r") as stream:
+        tasks = [parse_launcher_line(line) for line in stream]
+    # 2 configs x 2 speeds x 2 charging rates x 2 seeds
+    assert len(tasks) == 16
+    assert tasks[1].seed == 2
+    assert tasks[2].kwargs["trna_charging_rates"] == [100.0, 100.0]
+    assert tasks[4].kwargs["ribosome_params"] == (1.0, 15)
+    assert tasks[4].output_dir == f"{tmpdir}/output/speed_1.0"
+    shutil.rmtree(tmpdir)
+
+def test_sweep_chunks_and_shards():
+    tmpdir = tempfile.mkdtemp()
+    launcher_files = Sweep(make_spec(tmpdir, chunk_size=5, shards=2)).write()
+    assert len(launcher_files) == 2
+    lines = []
+    for launcher_file in launcher_files:
+        with open(launcher_file, "r") as stream:
+            lines.extend(line.split() for line in stream)
+    assert len(lines) == 4
+    assert all(line[1:3] == ["-m", "trnasimtools.batch"] for line in lines)
+    tasks = [task for line in lines for task in parse_sweep_spec(line[3])]
+    assert len(tasks) == 16
+    assert len({(task.config_file, task.seed, tuple(task.kwargs["ribosome_params"]),
+                 tuple(task.kwargs["trna_charging_rates"])) for task in tasks}) == 16
+    shutil.rmtree(tmpdir)
@@ -0,0 +1,616 @@
+import os
+import json
+import time
+import shlex
+import argparse
+import traceback
+import yaml
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from typing import Optional, List, Callable
+from trnasimtools.config import SIDECAR_ENV
+from trnasimtools.output import OUTPUT_EXTENSIONS
+from trnasimtools.catalog import Catalog
+from trnasimtools.ensemble import EnsembleCollector
+from trnasimtools.simulate import SimulateSingleCodonSingleTranscript, \
+                                  SimulateTwoCodonSingleTranscript, \
+                                  SimulateTwoCodonMultiTranscript, \
+                                  SimulateMultiCodonMultiTranscript
+
+SIMULATORS = {cls.__name__: cls for cls in (SimulateSingleCodonSingleTranscript,
+                                            SimulateTwoCodonSingleTranscript,
+                                            SimulateTwoCodonMultiTranscript,
+                                            SimulateMultiCodonMultiTranscript)}
+
+# Task arguments that control how a run is done, and their defaults
+RUN_DEFAULTS = {"time_limit": None,
+                "time_step": None,
+                "skip_complete": False,
+                "output_format": "tsv",
+                "summary_window": None,
+                "profile_file": None,
+                "steady_window": None,
+                "steady_tolerance": 0.05,
+                "record_species": None,
+                "record_interval": None}
+
+class Task():
+    """
+    A single simulation: which Simulate* class to build, the arguments to build
+    it with, and where (and for how long) to run it. Tasks are picklable, so they
+    can be handed to worker processes.
+    """
+
+    def __init__(self,
+                 simulator,
+                 config_file: str,
+                 seed: int,
+                 output_dir: str,
+                 time_limit: Optional[int] = None,
+                 time_step: Optional[float] = None,
+                 skip_complete: bool = False,
+                 output_format: str = "tsv",
+                 summary_window: Optional[float] = None,
+                 profile_file: Optional[str] = None,
+                 steady_window: Optional[float] = None,
+                 steady_tolerance: float = 0.05,
+                 record_species: Optional[List[str]] = None,
+                 record_interval: Optional[float] = None,
+                 **kwargs):
+        self.simulator = SIMULATORS[simulator] if isinstance(simulator, str) else simulator
+        self.config_file = config_file
+        self.seed = seed
+        self.output_dir = output_dir
+        self.time_limit = time_limit
+        self.time_step = time_step
+        self.skip_complete = skip_complete
+        self.output_format = output_format
+        self.summary_window = summary_window
+        self.profile_file = profile_file
+        self.steady_window = steady_window
+        self.steady_tolerance = steady_tolerance
+        self.record_species = list(record_species) if record_species is not None else None
+        self.record_interval = record_interval
+        self.kwargs = kwargs
+
+    def build(self):
+        return self.simulator(config_file=self.config_file, seed=self.seed, **self.kwargs)
+
+    def run_params(self) -> dict:
+        """
+        The run's parameters (Simulate*.run_params()), read from its config:
+        no model is made.
+        """
+        return self.build().run_params(self.time_limit, self.time_step)
+
+    def species(self) -> List[str]:
+        """
+        The species the run writes: record_species, or every species its
+        config can produce (Simulate*.species()).
+        """
+        return sorted(self.record_species) if self.record_species is not None else self.build().species()
+
+    def _simulate_kwargs(self):
+        kwargs = {"skip_complete": self.skip_complete,
+                  "output_format": self.output_format,
+                  "summary_window": self.summary_window,
+                  "profile_file": self.profile_file,
+                  "steady_window": self.steady_window,
+                  "steady_tolerance": self.steady_tolerance,
+                  "record_species": self.record_species,
+                  "record_interval": self.record_interval}
+        if self.time_limit is not None:
+            kwargs["time_limit"] = self.time_limit
+        if self.time_step is not None:
+            kwargs["time_step"] = self.time_step
+        return kwargs
+
+    def simulate(self, simulator):
+        """
+        Runs a simulator built by build(). Returns whether the simulation
+        actually ran (it is skipped if skip_complete is set and its output is
+        already complete).
+        """
+        return simulator.simulate(self.output_dir, **self._simulate_kwargs())
+
+    def run(self):
+        return self.simulate(self.build())
+
+    def point(self) -> str:
+        """
+        Key of the task's parameter point: everything that defines the run
+        except the seed, so the seeds of one point share it.
+        """
+        point = [self.simulator.__name__, self.config_file, self.output_dir,
+                 self.time_limit, self.time_step, self.kwargs]
+        return json.dumps(point, sort_keys=True, default=str)
+
+    def to_dict(self):
+        """
+        The task as a sweep spec entry (see parse_sweep_spec), leaving out
+        arguments at their defaults.
+        """
+        entry = {"simulator": self.simulator.__name__,
+                 "config_file": self.config_file,
+                 "seed": self.seed,
+                 "output_dir": self.output_dir}
+        for (name, default) in RUN_DEFAULTS.items():
+            if getattr(self, name) != default:
+                entry[name] = getattr(self, name)
+        # YAML has no tuples; copying lists also keeps shared ones from being written as anchors
+        entry.update({name: list(value) if isinstance(value, (tuple, list)) else value
+                      for (name, value) in self.kwargs.items()})
+        return entry
+
+def _single_codon_single_transcript(argv):
+    return Task(SimulateSingleCodonSingleTranscript,
+                config_file=argv[0],
+                seed=int(argv[1]),
+                output_dir=argv[2],
+                time_limit=int(argv[3]),
+                time_step=float(argv[4]),
+                ribosome_params=(int(argv[5]), 15))
+
+def _two_codon_single_transcript(argv):
+    return Task(SimulateTwoCodonSingleTranscript,
+                config_file=argv[0],
+                seed=int(argv[1]),
+                transcript_copy_number=int(argv[2]),
+                ribosome_copy_number=int(argv[3]),
+                total_trna=int(argv[4]),
+                ribosome_binding_rate=float(argv[5]),
+                trna_charging_rates=[float(argv[6]), float(argv[7])],
+                output_dir=argv[8])
+
+def _two_codon_single_transcript_cellvol(argv):
+    return Task(SimulateTwoCodonSingleTranscript,
+                config_file=argv[0],
+                seed=int(argv[1]),
+                transcript_copy_number=int(argv[2]),
+                ribosome_copy_number=int(argv[3]),
+                total_trna=int(argv[4]),
+                ribosome_binding_rate=float(argv[5]),
+                trna_charging_rates=[float(argv[6]), float(argv[7])],
+                cell_volume=float(argv[8]),
+                output_dir=argv[9])
+
+def _two_codon_multi_transcript(argv):
+    ribosome_params = (1, 15)
+    if len(argv) > 11:
+        ribosome_params = (float(argv[11]), int(argv[12]))
+    return Task(SimulateTwoCodonMultiTranscript,
+                config_file=argv[0],
+                seed=int(argv[1]),
+                transcript_copy_numbers=[int(argv[2]), int(argv[3])],
+                ribosome_copy_number=int(argv[4]),
+                total_trna=int(argv[5]),
+                ribosome_binding_rates=[float(argv[6]), float(argv[7])],
+                trna_charging_rates=[float(argv[8]), float(argv[9])],
+                output_dir=argv[10],
+                ribosome_params=ribosome_params)
+
+# positional argv layouts of the scripts in scripts/, keyed by script name
+SCRIPTS = {"singlecodonsingletranscript.py": _single_codon_single_transcript,
+           "twocodonsingletranscript.py": _two_codon_single_transcript,
+           "twocodonsingletranscript_cellvol.py": _two_codon_single_transcript_cellvol,
+           "twocodonmultitranscript.py": _two_codon_multi_transcript}
+
+def _script_argv(task: Task):
+    """
+    Inverse of the argv parsers above: the script that runs task, and its
+    positional arguments.
+    """
+    kwargs = dict(task.kwargs)
+    try:
+        if task.simulator is SimulateSingleCodonSingleTranscript:
+            count, _ = kwargs.pop("ribosome_params")
+            script = "singlecodonsingletranscript.py"
+            argv = [task.config_file, task.seed, task.output_dir, task.time_limit, task.time_step, count]
+        elif task.simulator is SimulateTwoCodonSingleTranscript:
+            argv = [task.config_file, task.seed, kwargs.pop("transcript_copy_number"), kwargs.pop("ribosome_copy_number"),
+                    kwargs.pop("total_trna"), kwargs.pop("ribosome_binding_rate"), *kwargs.pop("trna_charging_rates")]
+            script = "twocodonsingletranscript.py"
+            if "cell_volume" in kwargs:
+                script = "twocodonsingletranscript_cellvol.py"
+                argv.append(kwargs.pop("cell_volume"))
+            argv.append(task.output_dir)
+        elif task.simulator is SimulateTwoCodonMultiTranscript:
+            script = "twocodonmultitranscript.py"
+            argv = [task.config_file, task.seed, *kwargs.pop("transcript_copy_numbers"), kwargs.pop("ribosome_copy_number"),
+                    kwargs.pop("total_trna"), *kwargs.pop("ribosome_binding_rates"), *kwargs.pop("trna_charging_rates"),
+                    task.output_dir, *kwargs.pop("ribosome_params", (1, 15))]
+        else:
+            raise ValueError(f"no script runs {task.simulator.__name__}")
+    except KeyError as error:
+        raise ValueError(f"{task.simulator.__name__} task needs {error} to be written as a script line")
+    times_in_argv = task.simulator is SimulateSingleCodonSingleTranscript
+    if kwargs or (not times_in_argv and (task.time_limit, task.time_step) != (None, None)):
+        raise ValueError(f"{script} cannot take {sorted(kwargs) or ['time_limit', 'time_step']}")
+    return script, [str(arg) for arg in argv]
+
+# --options the scripts accept after their positional arguments: the Task
+# attribute each one sets, and how to parse its value (None for a plain switch)
+SCRIPT_OPTIONS = {"--skip-complete": ("skip_complete", None),
+                  "--output-format": ("output_format", str),
+                  "--summary-window": ("summary_window", float),
+                  "--profile": ("profile_file", str),
+                  "--steady-window": ("steady_window", float),
+                  "--steady-tolerance": ("steady_tolerance", float),
+                  "--record-species": ("record_species", lambda value: value.split(",")),
+                  "--record-interval": ("record_interval", float)}
+
+def parse_script_args(script: str, argv: List[str]) -> Task:
+    """
+    Builds a Task from a script's argv: its positional arguments, plus any of
+    SCRIPT_OPTIONS given as --option or --option=value.
+    """
+    options = [arg for arg in argv if arg.startswith("--")]
+    task = SCRIPTS[os.path.basename(script)]([arg for arg in argv if not arg.startswith("--")])
+    for option in options:
+        name, _, value = option.partition("=")
+        if name not in SCRIPT_OPTIONS:
+            raise ValueError(f"unknown option {name} for {script}")
+        attribute, convert = SCRIPT_OPTIONS[name]
+        setattr(task, attribute, True if convert is None else convert(value))
+    return task
+
+def format_launcher_line(task: Task, python: str = "python3", script_dir: str = "./scripts") -> str:
+    """
+    Inverse of parse_launcher_line: the command that runs task with one of
+    the scripts in scripts/.
+    """
+    script, argv = _script_argv(task)
+    for (option, (attribute, convert)) in SCRIPT_OPTIONS.items():
+        value = getattr(task, attribute)
+        if isinstance(value, list):
+            value = ",".join(value)
+        if value != RUN_DEFAULTS[attribute]:
+            argv.append(option if convert is None else f"{option}={value}")
+    return shlex.join([python, f"{script_dir}/{script}"] + argv)
+
+def parse_launcher_line(line: str) -> Task:
+    tokens = shlex.split(line)
+    for i, token in enumerate(tokens):
+        if os.path.basename(token) in SCRIPTS:
+            return parse_script_args(token, tokens[i + 1:])
+    raise ValueError(f"no known simulation script in launcher line: {line}")
+
+def parse_launcher(launcher_file: str) -> List[Task]:
+    tasks = []
+    with open(launcher_file, "r") as stream:
+        for line in stream:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                tasks.append(parse_launcher_line(line))
+    return tasks
+
+def parse_sweep_spec(spec_file: str) -> List[Task]:
+    """
+    Reads a YAML sweep spec: a list of tasks under the `tasks` key, each a
+    mapping of Task arguments with `simulator` naming the Simulate* class.
+    """
+    with open(spec_file, "r") as stream:
+        spec = yaml.safe_load(stream)
+    return [Task(**task) for task in spec["tasks"]]
+
+def load_tasks(path: str) -> List[Task]:
+    if path.endswith((".yaml", ".yml")):
+        return parse_sweep_spec(path)
+    return parse_launcher(path)
+
+class TaskResult():
+    """
+    Outcome of one task in a sweep. `skipped` is set if the task's output was
+    already complete. `error` holds the formatted traceback if the task raised.
+    `outfile` and `params` are None if the simulator could not be built.
+    `timings` splits the wall time of a run into model setup and simulation.
+    `deferred` is set if the task was not started because it would not have
+    finished before the sweep's deadline.
+    """
+
+    def __init__(self,
+                 task: Task,
+                 outfile: Optional[str],
+                 wall_time: float,
+                 skipped: bool = False,
+                 error: Optional[str] = None,
+                 params: Optional[dict] = None,
+                 timings: Optional[dict] = None,
+                 deferred: bool = False):
+        self.task = task
+        self.outfile = outfile
+        self.wall_time = wall_time
+        self.skipped = skipped
+        self.error = error
+        self.params = params
+        self.timings = timings
+        self.deferred = deferred
+
+def _timed_run(task: Task):
+    start = time.perf_counter()
+    outfile, params = (None, None)
+    try:
+        simulator = task.build()
+        outfile = simulator.output_filename(task.output_format)
+        params = simulator.run_params(task.time_limit, task.time_step)
+        ran = task.simulate(simulator)
+    except Exception:
+        return TaskResult(task, outfile, time.perf_counter() - start, error=traceback.format_exc(), params=params)
+    return TaskResult(task, outfile, time.perf_counter() - start, skipped=not ran, params=params,
+                      timings=getattr(simulator, "timings", None))
+
+def _timed_run_seeds(tasks: List[Task]) -> List[TaskResult]:
+    # the seeds of one parameter point, run by forking one built model (Simulate*.simulate_seeds)
+    start = time.perf_counter()
+    outfiles, params = ({}, {})
+    try:
+        simulator = tasks[0].build()
+        for task in tasks:
+            simulator.seed = task.seed
+            outfiles[task.seed] = simulator.output_filename(task.output_format)
+            params[task.seed] = simulator.run_params(task.time_limit, task.time_step)
+        simulator.seed = tasks[0].seed
+        # one worker is one core, so the seeds take turns
+        ran = simulator._simulate_seeds(tasks[0].output_dir, [task.seed for task in tasks],
+                                        max_children=1, **tasks[0]._simulate_kwargs())
+    except Exception:
+        wall_time = (time.perf_counter() - start) / len(tasks)
+        return [TaskResult(task, outfiles.get(task.seed), wall_time, error=traceback.format_exc(),
+                           params=params.get(task.seed)) for task in tasks]
+    # every run gets an equal share of the wall time, model construction included
+    wall_time = (time.perf_counter() - start) / len(tasks)
+    setup = simulator.profile.timings()["setup"] / len(tasks) if any(ran.values()) else 0.0
+    results = []
+    for task in tasks:
+        if ran[task.seed] is None:
+            results.append(TaskResult(task, outfiles[task.seed], wall_time, params=params[task.seed],
+                                      error=f"seed {task.seed} failed in its forked run, see stderr"))
+        else:
+            results.append(TaskResult(task, outfiles[task.seed], wall_time, skipped=not ran[task.seed],
+                                      params=params[task.seed],
+                                      timings={"setup": setup, "simulate": wall_time - setup}))
+    return results
+
+def _timed_run_group(tasks: List[Task]) -> List[TaskResult]:
+    if len(tasks) == 1:
+        return [_timed_run(tasks[0])]
+    return _timed_run_seeds(tasks)
+
+# error of tasks predicted not to finish in any job of a sweep's time budget
+OVER_BUDGET = "longer than the time budget"
+
+def run_sweep(tasks: List,
+              output_dir: Optional[str] = None,
+              simulator = SimulateTwoCodonMultiTranscript,
+              max_workers: Optional[int] = None,
+              priority: Optional[Callable] = None,
+              callback: Optional[Callable] = None,
+              skip_complete: bool = False,
+              catalog: Optional[Catalog] = None,
+              deadline: Optional[float] = None,
+              cost: Optional[Callable] = None,
+              fork_seeds: bool = False) -> List[TaskResult]:
+    """
+    Runs tasks on a pool of worker processes (default: one per core) and returns
+    a TaskResult per task, in completion order.
+
+    Tasks are either Task objects or (config_file, seed, overrides) tuples, where
+    overrides are keyword arguments for `simulator` (plus time_limit/time_step)
+    and output goes to `output_dir`. Each task is submitted on its own, so a
+    worker picks up the next one as soon as it is free; pass `priority` (a
+    function of a Task) to submit the most expensive tasks first and keep long
+    runs from landing at the tail of the sweep. `callback` is called with each
+    TaskResult as it completes. With `skip_complete`, tasks whose output already
+    exists and reached time_limit are skipped, so an interrupted sweep can be
+    resubmitted as is. Every result is recorded in `catalog`, if given.
+
+    With `deadline` (a time.time() timestamp, e.g. the end of the SLURM
+    job), tasks are handed out as workers free up, and a task is only started
+    if it is predicted to finish in time: `cost` (a function of a Task) gives
+    its runtime in seconds (computed once per task, up front). The rest come
+    back as deferred results, passed to `callback` but not to `catalog`, so
+    the next job can run them rather than having them killed part way. A
+    task predicted to take longer than the whole time left when the sweep
+    starts would be deferred by every job, so it fails instead, with an
+    error starting with OVER_BUDGET.
+
+    With `fork_seeds`, the seeds of each parameter point (Task.point()) go to
+    one worker, which builds the model once and forks it per seed (see
+    Simulate*.simulate_seeds), so big models are not rebuilt for every seed.
+    """
+    tasks = [task if isinstance(task, Task) else
+             Task(simulator, config_file=task[0], seed=task[1], output_dir=output_dir, **task[2])
+             for task in tasks]
+    if skip_complete:
+        for task in tasks:
+            task.skip_complete = True
+    if priority is not None:
+        tasks = sorted(tasks, key=priority, reverse=True)
+    groups = {}
+    for task in tasks:
+        groups.setdefault(task.point() if fork_seeds else id(task), []).append(task)
+    results = []
+
+    def collect(result):
+        if catalog is not None:
+            catalog.record_result(result)
+        if callback is not None:
+            callback(result)
+        results.append(result)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        if deadline is None:
+            futures = [executor.submit(_timed_run_group, group) for group in groups.values()]
+            for future in as_completed(futures):
+                for result in future.result():
+                    collect(result)
+            return results
+        workers = max_workers or os.cpu_count() or 1
+        budget = deadline - time.time()
+        costs = [sum(cost(task) for task in group) if cost is not None else 0.0 for group in groups.values()]
+        queue, running = (list(reversed(list(zip(groups.values(), costs)))), set())
+        while queue or running:
+            while queue and len(running) < workers:
+                group, group_cost = queue.pop()
+                if group_cost > budget:
+                    error = f"{OVER_BUDGET}: predicted to take {group_cost:.0f} s, the job has {budget:.0f} s"
+                    for task in group:
+                        collect(TaskResult(task, None, 0.0, error=error))
+                elif time.time() + group_cost > deadline:
+                    for task in group:
+                        result = TaskResult(task, None, 0.0, deferred=True)
+                        if callback is not None:
+                            callback(result)
+                        results.append(result)
+                else:
+                    running.add(executor.submit(_timed_run_group, group))
+            if running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for result in future.result():
+                        collect(result)
+    return results
+
+def _report(result: TaskResult):
+    if result.deferred:
+        print(f"{result.task.config_file} seed {result.task.seed}\tdeferred", flush=True)
+    elif result.skipped:
+        print(f"{result.outfile}\tcomplete, skipped", flush=True)
+    elif result.error is None:
+        print(f"{result.outfile}\t{result.wall_time:.2f}\tsetup {result.timings['setup']:.2f}", flush=True)
+    else:
+        print(f"FAILED {result.task.config_file} seed {result.task.seed}\t{result.wall_time:.2f}\n{result.error}", flush=True)
+
+def write_sweep_spec(tasks: List[Task], path: str):
+    """
+    Inverse of parse_sweep_spec.
+    """
+    with open(path, "w") as stream:
+        yaml.safe_dump({"tasks": [task.to_dict() for task in tasks]}, stream, sort_keys=False)
+
+def parse_time_budget(value: str) -> float:
+    """
+    Seconds in a time given as seconds or [[hh:]mm:]ss, e.g. 5:00:00.
+    """
+    seconds = 0.0
+    for part in value.split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+def _cost_from_catalog(path: str, margin: float) -> Optional[Callable]:
+    # the cost model imports from this module
+    from trnasimtools.costmodel import CostModel, samples_from_catalog
+    samples = samples_from_catalog(path)
+    if not samples:
+        return None
+    model = CostModel.fit(samples)
+
+    def cost(task):
+        try:
+            return margin * model.predict(task.run_params())
+        except (KeyError, ValueError, TypeError):
+            # a parameter the model was fitted on is missing or not positive: no prediction
+            return 0.0
+
+    return cost
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run a launcher file or sweep spec with one long-lived worker process per core.")
+    parser.add_argument("tasks", help="launcher text file, or YAML sweep spec")
+    parser.add_argument("-n", "--processes", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--skip-complete", action="store_true", help="skip tasks whose output is already complete")
+    parser.add_argument("--output-format", choices=list(OUTPUT_EXTENSIONS), default=None,
+                        help="output format for every task (default: as given per task)")
+    parser.add_argument("--summary-window", type=float, default=None,
+                        help="write per-species statistics over the last N seconds of every run")
+    parser.add_argument("--profile", default=None,
+                        help="append a JSON line of per-phase wall time, peak RSS and output size per run to this file")
+    parser.add_argument("--fork-seeds", action="store_true",
+                        help="build each parameter point's model once and fork it for every seed")
+    parser.add_argument("--steady-window", type=float, default=None,
+                        help="stop every run once it has held steady for N seconds")
+    parser.add_argument("--steady-tolerance", type=float, default=None,
+                        help="relative change allowed over the steady window (default 0.05)")
+    parser.add_argument("--record-species", default=None,
+                        help="comma-separated species to write, e.g. GFP,TTT_charged,__ribosome (default: all)")
+    parser.add_argument("--record-interval", type=float, default=None,
+                        help="write output every N seconds, a multiple of the time step (default: every step)")
+    parser.add_argument("--ensemble", action="store_true",
+                        help="write ensemble statistics across the seeds of each parameter point as runs finish")
+    parser.add_argument("--cube", default=None,
+                        help="write every run into a memory-mapped sweep cube at this path (needs numpy and pandas)")
+    parser.add_argument("--cube-axes", default=None,
+                        help="comma-separated run parameters to use as the cube's axes, e.g. ribosome_speed,TTT_charging_rate")
+    parser.add_argument("--catalog", default=None, help="SQLite run catalog to record every task in")
+    parser.add_argument("--time-budget", type=parse_time_budget, default=None,
+                        help="wall time this job has left, as seconds or hh:mm:ss; tasks predicted (from the "
+                             "runtimes in --catalog) not to finish within it are not started")
+    parser.add_argument("--margin", type=float, default=1.2, help="safety factor on predicted runtimes (default 1.2)")
+    parser.add_argument("--remaining", default=None,
+                        help="write the tasks that were not started or failed to this YAML sweep spec, to run next")
+    parser.add_argument("--config-sidecar", action="store_true", help="cache parsed configs as pickles next to the YAML")
+    args = parser.parse_args(argv)
+
+    if args.config_sidecar:
+        # inherited by the worker processes
+        os.environ[SIDECAR_ENV] = "1"
+    tasks = load_tasks(args.tasks)
+    for task in tasks:
+        if args.output_format is not None:
+            task.output_format = args.output_format
+        if args.summary_window is not None:
+            task.summary_window = args.summary_window
+        if args.profile is not None:
+            task.profile_file = args.profile
+        if args.steady_window is not None:
+            task.steady_window = args.steady_window
+        if args.steady_tolerance is not None:
+            task.steady_tolerance = args.steady_tolerance
+        if args.record_species is not None:
+            task.record_species = args.record_species.split(",")
+        if args.record_interval is not None:
+            task.record_interval = args.record_interval
+    catalog = Catalog(args.catalog) if args.catalog is not None else None
+    callbacks = [_report]
+    if args.ensemble:
+        ensembles = EnsembleCollector(tasks)
+        callbacks.append(ensembles)
+    if args.cube is not None:
+        if args.cube_axes is None:
+            parser.error("--cube needs --cube-axes")
+        # numpy and pandas are only needed for the cube
+        from trnasimtools.cube import CubeCollector
+        callbacks.append(CubeCollector(args.cube, tasks, args.cube_axes.split(",")))
+    def callback(result):
+        for function in callbacks:
+            function(result)
+    deadline, cost = (None, None)
+    if args.time_budget is not None:
+        deadline = time.time() + args.time_budget
+        if args.catalog is not None:
+            cost = _cost_from_catalog(args.catalog, args.margin)
+    results = run_sweep(tasks, max_workers=args.processes, callback=callback,
+                        skip_complete=args.skip_complete, catalog=catalog, deadline=deadline, cost=cost,
+                        fork_seeds=args.fork_seeds)
+    if catalog is not None:
+        catalog.close()
+    if args.ensemble:
+        ensembles.close()
+    deferred = [result for result in results if result.deferred]
+    if deferred:
+        print(f"{len(deferred)} tasks deferred, not enough time left to finish them", flush=True)
+    over_budget = [result for result in results if result.error is not None and result.error.startswith(OVER_BUDGET)]
+    if over_budget:
+        print(f"{len(over_budget)} tasks are predicted to take longer than the whole time budget "
+              f"and were not run; they need a longer job", flush=True)
+    if args.remaining is not None:
+        # whole parameter points, so the next job's ensembles cover every seed; done seeds are skipped
+        unfinished = {result.task.point() for result in results if result.deferred or result.error is not None}
+        remaining = [task for task in tasks if task.point() in unfinished]
+        for task in remaining:
+            task.skip_complete = True
+        write_sweep_spec(remaining, args.remaining)
+    if any(result.error is not None for result in results):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import re
+import time
+import sqlite3
+from typing import Optional, List
+
+# columns every catalog entry has; run parameters get a column each, added as they appear
+BASE_COLUMNS = {"output_path": "TEXT PRIMARY KEY",
+                "status": "TEXT",
+                "runtime": "REAL",
+                "recorded": "REAL"}
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+def _quote(name):
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"invalid catalog column name {name}")
+    return f'"{name}"'
+
+class Catalog():
+    """
+    SQLite index of simulation runs: one row per output file, holding the
+    run's full parameter set (Simulate*.run_params()), status and runtime. Each
+    parameter is its own indexed column, so selecting a slice of a sweep is an
+    index lookup:
+
+        catalog = Catalog("output/june-02-2024/catalog.sqlite")
+        catalog.select(ribosome_speed=0.5, TTT_charging_rate=100.0)
+
+    SQLite expects a single writer, so runs should be recorded from one
+    process (e.g. the parent of a sweep), not from every worker.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        columns = ", ".join(f"{name} {kind}" for (name, kind) in BASE_COLUMNS.items())
+        with self.connection:
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS runs ({columns})")
+        self.columns = self._columns()
+
+    def _columns(self):
+        return [row["name"] for row in self.connection.execute("PRAGMA table_info(runs)")]
+
+    def _add_columns(self, names):
+        for name in names:
+            if name not in self.columns:
+                self.connection.execute(f"ALTER TABLE runs ADD COLUMN {_quote(name)}")
+                self.connection.execute(f"CREATE INDEX IF NOT EXISTS {_quote('idx_' + name)} ON runs ({_quote(name)})")
+                self.columns.append(name)
+
+    def record(self, 
+               output_path: str, 
+               params: dict, 
+               status: str, 
+               runtime: Optional[float] = None,
+               timings: Optional[dict] = None):
+        """
+        Adds or replaces the entry for output_path. Per-phase timings are
+        stored in <phase>_time columns.
+        """
+        row = {**params, "output_path": output_path, "status": status,
+               "runtime": runtime, "recorded": time.time()}
+        if timings is not None:
+            row.update({f"{phase}_time": seconds for (phase, seconds) in timings.items()})
+        with self.connection:
+            self._add_columns(row)
+            names = ", ".join(_quote(name) for name in row)
+            placeholders = ", ".join("?" for _ in row)
+            self.connection.execute(f"INSERT OR REPLACE INTO runs ({names}) VALUES ({placeholders})",
+                                    list(row.values()))
+
+    def record_result(self, result, output_dir: Optional[str] = None):
+        """
+        Records a batch.TaskResult. Failed tasks are recorded if their
+        parameters are known (i.e. the simulator could be built).
+        """
+        if result.params is None:
+            return
+        output_dir = output_dir if output_dir is not None else result.task.output_dir
+        output_path = f"{output_dir}/{result.outfile}"
+        if result.skipped:
+            # the output was produced earlier; keep its entry (and runtime) if there is one
+            if self.get(output_path) is None:
+                self.record(output_path, result.params, "complete")
+            return
+        status = "failed" if result.error is not None else "complete"
+        self.record(output_path, result.params, status, result.wall_time, result.timings)
+
+    def get(self, output_path: str) -> Optional[dict]:
+        row = self.connection.execute("SELECT * FROM runs WHERE output_path = ?", (output_path,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def select(self, **params) -> List[dict]:
+        """
+        Returns the entries matching all the given column values (parameters,
+        or status), e.g. select(seed=1, status="complete").
+        """
+        for name in params:
+            if name not in self.columns:
+                raise KeyError(f"no catalog column {name}; known columns: {self.columns}")
+        where = " AND ".join(f"{_quote(name)} = ?" for name in params)
+        query = "SELECT * FROM runs" + (f" WHERE {where}" if where else "")
+        return [dict(row) for row in self.connection.execute(query, list(params.values()))]
+
+    def close(self):
+        self.connection.close()
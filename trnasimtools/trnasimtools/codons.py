@@ -0,0 +1,96 @@
+import random
+from typing import List, Sequence
+
+def codon_counts(length: int, codon_comp: Sequence[float]) -> List[int]:
+    """
+    Number of each codon in a transcript of `length` codons with the given
+    composition (fractions, one per codon), rounded as the configs always have.
+    """
+    return [round(length * fraction) for fraction in codon_comp]
+
+def apportion(length: int, codon_comp: Sequence[float]) -> List[int]:
+    """
+    Codon counts for a transcript of exactly `length` codons: the composition
+    (normalized to sum to one) scaled to length, with the codons left over after
+    rounding down given to the largest remainders. Unlike codon_counts, the
+    counts always add up to length, which matters with dozens of codons.
+    """
+    total = sum(codon_comp)
+    exact = [length * fraction / total for fraction in codon_comp]
+    counts = [int(value) for value in exact]
+    by_remainder = sorted(range(len(exact)), key=lambda i: exact[i] - counts[i], reverse=True)
+    for i in by_remainder[:length - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+_COMPLEMENT = str.maketrans("ACGT", "TGCA")
+
+def complement_codon_table(codons: Sequence[str]) -> dict:
+    """
+    A codon table in which each codon is read only by the tRNA with the
+    Watson-Crick anticodon (its reverse complement), e.g. AAA by TTT. Real
+    decoding, with wobble pairing, has to be given as an explicit table.
+    """
+    return {codon: [codon.translate(_COMPLEMENT)[::-1]] for codon in codons}
+
+def _codes_to_sequence(codes: bytes, codons: Sequence[str]) -> str:
+    # codes are indices into codons; all codons are three bases, so each base
+    # position of the sequence can be filled with one translate
+    out = bytearray(3 * len(codes))
+    for position in range(3):
+        table = bytearray(256)
+        for (code, codon) in enumerate(codons):
+            table[code] = ord(codon[position])
+        out[position::3] = codes.translate(table)
+    return out.decode()
+
+def shuffled_sequence(codons: Sequence[str], counts: Sequence[int], seed: int) -> str:
+    """
+    The codons, counts[i] copies of codons[i], in a random order drawn with
+    random.Random(seed). The order is the same as shuffling the list of codon
+    strings, which is how configs were generated before, so existing seeds
+    give identical sequences.
+    """
+    codes = []
+    for (code, count) in enumerate(counts):
+        codes += [code] * count
+    # shuffle() draws the same swaps for any list of this length
+    random.Random(seed).shuffle(codes)
+    return _codes_to_sequence(bytes(codes), codons)
+
+def generate_sequences(codons: Sequence[str],
+                       lengths: Sequence[int],
+                       codon_comps: Sequence[Sequence[float]],
+                       seed: int,
+                       compat: bool = True,
+                       exact_length: bool = False) -> List[str]:
+    """
+    Generates one shuffled codon sequence per (length, codon_comp) pair.
+
+    With compat, each sequence is shuffled_sequence(..., seed), exactly the
+    sequence older configs have. Otherwise sequences are drawn in one batch
+    with numpy's Generator.permuted: the same distribution, much faster for
+    long transcripts and many compositions, but different sequences, which
+    depend on the seed and the whole batch.
+
+    With exact_length, codon counts come from apportion() rather than
+    codon_counts(), so every sequence has exactly its length in codons.
+    """
+    count = apportion if exact_length else codon_counts
+    counts = [count(length, codon_comp) for (length, codon_comp) in zip(lengths, codon_comps)]
+    if compat:
+        return [shuffled_sequence(codons, transcript_counts, seed) for transcript_counts in counts]
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    table = np.frombuffer("".join(codons).encode(), dtype=np.uint8).reshape(len(codons), 3)
+    sequences = [None] * len(counts)
+    # sequences of the same length are shuffled together as the rows of one array
+    by_length = {}
+    for (i, transcript_counts) in enumerate(counts):
+        by_length.setdefault(sum(transcript_counts), []).append(i)
+    for indices in by_length.values():
+        codes = np.stack([np.repeat(np.arange(len(codons), dtype=np.uint8), counts[i]) for i in indices])
+        shuffled = table[rng.permuted(codes, axis=1)]
+        for (row, i) in enumerate(indices):
+            sequences[i] = shuffled[row].tobytes().decode()
+    return sequences
@@ -9,25 +9,69 @@ def add_transcripts(ribosome_params,
     ribosome_footprint = ribosome_params[1]
     # convert CDS length to nt and add 50 nt buffer (30 upstream, 20 downstream)
     transcript_len = transcript_data["transcript_len"] * 3 + 50
-    i = 0
-    # pinetree can only add one transcript at a time for some reason, so do this in a loop
-    while i < transcript_copy_number:
+    # the gene annotation and sequence are the same for every copy, so set them up once
+    gene = {"name": transcript_data["transcript_name"], 
+            "start": 31, 
+            "stop": transcript_len - 20,
+            "rbs_start": (31 - ribosome_footprint), 
+            "rbs_stop": 31, 
+            "rbs_strength": ribosome_binding_rate}
+    # pinetree can only add one transcript at a time, and each registered transcript 
+    # carries its own ribosomes, so every copy needs its own Transcript object.
+    # A copy costs under 10 us to build and register (add_transcripts in
+    # benchmarks/run_benchmarks.py), a small fraction of even short runs
+    for _ in range(transcript_copy_number):
         transcript = pt.Transcript("transcript", transcript_len)
-        transcript.add_gene(name=transcript_data["transcript_name"], start=31, stop=transcript_len - 20,
-                            rbs_start=(31 - ribosome_footprint), rbs_stop=31, 
-                            rbs_strength=ribosome_binding_rate)
+        transcript.add_gene(**gene)
         transcript.add_seq(seq=transcript_data["transcript_seq"])
         model.register_transcript(transcript)
-        i += 1
+
+def add_trna_species(codon_table,
+                     trna_proportions,
+                     total_trna,
+                     charging_rates,
+                     model):
+    """
+    Adds tRNA to the model. codon_table maps each codon to the anticodons of
+    the tRNA species that read it (pinetree's trna_map), trna_proportions and
+    charging_rates map each anticodon to its share of total_trna and its
+    charging rate. All tRNA starts charged (pinetree counts are [charged,
+    uncharged]).
+    """
+    counts_map = {anticodon: [int(total_trna * proportion), 0]
+                  for (anticodon, proportion) in trna_proportions.items()}
+    rates_map = {anticodon: charging_rates[anticodon] for anticodon in trna_proportions}
+    model.add_trna(codon_table, counts_map, rates_map)
 
 def add_two_trna_species(simulation_data,
                          total_trna,
                          trna_charging_rates,
                          model):
-    trna1_proportion = simulation_data["trna_proportion"]["TTT"]
-    trna2_proportion = simulation_data["trna_proportion"]["ATA"]
-    counts_map = {"TTT": [int(total_trna * trna1_proportion), 0], 
-                    "ATA": [int(total_trna * trna2_proportion), 0]}
-    trna_map = {"AAA": ["TTT"], "TAT": ["ATA"]}
-    rates_map = {"TTT": trna_charging_rates[0], "ATA": trna_charging_rates[1]}
-    model.add_trna(trna_map, counts_map, rates_map)
+    add_trna_species({"AAA": ["TTT"], "TAT": ["ATA"]},
+                     {"TTT": simulation_data["trna_proportion"]["TTT"],
+                      "ATA": simulation_data["trna_proportion"]["ATA"]},
+                     total_trna,
+                     {"TTT": trna_charging_rates[0], "ATA": trna_charging_rates[1]},
+                     model)
+
+def trna_params(simulation_data, trna_charging_rates):
+    """
+    Flat tRNA parameters of a two codon config: proportion and charging rate
+    per tRNA species.
+    """
+    params = {}
+    for (anticodon, rate) in zip(["TTT", "ATA"], trna_charging_rates):
+        params[f"{anticodon}_proportion"] = simulation_data["trna_proportion"][anticodon]
+        params[f"{anticodon}_charging_rate"] = rate
+    return params
+
+def multi_trna_params(simulation_data, trna_charging_rates):
+    """
+    Flat tRNA parameters of a multi codon config: proportion and charging rate
+    per tRNA species, for a dict of charging rates keyed by anticodon.
+    """
+    params = {}
+    for (anticodon, proportion) in simulation_data["trna_proportion"].items():
+        params[f"{anticodon}_proportion"] = proportion
+        params[f"{anticodon}_charging_rate"] = trna_charging_rates[anticodon]
+    return params
@@ -0,0 +1,84 @@
+import os
+import pickle
+from collections import OrderedDict
+from typing import Optional
+import yaml
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+from trnasimtools.sequences import resolve, clear_sequence_cache
+
+# number of parsed configs kept in memory per process
+CACHE_SIZE = 128
+# set to "1" to read/write a pickled copy of each config next to the YAML
+SIDECAR_ENV = "TRNASIMTOOLS_CONFIG_SIDECAR"
+SIDECAR_SUFFIX = ".pkl"
+
+# parsed configs, keyed by (absolute path, mtime, size) so an edited file is re-read
+_config_cache = OrderedDict()
+
+def _sidecar_enabled(sidecar):
+    if sidecar is None:
+        return os.environ.get(SIDECAR_ENV, "") == "1"
+    return sidecar
+
+def _read_sidecar(path, stamp):
+    try:
+        with open(path + SIDECAR_SUFFIX, "rb") as stream:
+            sidecar_stamp, data = pickle.load(stream)
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        return None
+    return data if sidecar_stamp == stamp else None
+
+def _write_sidecar(path, stamp, data):
+    # write to a temp file and rename, since several workers may race on the same config
+    tmp = f"{path}{SIDECAR_SUFFIX}.{os.getpid()}"
+    try:
+        with open(tmp, "wb") as stream:
+            pickle.dump((stamp, data), stream, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path + SIDECAR_SUFFIX)
+    except OSError:
+        # a read-only config directory just means no sidecar
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def _read_config(path, stamp, sidecar):
+    if sidecar:
+        data = _read_sidecar(path, stamp)
+        if data is not None:
+            return data
+    with open(path, "r") as stream:
+        data = yaml.load(stream, Loader=SafeLoader)
+    resolve(data, os.path.dirname(path))
+    if sidecar:
+        _write_sidecar(path, stamp, data)
+    return data
+
+def load_config(config_file: str, sidecar: Optional[bool] = None):
+    """
+    Loads a YAML config, returning a cached copy if this process has already
+    parsed the file and it has not changed since. With `sidecar` (default: the
+    TRNASIMTOOLS_CONFIG_SIDECAR environment variable), a pickled copy is kept
+    next to the YAML so that other processes can skip parsing too.
+    Transcript sequences kept in a sequence store (see trnasimtools.sequences)
+    are filled back in.
+
+    The returned dict is shared between callers and must not be modified.
+    """
+    path = os.path.abspath(config_file)
+    info = os.stat(path)
+    stamp = (info.st_mtime_ns, info.st_size)
+    key = (path,) + stamp
+    if key in _config_cache:
+        _config_cache.move_to_end(key)
+        return _config_cache[key]
+    data = _read_config(path, stamp, _sidecar_enabled(sidecar))
+    _config_cache[key] = data
+    while len(_config_cache) > CACHE_SIZE:
+        _config_cache.popitem(last=False)
+    return data
+
+def clear_config_cache():
+    _config_cache.clear()
+    clear_sequence_cache()
@@ -0,0 +1,241 @@
+import os
+import re
+import math
+import heapq
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+import numpy as np
+from typing import Optional, List, Tuple
+from trnasimtools.batch import Task, parse_launcher_line, run_sweep
+from trnasimtools.catalog import Catalog, BASE_COLUMNS
+from trnasimtools.profiling import load_profiles
+
+# run parameters that label a run rather than change its cost
+IGNORED_PARAMS = ("seed", "time_limit")
+
+def _features(params: dict, names: List[str]) -> List[float]:
+    return [1.0] + [math.log(params[name]) for name in names]
+
+class CostModel():
+    """
+    Predicts the wall time of a run from its parameters (Simulate*.run_params()).
+
+    Runtime is taken to scale linearly with time_limit, and the runtime per
+    simulated second as a power law in every other numeric parameter, so the
+    model is a least-squares fit of log(runtime / time_limit) on the log of
+    each parameter. Parameters that are constant (or not always positive) in
+    the training runs are left out, and predict nothing about cost.
+    """
+
+    def __init__(self, names: List[str], coefficients: List[float]):
+        self.names = names
+        self.coefficients = coefficients
+
+    @classmethod
+    def fit(cls, samples: List[Tuple[dict, float]]):
+        """
+        Fits the model to (params, runtime) pairs, e.g. from samples_from_catalog().
+        """
+        samples = [(params, runtime) for (params, runtime) in samples
+                   if runtime and params.get("time_limit")]
+        if not samples:
+            raise ValueError("no runs with a runtime and time_limit to fit the cost model to")
+        names = []
+        for name in sorted(samples[0][0]):
+            if name in IGNORED_PARAMS:
+                continue
+            values = [params.get(name) for (params, _) in samples]
+            if all(isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0
+                   for value in values) and len(set(values)) > 1:
+                names.append(name)
+        x = np.array([_features(params, names) for (params, _) in samples])
+        y = np.array([math.log(runtime / params["time_limit"]) for (params, runtime) in samples])
+        # minimum-norm solution, which stays finite when parameters move together in the training runs
+        coefficients, _, _, _ = np.linalg.lstsq(x, y, rcond=None)
+        return cls(names, coefficients.tolist())
+
+    def predict(self, params: dict) -> float:
+        """
+        Predicted wall time (seconds) of a run with the given run_params().
+        """
+        log_rate = sum(c * f for (c, f) in zip(self.coefficients, _features(params, self.names)))
+        return math.exp(log_rate) * params["time_limit"]
+
+def samples_from_catalog(path: str) -> List[Tuple[dict, float]]:
+    """
+    (params, runtime) pairs of the completed runs in a run catalog.
+    """
+    catalog = Catalog(path)
+    try:
+        rows = catalog.select(status="complete")
+    finally:
+        catalog.close()
+    return [({name: value for (name, value) in row.items()
+              if name not in BASE_COLUMNS and not name.endswith("_time")}, row["runtime"])
+            for row in rows if row["runtime"] is not None]
+
+def samples_from_profiles(path: str) -> List[Tuple[dict, float]]:
+    """
+    (params, runtime) pairs from a run profile file (simulate(profile_file=...)).
+    """
+    return [(profile["params"], profile["wall"]) for profile in load_profiles(path)]
+
+def calibrate(tasks: List[Task],
+              samples: int = 20,
+              time_fraction: float = 0.05,
+              max_workers: Optional[int] = None,
+              seed: int = 1) -> List[Tuple[dict, float]]:
+    """
+    Runs a random sample of tasks for a fraction of their time_limit, in a
+    scratch directory, and returns their (params, runtime) pairs. Short runs
+    overstate the share of model setup in the runtime, so predictions from a
+    calibration err on the slow side.
+    """
+    chosen = random.Random(seed).sample(tasks, min(samples, len(tasks)))
+    output_dir = tempfile.mkdtemp()
+    try:
+        short = []
+        for task in chosen:
+            params = task.run_params()
+            time_limit, time_step = params["time_limit"], params["time_step"]
+            short_limit = max(time_step, round(time_limit * time_fraction / time_step) * time_step)
+            short.append(Task(task.simulator, task.config_file, task.seed, output_dir,
+                              time_limit=short_limit, time_step=time_step, **task.kwargs))
+        results = run_sweep(short, max_workers=max_workers)
+    finally:
+        shutil.rmtree(output_dir)
+    return [(result.params, result.wall_time) for result in results if result.error is None]
+
+def predict_costs(model: CostModel, tasks: List[Task]) -> List[float]:
+    """
+    Predicted wall time of each task. A task the model can't predict (a
+    parameter it was fitted on is missing or not positive) gets the median
+    predicted cost of the others, or 1 second if there are none.
+    """
+    costs = []
+    for task in tasks:
+        params = task.run_params()
+        try:
+            costs.append(model.predict(params))
+        except (KeyError, ValueError, TypeError):
+            costs.append(None)
+    known = [cost for cost in costs if cost is not None]
+    default = statistics.median(known) if known else 1.0
+    return [default if cost is None else cost for cost in costs]
+
+def pack(costs: List[float], slots: int) -> Tuple[List[List[int]], List[float]]:
+    """
+    Longest-processing-time-first packing of tasks onto slots (cores): each
+    task, most expensive first, goes to the least loaded slot. Returns the task
+    indices and the total cost of each slot.
+    """
+    heap = [(0.0, slot) for slot in range(slots)]
+    bins = [[] for _ in range(slots)]
+    loads = [0.0] * slots
+    for i in sorted(range(len(costs)), key=lambda i: costs[i], reverse=True):
+        load, slot = heapq.heappop(heap)
+        bins[slot].append(i)
+        loads[slot] = load + costs[i]
+        heapq.heappush(heap, (loads[slot], slot))
+    return bins, loads
+
+def plan_nodes(costs: List[float], tasks_per_node: int, hours: float, margin: float = 1.2) -> int:
+    """
+    The fewest nodes whose predicted makespan, times margin, fits in hours.
+    """
+    most = max(1, math.ceil(len(costs) / tasks_per_node))
+    for nodes in range(1, most + 1):
+        _, loads = pack(costs, nodes * tasks_per_node)
+        if max(loads) * margin <= hours * 3600:
+            return nodes
+    return most
+
+def format_walltime(seconds: float) -> str:
+    minutes = max(1, math.ceil(seconds / 60))
+    return f"{minutes // 60:02d}:{minutes % 60:02d}:00"
+
+def _set_sbatch(script: str, flag: str, value) -> str:
+    # keep the column alignment and trailing comment of the template's line
+    pattern = re.compile(rf"^(#SBATCH {flag} )(\S+)( *)", re.MULTILINE)
+    def replace(match):
+        return match.group(1) + str(value) + " " * max(1, len(match.group(2)) + len(match.group(3)) - len(str(value)))
+    return pattern.sub(replace, script, count=1)
+
+def write_slurm(template: str,
+                path: str,
+                launcher_file: str,
+                nodes: int,
+                tasks: int,
+                seconds: float):
+    """
+    Writes a SLURM script for launcher_file, based on an existing one in
+    tacc/slurm/: node count, task count and run time are replaced, the
+    launcher job file is pointed at launcher_file (in the template's launcher
+    directory), and the launcher is told to hand out tasks dynamically, in
+    file order.
+    """
+    with open(template, "r") as stream:
+        script = stream.read()
+    name = os.path.splitext(os.path.basename(launcher_file))[0]
+    script = _set_sbatch(script, "-N", nodes)
+    script = _set_sbatch(script, "-n", tasks)
+    script = _set_sbatch(script, "-t", format_walltime(seconds))
+    script = _set_sbatch(script, "-o", f"{name}.o%j")
+    script = re.sub(r"^(export LAUNCHER_JOB_FILE=\S*/)[^/\s]+", lambda match: match.group(1) + os.path.basename(launcher_file),
+                    script, count=1, flags=re.MULTILINE)
+    if "LAUNCHER_SCHED" not in script:
+        script = re.sub(r"^(export LAUNCHER_JOB_FILE=.*)$", r"\1\nexport LAUNCHER_SCHED=dynamic",
+                        script, count=1, flags=re.MULTILINE)
+    with open(path, "w") as stream:
+        stream.write(script)
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Predict the runtime of each task in a launcher file and "
+                                                 "write it out longest first, with a SLURM script sized to match.")
+    parser.add_argument("launcher", help="launcher text file")
+    parser.add_argument("--catalog", action="append", default=[], help="run catalog to learn runtimes from")
+    parser.add_argument("--profiles", action="append", default=[], help="run profile file to learn runtimes from")
+    parser.add_argument("--calibrate", type=int, default=0, help="also time short runs of this many sampled tasks")
+    parser.add_argument("--tasks-per-node", type=int, default=128, help="launcher tasks per node (default: 128)")
+    parser.add_argument("--nodes", type=int, default=None, help="nodes to request")
+    parser.add_argument("--hours", type=float, default=None, help="pick the fewest nodes that finish within this time")
+    parser.add_argument("--margin", type=float, default=1.2, help="safety factor on the predicted run time")
+    parser.add_argument("--template", default=None, help="SLURM script to base the new one on")
+    parser.add_argument("-o", "--output", required=True, help="launcher file to write (the SLURM script gets .bash)")
+    args = parser.parse_args(argv)
+    if (args.nodes is None) == (args.hours is None):
+        parser.error("give one of --nodes or --hours")
+
+    with open(args.launcher, "r") as stream:
+        lines = [line.strip() for line in stream if line.strip() and not line.startswith("#")]
+    tasks = [parse_launcher_line(line) for line in lines]
+    samples = []
+    for path in args.catalog:
+        samples.extend(samples_from_catalog(path))
+    for path in args.profiles:
+        samples.extend(samples_from_profiles(path))
+    if args.calibrate:
+        samples.extend(calibrate(tasks, samples=args.calibrate))
+    model = CostModel.fit(samples)
+    costs = predict_costs(model, tasks)
+
+    nodes = args.nodes if args.nodes is not None else plan_nodes(costs, args.tasks_per_node, args.hours, args.margin)
+    slots = min(nodes * args.tasks_per_node, len(tasks))
+    _, loads = pack(costs, slots)
+    makespan = max(loads)
+    print(f"{len(tasks)} tasks, {sum(costs) / 3600:.1f} core hours predicted; "
+          f"{nodes} nodes x {args.tasks_per_node} tasks finish in {makespan / 3600:.2f} h "
+          f"({sum(loads) / (slots * makespan):.0%} busy)")
+    # with dynamic scheduling, handing tasks out longest first reproduces the packing
+    order = sorted(range(len(tasks)), key=lambda i: costs[i], reverse=True)
+    with open(args.output, "w") as stream:
+        stream.writelines(lines[i] + "\n" for i in order)
+    if args.template is not None:
+        write_slurm(args.template, os.path.splitext(args.output)[0] + ".bash", args.output,
+                    nodes, slots, makespan * args.margin)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import os
+import json
+import numpy as np
+from typing import List, Optional, Sequence
+from trnasimtools.io import read_output, resample
+
+HEADER_FILE = "header.json"
+VALUES_FILE = "values.dat"
+FILLED_FILE = "filled.dat"
+
+def _coord_key(value):
+    return json.dumps(value)
+
+class SweepCube():
+    """
+    A whole sweep as one memory-mapped array of shape
+    (parameter axes..., seed, time, species), stored in a directory:
+    header.json describes the axes, values.dat holds the array and
+    filled.dat marks which runs have been written. Runs are written one at a
+    time, and reads touch only the pages they slice:
+
+        cube = SweepCube.open("output/june-02-2024.cube")
+        heatmap = cube.sel(config_filename=..., seed=1, time=100.0, species="GFP")
+        # -> (ribosome_speed, TTT_charging_rate) array
+
+    Parameter axes are named after run_params() keys. Unwritten runs read as
+    zeros; check `filled`.
+    """
+
+    def __init__(self, path: str, header: dict, mode: str = "r"):
+        self.path = path
+        self.header = header
+        self.field = header["field"]
+        self.coords = {axis["name"]: axis["values"] for axis in header["axes"]}
+        self.axes = list(self.coords)
+        self.param_axes = self.axes[:-3]
+        self.times = np.array(self.coords["time"])
+        self.time_step = self.times[1] - self.times[0] if len(self.times) > 1 else 1.0
+        shape = tuple(len(values) for values in self.coords.values())
+        self.values = np.memmap(os.path.join(path, VALUES_FILE), dtype=header["dtype"], mode=mode, shape=shape)
+        self.filled = np.memmap(os.path.join(path, FILLED_FILE), dtype=np.uint8, mode=mode, shape=shape[:-2])
+        self._lookup = {name: {_coord_key(value): i for (i, value) in enumerate(values)}
+                        for (name, values) in self.coords.items() if name != "time"}
+
+    @classmethod
+    def create(cls,
+               path: str,
+               param_axes: dict,
+               seeds: Sequence[int],
+               times: Sequence[float],
+               species: Sequence[str],
+               field: str = "protein",
+               dtype: str = "float32"):
+        """
+        Creates an empty cube. param_axes maps each parameter name to its
+        values, in axis order. The data files are allocated sparse, so an
+        empty cube takes no disk space.
+        """
+        axes = [{"name": name, "values": list(values)} for (name, values) in param_axes.items()]
+        axes += [{"name": "seed", "values": list(seeds)},
+                 {"name": "time", "values": [float(time) for time in times]},
+                 {"name": "species", "values": list(species)}]
+        header = {"field": field, "dtype": dtype, "axes": axes}
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, HEADER_FILE), "w") as stream:
+            json.dump(header, stream, indent=1)
+        return cls(path, header, mode="w+")
+
+    @classmethod
+    def open(cls, path: str, mode: str = "r"):
+        with open(os.path.join(path, HEADER_FILE), "r") as stream:
+            return cls(path, json.load(stream), mode)
+
+    def _index(self, name, value):
+        try:
+            return self._lookup[name][_coord_key(value)]
+        except KeyError:
+            raise KeyError(f"{value!r} is not on the {name} axis") from None
+
+    def time_index(self, time: float) -> int:
+        i = int(round((time - self.times[0]) / self.time_step))
+        if not 0 <= i < len(self.times):
+            raise KeyError(f"time {time} is outside the grid ({self.times[0]} to {self.times[-1]})")
+        return i
+
+    def run_index(self, params: dict, seed: int) -> tuple:
+        return tuple(self._index(name, params[name]) for name in self.param_axes) + (self._index("seed", seed),)
+
+    def write_run(self, params: dict, seed: int, values: np.ndarray):
+        """
+        Stores one run, given as a (time, species) array on the cube's grid.
+        """
+        index = self.run_index(params, seed)
+        self.values[index] = values
+        self.filled[index] = 1
+
+    def add_output(self, params: dict, seed: int, output_path: str):
+        """
+        Resamples a run's output onto the cube's grid and stores it. Species
+        that are not on the species axis are dropped.
+        """
+        df = read_output(output_path)
+        self.write_run(params, seed, resample(df, self.times, self.coords["species"], self.field))
+
+    def sel(self, **coords) -> np.ndarray:
+        """
+        The cube with the given axes fixed at one value each (time is matched
+        to the nearest grid time), as a memory-mapped view over the remaining
+        axes, in axis order.
+        """
+        unknown = set(coords) - set(self.axes)
+        if unknown:
+            raise KeyError(f"no cube axes {sorted(unknown)}; axes are {self.axes}")
+        index = []
+        for name in self.axes:
+            if name not in coords:
+                index.append(slice(None))
+            elif name == "time":
+                index.append(self.time_index(coords[name]))
+            else:
+                index.append(self._index(name, coords[name]))
+        return self.values[tuple(index)]
+
+    def flush(self):
+        self.values.flush()
+        self.filled.flush()
+
+class CubeCollector():
+    """
+    Sweep callback (see batch.run_sweep) that writes each finished run into a
+    SweepCube at `path`. The parameter axes are the given run_params() names,
+    with the values the tasks take; all tasks must share time_limit and
+    time_step (or record_interval). The species axis is `species`, or else
+    every species any task can write, read from the tasks' configs (see
+    Task.species()), so species that only appear late in a run, or only in
+    some runs, still get a place. An existing cube at `path` is reopened, so
+    a resumed sweep fills it in.
+    """
+
+    def __init__(self,
+                 path: str,
+                 tasks: List,
+                 axes: Sequence[str],
+                 field: str = "protein",
+                 dtype: str = "float32",
+                 species: Optional[Sequence[str]] = None):
+        if os.path.exists(os.path.join(path, HEADER_FILE)):
+            self.cube = SweepCube.open(path, mode="r+")
+            return
+        params = [task.run_params() for task in tasks]
+        param_axes = {name: sorted({run[name] for run in params}) for name in axes}
+        seeds = sorted({task.seed for task in tasks})
+        # runs with a record_interval are only written that often
+        grids = {(run["time_limit"], task.record_interval or run["time_step"]) for (task, run) in zip(tasks, params)}
+        if len(grids) != 1:
+            raise ValueError(f"tasks have different time_limit/time_step {sorted(grids)}; a cube needs one time grid")
+        time_limit, time_step = grids.pop()
+        times = time_step * np.arange(0, int(round(time_limit / time_step)) + 1)
+        if species is None:
+            species = sorted({name for task in tasks for name in task.species()})
+        self.cube = SweepCube.create(path, param_axes, seeds, times, species, field, dtype)
+
+    def __call__(self, result):
+        if result.error is not None or result.deferred:
+            return
+        self.cube.add_output(result.params, result.task.seed, os.path.join(result.task.output_dir, result.outfile))
+        self.cube.flush()
@@ -0,0 +1,222 @@
+import os
+import re
+import csv
+import json
+from typing import Optional, List, Sequence
+from trnasimtools.output import is_tsv, open_output
+
+ENSEMBLE_SUFFIX = ".ensemble.tsv"
+QUANTILES = (0.05, 0.5, 0.95)
+
+def ensemble_filename(output_path: str) -> str:
+    """
+    Ensemble file of the parameter point a run belongs to: its output path
+    without the seed, e.g. <prefix>_3.tsv -> <prefix>.ensemble.tsv.
+    """
+    return re.sub(r"_\d+(\.[A-Za-z]\w*)+$", "", output_path) + ENSEMBLE_SUFFIX
+
+class _P2Quantile():
+    """
+    Streaming estimate of one quantile with the P-square algorithm (Jain and
+    Chlamtac, 1985): five markers whose heights track the minimum, p/2, p,
+    (1+p)/2 quantiles and maximum. Exact for up to five observations.
+    """
+
+    def __init__(self, p):
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        q, n = (self.heights, self.positions)
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                # piecewise-parabolic prediction, falling back to linear if it leaves the bracket
+                height = q[i] + d / (n[i + 1] - n[i - 1]) * \
+                         ((n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+                          (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def result(self):
+        q = self.heights
+        if len(q) == 5 and self.positions[4] > 5:
+            return q[2]
+        # few observations: interpolate between the sorted values
+        rank = self.p * (len(q) - 1)
+        lower = int(rank)
+        upper = min(lower + 1, len(q) - 1)
+        return q[lower] + (rank - lower) * (q[upper] - q[lower])
+
+class _CellStats():
+    # Welford's running mean and variance of the count, and the mean ribosome density
+
+    def __init__(self, quantiles):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.density = 0.0
+        self.quantiles = [_P2Quantile(p) for p in quantiles]
+
+    def add(self, x, density):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        self.density += (density - self.density) / self.n
+        for quantile in self.quantiles:
+            quantile.add(x)
+
+class EnsembleAggregator():
+    """
+    Ensemble statistics of many runs of one parameter point, per time point
+    and species: the number of runs, the mean and (sample) variance of the
+    count, quantiles of it (P-square estimates, exact for up to five runs),
+    and the mean ribosome density. Runs are added one at a time and streamed,
+    so memory does not grow with the number of seeds.
+
+    Time points are matched across runs by their value as written. pinetree
+    writes a run's i-th time point at its first event past i * time_step,
+    at times that differ between seeds, so pass the run's time_step to match
+    time points by position instead, labelled i * time_step.
+    """
+
+    def __init__(self, quantiles: Sequence[float] = QUANTILES, time_step: Optional[float] = None):
+        self.quantiles = tuple(quantiles)
+        self.time_step = time_step
+        self.runs = 0
+        self.cells = {}
+
+
+    def add_run(self, path: str):
+        if is_tsv(path):
+            with open_output(path, "rt") as stream:
+                reader = csv.reader(stream, delimiter="\t")
+                header = next(reader)
+                time_i, species_i, protein_i, density_i = [header.index(field) for field in
+                                                           ("time", "species", "protein", "ribo_density")]
+                rows = ((row[time_i], row[species_i], row[protein_i], row[density_i]) for row in reader)
+                self._add_rows(rows)
+        else:
+            # columnar output needs pandas
+            from trnasimtools.io import read_output
+            df = read_output(path)
+            self._add_rows(df[["time", "species", "protein", "ribo_density"]].itertuples(index=False))
+        self.runs += 1
+
+    def _add_rows(self, rows):
+        cells = self.cells
+        (last_time, i) = (None, -1)
+        for (time, species, protein, density) in rows:
+            if time != last_time:
+                (last_time, i) = (time, i + 1)
+            key = (float(time) if self.time_step is None else i * self.time_step, species)
+            if key not in cells:
+                cells[key] = _CellStats(self.quantiles)
+            cells[key].add(float(protein), float(density))
+
+    def fields(self) -> List[str]:
+        return ["time", "species", "n", "mean", "variance"] + [f"q{p:g}" for p in self.quantiles] + ["ribo_density"]
+
+    def rows(self):
+        for ((time, species), cell) in sorted(self.cells.items()):
+            variance = cell.m2 / (cell.n - 1) if cell.n > 1 else float("nan")
+            yield [time, species, cell.n, cell.mean, variance] + \
+                  [quantile.result() for quantile in cell.quantiles] + [cell.density]
+
+    def write(self, path: str, params: Optional[dict] = None):
+        """
+        Writes the ensemble as a TSV, preceded by a comment line holding the
+        parameter point as JSON (read it back with read_ensemble, or
+        pandas.read_csv(path, sep="\\t", comment="#")).
+        """
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", newline="") as stream:
+            stream.write("# " + json.dumps({"runs": self.runs, "params": params or {}}) + "\n")
+            writer = csv.writer(stream, delimiter="\t")
+            writer.writerow(self.fields())
+            writer.writerows(self.rows())
+        os.replace(tmp, path)
+
+def read_ensemble(path: str):
+    """
+    Returns the header (run count and parameters) and the rows of an ensemble
+    file, as dicts.
+    """
+    with open(path, "r") as stream:
+        header = json.loads(stream.readline()[2:])
+        reader = csv.DictReader(stream, delimiter="\t")
+        rows = [{field: value if field == "species" else float(value) for (field, value) in row.items()}
+                for row in reader]
+    return header, rows
+
+class EnsembleCollector():
+    """
+    Sweep callback (see batch.run_sweep) that feeds each finished run into the
+    ensemble of its parameter point, and writes the ensemble file next to the
+    runs as soon as all of the point's tasks have reported. Failed runs are
+    left out of their ensemble; close() writes any ensembles still open. A
+    point with a deferred task (see batch.run_sweep) is not written at all:
+    it is finished, with all its seeds, by the job that runs the rest.
+    """
+
+    def __init__(self, tasks: List, quantiles: Sequence[float] = QUANTILES):
+        self.quantiles = quantiles
+        self.expected = {}
+        for task in tasks:
+            key = self._key(task)
+            self.expected[key] = self.expected.get(key, 0) + 1
+        self.pending = {}
+        self.deferred = set()
+
+    def _key(self, task):
+        return task.point()
+
+    def __call__(self, result):
+        key = self._key(result.task)
+        if result.deferred:
+            self.deferred.add(key)
+            self.pending.pop(key, None)
+        elif result.error is None and key not in self.deferred:
+            if key not in self.pending:
+                params = {name: value for (name, value) in result.params.items() if name != "seed"}
+                output_path = os.path.join(result.task.output_dir, result.outfile)
+                # runs with a record_interval hold one time point per record_interval
+                self.pending[key] = [EnsembleAggregator(self.quantiles, result.task.record_interval or result.params["time_step"]), params, output_path]
+            self.pending[key][0].add_run(os.path.join(result.task.output_dir, result.outfile))
+        self.expected[key] -= 1
+        if self.expected[key] == 0:
+            self._write(key)
+
+    def _write(self, key):
+        if key in self.pending and key not in self.deferred:
+            aggregator, params, output_path = self.pending.pop(key)
+            aggregator.write(ensemble_filename(output_path), params)
+
+    def close(self):
+        for key in list(self.pending):
+            self._write(key)
@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+import traceback
+from typing import Callable, Iterable, Optional
+
+def fork_each(items: Iterable, function: Callable, max_children: Optional[int] = None) -> dict:
+    """
+    Calls function(item) for each item in a forked child process, at most
+    max_children (default: one per core) at a time, and returns whether each
+    call succeeded, keyed by item. Children are copies of this process, so
+    they share whatever was built before the fork (copy-on-write) rather than
+    rebuilding it; return values are not passed back, so results have to go
+    through files. A child that raises prints its traceback to stderr. POSIX
+    only.
+    """
+    max_children = max_children or os.cpu_count() or 1
+    succeeded = {}
+    running = {}
+
+    def wait():
+        # poll our own children only: os.wait() would also reap any other
+        # child process of the caller's, e.g. a notebook's
+        while True:
+            for pid in list(running):
+                done, status = os.waitpid(pid, os.WNOHANG)
+                if done:
+                    succeeded[running.pop(pid)] = os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+                    return
+            time.sleep(0.01)
+
+    for item in items:
+        if len(running) >= max_children:
+            wait()
+        # anything still buffered would be written again by the child
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                function(item)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        running[pid] = item
+    while running:
+        wait()
+    return succeeded
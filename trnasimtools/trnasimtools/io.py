@@ -0,0 +1,248 @@
+import os
+import glob
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Iterable, Union
+from trnasimtools.output import output_filename, OUTPUT_EXTENSIONS
+from trnasimtools.summary import SUMMARY_SUFFIX
+
+# column types of pinetree's output TSV
+TSV_DTYPES = {"time": "float64",
+              "species": "category",
+              "protein": "int64",
+              "transcript": "int64",
+              "ribo_density": "float64"}
+# per-species fields stored next to the protein counts in wide tables
+AUX_FIELDS = ("transcript", "ribo_density")
+
+def read_tsv(path: str) -> pd.DataFrame:
+    # pandas decompresses .gz and .zst by extension
+    return pd.read_csv(path, sep="\t", dtype=TSV_DTYPES)
+
+def to_wide(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reshapes long pinetree output (one row per species per time point) into one
+    row per time point. Protein counts go in a column named after the species;
+    transcript and ribo_density go in `<species>.transcript` and
+    `<species>.ribo_density` columns, kept only where they are ever non-zero.
+    """
+    wide = df.pivot(index="time", columns="species", values="protein")
+    wide.columns = wide.columns.astype(str)
+    for field in AUX_FIELDS:
+        aux = df.pivot(index="time", columns="species", values=field)
+        aux = aux.loc[:, (aux != 0).any()]
+        aux.columns = [f"{species}.{field}" for species in aux.columns]
+        wide = wide.join(aux)
+    wide.columns.name = None
+    return wide.reset_index()
+
+def to_long(wide: pd.DataFrame) -> pd.DataFrame:
+    """
+    Inverse of to_wide: returns the long format pinetree writes, with fields
+    that were dropped as all-zero filled back in.
+    """
+    species = [column for column in wide.columns if column != "time" and "." not in column]
+    df = wide.melt(id_vars="time", value_vars=species, var_name="species", value_name="protein")
+    for field in AUX_FIELDS:
+        columns = {f"{name}.{field}": name for name in species if f"{name}.{field}" in wide.columns}
+        aux = wide[["time"] + list(columns)].rename(columns=columns)
+        aux = aux.melt(id_vars="time", var_name="species", value_name=field)
+        df = df.merge(aux, on=["time", "species"], how="left")
+        df[field] = df[field].fillna(0).astype(TSV_DTYPES[field])
+    df["species"] = df["species"].astype("category")
+    return df.sort_values(["time", "species"], kind="stable").reset_index(drop=True)
+
+def write_columnar(wide: pd.DataFrame, path: str, output_format: str):
+    # write under a temporary name so a partial file is never mistaken for a complete run
+    tmp = f"{path}.tmp"
+    if output_format == "parquet":
+        wide.to_parquet(tmp, compression="zstd", index=False)
+    elif output_format == "feather":
+        wide.to_feather(tmp, compression="zstd")
+    else:
+        raise ValueError(f"unknown columnar format {output_format}")
+    os.replace(tmp, path)
+
+def convert_output(tsv_path: str, output_format: str, keep_tsv: bool = False) -> str:
+    """
+    Converts a finished run's TSV to a wide Parquet/Feather table next to it and
+    returns the new path. The TSV is removed unless keep_tsv is set.
+    """
+    path = os.path.join(os.path.dirname(tsv_path), output_filename(os.path.basename(tsv_path), output_format))
+    write_columnar(to_wide(read_tsv(tsv_path)), path, output_format)
+    if not keep_tsv:
+        os.remove(tsv_path)
+    return path
+
+def read_output(path: str) -> pd.DataFrame:
+    """
+    Reads one run's output, TSV (compressed or not) or columnar, in
+    pinetree's long format.
+    """
+    if path.endswith(".parquet"):
+        return to_long(pd.read_parquet(path))
+    if path.endswith(".feather"):
+        return to_long(pd.read_feather(path))
+    return read_tsv(path)
+
+def find_output(prefix: str, seed: int) -> str:
+    """
+    Returns the output path of one seed of a parameter point, in whichever
+    format it was written.
+    """
+    for extension in OUTPUT_EXTENSIONS.values():
+        path = f"{prefix}_{seed}{extension}"
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"no output for seed {seed} at {prefix}_{seed}.*")
+
+def load_runs(prefix: str,
+              seeds: Union[int, Iterable[int]],
+              time_limit: Optional[float] = None,
+              max_workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Loads all seeds of one parameter point, where `prefix` is the output path
+    up to the seed (e.g. "output/two_codon_multi_transcript_..._10.0_10.0") and
+    `seeds` is a list of seeds or a seed count (seeds 1..n). Files are read
+    in parallel threads and concatenated once.
+
+    Returns a frame indexed by (seed, time, species), with seed and species
+    categorical, holding protein, transcript and ribo_density. With
+    time_limit, only time points before it are kept.
+    """
+    seeds = list(range(1, seeds + 1)) if isinstance(seeds, int) else list(seeds)
+    paths = [find_output(prefix, seed) for seed in seeds]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = list(executor.map(read_output, paths))
+    # species categories can differ between files; merge them instead of falling back to strings
+    species = union_categoricals([frame["species"] for frame in frames])
+    df = pd.concat([frame.drop(columns="species") for frame in frames], ignore_index=True)
+    df["species"] = species
+    codes = np.repeat(np.arange(len(seeds)), [len(frame) for frame in frames])
+    df["seed"] = pd.Categorical.from_codes(codes, categories=seeds)
+    if time_limit is not None:
+        df = df[df["time"] < time_limit]
+    return df.set_index(["seed", "time", "species"])
+
+def resample(df: pd.DataFrame, times: np.ndarray, species: list, field: str = "protein") -> np.ndarray:
+    """
+    Resamples one run onto a time grid: returns a (time, species) array
+    holding, for each grid time, the species' last recorded value at or
+    before it (NaN before its first record). Record times within a millionth
+    of a grid step of a grid time count as on it, which absorbs floating point
+    drift in pinetree's timestamps.
+    """
+    codes = pd.Categorical(df["species"], categories=species).codes.astype(np.int64)
+    known = codes >= 0
+    run_times = df["time"].to_numpy()[known]
+    values = df[field].to_numpy(dtype=np.float64)[known]
+    codes = codes[known]
+    # search all species at once by offsetting each species' times past the previous one's
+    span = max(run_times.max(initial=0.0), times.max(initial=0.0)) + 1.0
+    order = np.lexsort((run_times, codes))
+    keys = (codes * span + run_times)[order]
+    tolerance = 1e-6 * (times[1] - times[0] if len(times) > 1 else 1.0)
+    grid_keys = (np.arange(len(species))[None, :] * span + times[:, None] + tolerance).ravel()
+    i = np.searchsorted(keys, grid_keys, side="right") - 1
+    grid_codes = np.repeat(np.arange(len(species))[None, :], len(times), axis=0).ravel()
+    valid = (i >= 0) & (codes[order][np.clip(i, 0, None)] == grid_codes)
+    out = np.where(valid, values[order][np.clip(i, 0, None)], np.nan)
+    return out.reshape(len(times), len(species))
+
+class RunCube():
+    """
+    One field of a set of runs resampled onto a regular time grid, as a dense
+    (seed, time, species) array. Grid times are start + i * time_step, so
+    looking up a time is arithmetic rather than a search:
+
+        cube = load_cube(prefix, 3, time_step=1)
+        cube.at(100.0)                      # (seed, species) values at t = 100
+        cube.values[:, cube.window(50, 100), cube.species_index("GFP")]
+    """
+
+    def __init__(self, values: np.ndarray, seeds: list, times: np.ndarray, species: list, field: str):
+        self.values = values
+        self.seeds = seeds
+        self.times = times
+        self.species = species
+        self.field = field
+        self.start = times[0]
+        self.time_step = times[1] - times[0] if len(times) > 1 else 1.0
+        self._species_index = {name: i for (i, name) in enumerate(species)}
+
+    def time_index(self, time: float) -> int:
+        """
+        Index of the grid time nearest to time.
+        """
+        i = int(round((time - self.start) / self.time_step))
+        if not 0 <= i < len(self.times):
+            raise KeyError(f"time {time} is outside the grid ({self.times[0]} to {self.times[-1]})")
+        return i
+
+    def window(self, start: float, stop: float) -> slice:
+        """
+        Slice of the grid times in [start, stop].
+        """
+        first = max(0, int(np.ceil((start - self.start) / self.time_step - 1e-9)))
+        last = min(len(self.times) - 1, int(np.floor((stop - self.start) / self.time_step + 1e-9)))
+        return slice(first, last + 1)
+
+    def species_index(self, name: str) -> int:
+        return self._species_index[name]
+
+    def at(self, time: float) -> np.ndarray:
+        return self.values[:, self.time_index(time), :]
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        The cube as a frame indexed by (seed, time, species), like load_runs.
+        """
+        index = pd.MultiIndex.from_product([pd.CategoricalIndex(self.seeds), self.times,
+                                            pd.CategoricalIndex(self.species)],
+                                           names=["seed", "time", "species"])
+        return pd.DataFrame({self.field: self.values.ravel()}, index=index)
+
+def load_cube(prefix: str,
+              seeds: Union[int, Iterable[int]],
+              time_step: Optional[float] = None,
+              time_limit: Optional[float] = None,
+              field: str = "protein",
+              max_workers: Optional[int] = None) -> RunCube:
+    """
+    Loads all seeds of one parameter point (see load_runs) resampled onto a
+    common grid of time_step (default: the recording interval of the first
+    run). The grid runs over multiples of time_step from the first time all
+    runs have a record to time_limit, or the end of the shortest run.
+    """
+    seeds = list(range(1, seeds + 1)) if isinstance(seeds, int) else list(seeds)
+    paths = [find_output(prefix, seed) for seed in seeds]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = list(executor.map(read_output, paths))
+    if time_step is None:
+        time_step = float(np.median(np.diff(np.unique(frames[0]["time"].to_numpy()))))
+    start = max(frame["time"].min() for frame in frames)
+    end = min(frame["time"].max() for frame in frames)
+    if time_limit is not None:
+        end = min(end, time_limit)
+    times = time_step * np.arange(np.ceil(start / time_step - 1e-6), np.floor(end / time_step + 1e-6) + 1)
+    species = sorted(set().union(*(frame["species"].unique() for frame in frames)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        values = np.stack(list(executor.map(lambda frame: resample(frame, times, species, field), frames)))
+    return RunCube(values, seeds, times, species, field)
+
+def load_summaries(output_dir: str, max_workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Loads every run summary (see Simulate*.simulate(summary_window=...)) in
+    output_dir into one table: one row per run and species, with each run's
+    parameters as columns.
+    """
+    paths = sorted(glob.glob(os.path.join(output_dir, f"*{SUMMARY_SUFFIX}")))
+    if not paths:
+        raise FileNotFoundError(f"no run summaries in {output_dir}")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = list(executor.map(lambda path: pd.read_csv(path, sep="\t"), paths))
+    df = pd.concat(frames, ignore_index=True)
+    df["species"] = df["species"].astype("category")
+    return df
@@ -0,0 +1,190 @@
+import io
+import os
+import gzip
+import shutil
+import tempfile
+import threading
+from typing import Optional, Sequence
+
+# file extensions of the output formats written by Simulate*.simulate()
+OUTPUT_EXTENSIONS = {"tsv": ".tsv",
+                     "tsv.gz": ".tsv.gz",
+                     "tsv.zst": ".tsv.zst",
+                     "parquet": ".parquet",
+                     "feather": ".feather"}
+# pinetree's TSV, compressed as it is written
+COMPRESSED_FORMATS = ("tsv.gz", "tsv.zst")
+# gzip's own default; level 9 costs much more time for little less space
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+# leading bytes of a gzip and a zstd stream
+MAGIC = {".gz": b"\x1f\x8b", ".zst": b"\x28\xb5\x2f\xfd"}
+
+def output_filename(filename: str, output_format: str = "tsv"):
+    """
+    Swaps the .tsv extension of a run's output filename for that of output_format.
+    """
+    if output_format not in OUTPUT_EXTENSIONS:
+        raise ValueError(f"unknown output format {output_format}, expected one of {list(OUTPUT_EXTENSIONS)}")
+    return filename[:-len(".tsv")] + OUTPUT_EXTENSIONS[output_format]
+
+def output_stem(path: str) -> str:
+    """
+    A run's output path without its output format's extension.
+    """
+    for extension in sorted(OUTPUT_EXTENSIONS.values(), key=len, reverse=True):
+        if path.endswith(extension):
+            return path[:-len(extension)]
+    return os.path.splitext(path)[0]
+
+def is_tsv(path: str) -> bool:
+    return path.endswith(tuple(OUTPUT_EXTENSIONS[output_format] for output_format in ("tsv",) + COMPRESSED_FORMATS))
+
+def open_output(path: str, mode: str = "rt", codec_of: Optional[str] = None):
+    """
+    Opens an output TSV, compressing or decompressing .gz and .zst files on
+    the fly. mode is "rt", "wt", "rb" or "wb". The codec follows the
+    extension of codec_of, if given, rather than of path: a temporary file
+    is written as the file it will be renamed to.
+    """
+    codec_of = codec_of if codec_of is not None else path
+    if codec_of.endswith(".gz"):
+        return gzip.open(path, mode, compresslevel=GZIP_LEVEL)
+    if codec_of.endswith(".zst"):
+        # zstandard is only needed for .zst output
+        import zstandard
+        return zstandard.open(path, mode, cctx=zstandard.ZstdCompressor(level=ZSTD_LEVEL))
+    return open(path, mode)
+
+class RecordFilter():
+    """
+    Which rows of pinetree's output TSV to record: those of the given species
+    only (default: all), and only every `interval` seconds (default: every
+    time step), which must be a whole number of the run's time_steps. The
+    header line is always kept. Lines must be given in order, one run at a
+    time.
+
+    pinetree writes a run's i-th time point at its first event past
+    i * time_step (several can fall in one step after a long gap between
+    events), so time points are counted: every (interval / time_step)-th
+    one from t=0 is kept.
+    """
+
+    def __init__(self,
+                 species: Optional[Sequence[str]] = None,
+                 interval: Optional[float] = None,
+                 time_step: Optional[float] = None):
+        self.species = set(species) if species is not None else None
+        self.interval = interval
+        self.time_step = time_step
+        if interval is not None:
+            steps = interval / time_step
+            if steps < 1 - 1e-9 or abs(steps - round(steps)) > 1e-6:
+                raise ValueError(f"record interval {interval} is not a multiple of time_step {time_step}")
+            self.steps = round(steps)
+        self._time, self._i = (None, -1)
+
+    def keep(self, line: str) -> bool:
+        time, species, _ = line.split("\t", 2)
+        if time == "time":
+            self._time, self._i = (None, -1)
+            return True
+        if time != self._time:
+            self._time, self._i = (time, self._i + 1)
+        if self.species is not None and species not in self.species:
+            return False
+        return self.interval is None or self._i % self.steps == 0
+
+    def filter(self, lines):
+        return (line for line in lines if self.keep(line))
+
+def open_pipe(directory: str):
+    """
+    Makes a named pipe for pinetree to write its output into, in a new
+    temporary directory under `directory` (remove it when done). Returns the
+    pipe's path, its read end (a binary file) and a write end held open (a
+    descriptor). Both ends are opened before pinetree opens the pipe, so the
+    reader never waits on an open that may not come, and only sees the end of
+    the stream once the held write end is closed, after pinetree is done.
+    """
+    pipe_dir = tempfile.mkdtemp(dir=directory)
+    pipe = os.path.join(pipe_dir, "output.tsv")
+    os.mkfifo(pipe)
+    source = os.fdopen(os.open(pipe, os.O_RDONLY | os.O_NONBLOCK), "rb")
+    os.set_blocking(source.fileno(), True)
+    return pipe, source, os.open(pipe, os.O_WRONLY)
+
+def simulate_piped(model, path: str, time_limit: int, time_step: float, record: Optional[RecordFilter] = None):
+    """
+    Runs model.simulate() with its output compressed (if path ends in .gz or
+    .zst) and filtered by `record` as pinetree writes it: pinetree writes into
+    a named pipe, which a thread reads into path, so rows that are not
+    recorded never reach the disk. The file is written under a temporary name
+    and renamed once the run is done, so path only ever holds a complete run.
+    POSIX only.
+    """
+    tmp = f"{path}.tmp"
+    # opened first, so a missing codec fails before anything runs
+    sink = open_output(tmp, "wb", codec_of=path)
+    pipe, source, held_open = open_pipe(os.path.dirname(path) or ".")
+    errors = []
+
+    def copy():
+        try:
+            with source, sink:
+                if record is None:
+                    shutil.copyfileobj(source, sink, 1 << 20)
+                else:
+                    for line in record.filter(io.TextIOWrapper(source)):
+                        sink.write(line.encode())
+        except BaseException as error:
+            errors.append(error)
+
+    thread = threading.Thread(target=copy, daemon=True)
+    thread.start()
+    try:
+        model.simulate(time_limit=time_limit, time_step=time_step, output=pipe)
+    finally:
+        os.close(held_open)
+        thread.join()
+        shutil.rmtree(os.path.dirname(pipe))
+    if errors:
+        os.remove(tmp)
+        raise errors[0]
+    os.replace(tmp, path)
+
+def _time(line):
+    return float(line.split(b"\t", 1)[0])
+
+def output_complete(path: str, time_limit: float, time_step: float):
+    """
+    Checks whether a pinetree output TSV exists and ran to completion: it must
+    end with a whole line, and its last time point must be within one output
+    step of time_limit. pinetree writes each step's rows at the first event
+    after the step, and a protein's rows only once it has been made, so the
+    number of rows per time point is not checked. Only the last few
+    kilobytes of the file are read.
+
+    Compressed and columnar outputs are only put in place once the run is
+    complete, so for those the file existing is enough (and, if compressed,
+    starting as a gzip or zstd stream).
+    """
+    if not os.path.exists(path):
+        return False
+    for (extension, magic) in MAGIC.items():
+        if path.endswith(extension):
+            with open(path, "rb") as stream:
+                return stream.read(len(magic)) == magic
+    if not path.endswith(OUTPUT_EXTENSIONS["tsv"]):
+        return True
+    with open(path, "rb") as stream:
+        size = stream.seek(0, os.SEEK_END)
+        stream.seek(max(0, size - 4096))
+        tail = stream.read()
+    if not tail.endswith(b"\n"):
+        return False
+    # the first line of the tail may be partial, and the last whole one may be the header
+    lines = tail.split(b"\n")[1:-1]
+    if not lines or lines[-1].startswith(b"time\t"):
+        return False
+    return _time(lines[-1]) >= time_limit - time_step * (1 + 1e-6)
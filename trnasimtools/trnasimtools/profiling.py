@@ -0,0 +1,99 @@
+import os
+import sys
+import json
+import time
+import resource
+from contextlib import contextmanager
+from typing import Optional, List
+
+# phases of Simulate*.simulate() that build the model, as opposed to running it
+SETUP_PHASES = ("seed", "add_transcripts", "add_trna", "add_ribosomes")
+
+def peak_rss() -> int:
+    """
+    Peak resident set size of this process so far, in bytes. Note this is a
+    high-water mark for the whole process: in a long-lived sweep worker it
+    includes earlier runs.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+class RunProfile():
+    """
+    Collects wall time, peak RSS and output size for each phase of a run:
+
+        profile = RunProfile()
+        with profile.phase("simulate", output="run_1.tsv"):
+            model.simulate(...)
+        profile.write("profiles.jsonl", params)
+    """
+
+    def __init__(self):
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name: str, output: Optional[str] = None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = {"wall": time.perf_counter() - start, "peak_rss": peak_rss()}
+            if output is not None:
+                record["output_bytes"] = os.path.getsize(output) if os.path.exists(output) else 0
+            self.phases[name] = record
+
+    def wall(self, names=None) -> float:
+        return sum(record["wall"] for (name, record) in self.phases.items() if names is None or name in names)
+
+    def timings(self) -> dict:
+        """
+        Wall time split into model setup and everything after it.
+        """
+        setup = self.wall(SETUP_PHASES)
+        return {"setup": setup, "simulate": self.wall() - setup}
+
+    def record(self, params: Optional[dict] = None) -> dict:
+        return {"params": params if params is not None else {},
+                "phases": self.phases,
+                "wall": self.wall(),
+                "peak_rss": max((record["peak_rss"] for record in self.phases.values()), default=0),
+                "host": os.uname().nodename,
+                "recorded": time.time()}
+
+    def write(self, path: str, params: Optional[dict] = None):
+        """
+        Appends this run as one JSON line. The line goes out in a single
+        write on a file opened for appending, so concurrent workers can share
+        one file.
+        """
+        line = json.dumps(self.record(params)) + "\n"
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode())
+        finally:
+            os.close(fd)
+
+def load_profiles(path: str) -> List[dict]:
+    with open(path, "r") as stream:
+        return [json.loads(line) for line in stream if line.strip()]
+
+def aggregate_profiles(profiles: List[dict], by: List[str]) -> List[dict]:
+    """
+    Groups run profiles by the given parameters and returns, per group, the
+    number of runs, their total and mean wall time (seconds), the wall time of
+    each phase summed over the group, and the largest peak RSS, sorted by
+    total wall time so the most expensive parameter regions come first.
+    """
+    groups = {}
+    for profile in profiles:
+        key = tuple(profile["params"].get(param) for param in by)
+        group = groups.setdefault(key, {**dict(zip(by, key)), "runs": 0, "wall": 0.0, "peak_rss": 0, "phases": {}})
+        group["runs"] += 1
+        group["wall"] += profile["wall"]
+        group["peak_rss"] = max(group["peak_rss"], profile["peak_rss"])
+        for (name, record) in profile["phases"].items():
+            group["phases"][name] = group["phases"].get(name, 0.0) + record["wall"]
+    for group in groups.values():
+        group["mean_wall"] = group["wall"] / group["runs"]
+    return sorted(groups.values(), key=lambda group: group["wall"], reverse=True)
@@ -0,0 +1,98 @@
+import os
+import copy
+import hashlib
+import argparse
+from typing import Optional, List
+import yaml
+
+SEQUENCE_SUFFIX = ".seq"
+
+# sequences read from stores, keyed by file path; sequence files never change, so entries never go stale
+_sequence_cache = {}
+
+def sequence_hash(seq: str) -> str:
+    return hashlib.sha256(seq.encode()).hexdigest()
+
+def store_sequence(store_dir: str, seq: str) -> str:
+    """
+    Adds a sequence to a store (one file per unique sequence, named by its
+    content hash) and returns the hash.
+    """
+    digest = sequence_hash(seq)
+    path = os.path.join(store_dir, digest + SEQUENCE_SUFFIX)
+    if not os.path.exists(path):
+        os.makedirs(store_dir, exist_ok=True)
+        # write to a temp file and rename, since several processes may add the same sequence
+        tmp = f"{path}.{os.getpid()}"
+        with open(tmp, "w") as stream:
+            stream.write(seq)
+        os.replace(tmp, path)
+    return digest
+
+def load_sequence(store_dir: str, digest: str) -> str:
+    path = os.path.abspath(os.path.join(store_dir, digest + SEQUENCE_SUFFIX))
+    if path not in _sequence_cache:
+        with open(path, "r") as stream:
+            seq = stream.read()
+        if sequence_hash(seq) != digest:
+            raise ValueError(f"sequence file {path} does not match its hash")
+        _sequence_cache[path] = seq
+    return _sequence_cache[path]
+
+def clear_sequence_cache():
+    _sequence_cache.clear()
+
+def externalize(params: dict, config_dir: str, store_dir: str) -> dict:
+    """
+    Returns a copy of a config with each transcript_seq moved to the sequence
+    store and replaced by its transcript_seq_hash. The store's location is
+    recorded relative to config_dir, so the two can be moved together.
+    """
+    params = copy.deepcopy(params)
+    for transcript in params.get("transcript_data", []):
+        if "transcript_seq" in transcript:
+            transcript["transcript_seq_hash"] = store_sequence(store_dir, transcript.pop("transcript_seq"))
+    params["sequence_store"] = os.path.relpath(store_dir, config_dir)
+    return params
+
+def resolve(config: dict, config_dir: str) -> dict:
+    """
+    Fills in the transcript_seq of every transcript that references the
+    sequence store (in place), and returns the config.
+    """
+    if "sequence_store" not in config:
+        return config
+    store_dir = os.path.join(config_dir, config["sequence_store"])
+    for transcript in config.get("transcript_data", []):
+        if "transcript_seq_hash" in transcript:
+            transcript["transcript_seq"] = load_sequence(store_dir, transcript["transcript_seq_hash"])
+    return config
+
+def dedupe_configs(paths: List[str], store_dir: str) -> int:
+    """
+    Rewrites existing YAML configs in place to reference the sequence store,
+    and returns the number of bytes saved.
+    """
+    saved = 0
+    for path in paths:
+        with open(path, "r") as stream:
+            params = yaml.safe_load(stream)
+        if "sequence_store" in params:
+            continue
+        before = os.path.getsize(path)
+        with open(path, "w") as stream:
+            yaml.dump(externalize(params, os.path.dirname(path), store_dir), stream)
+        saved += before - os.path.getsize(path)
+    return saved
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Move the transcript sequences of existing configs into a shared sequence store.")
+    parser.add_argument("configs", nargs="+", help="YAML configs to rewrite")
+    parser.add_argument("--store", required=True, help="sequence store directory (e.g. yaml/sequences)")
+    args = parser.parse_args(argv)
+    saved = dedupe_configs(args.configs, args.store)
+    print(f"{len(args.configs)} configs rewritten, {saved / 1e3:.0f} kB saved "
+          f"(store holds {len(os.listdir(args.store))} sequences)")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,23 @@
+import json
+import hashlib
 import yaml
-import random
 from typing import Dict, Tuple, Optional, List
+from trnasimtools.sequences import externalize
+from trnasimtools.codons import generate_sequences, apportion, complement_codon_table
+
+# codons read by the two tRNA species of the two codon configs
+TWO_CODONS = ("AAA", "TAT")
+
+def _dump(params: dict, dir: str, filename: str, sequence_store: Optional[str]):
+    """
+    Writes a config to dir. With sequence_store (a directory), transcript
+    sequences are written there, one file per unique sequence, and the
+    config refers to them by hash.
+    """
+    if sequence_store is not None:
+        params = externalize(params, dir, sequence_store)
+    with open(f"{dir}/{filename}", "w") as stream:
+        yaml.dump(params, stream)
 
 class SerializeSingleCodonSingleTranscript():
 
@@ -40,9 +57,8 @@ class SerializeSingleCodonSingleTranscript():
     def filename(self):
         return self._format_filename()
 
-    def serialize(self, dir: str):
-        with open(f"{dir}/{self._format_filename()}", "w") as stream:
-            yaml.dump(self.params, stream)
+    def serialize(self, dir: str, sequence_store: Optional[str] = None):
+        _dump(self.params, dir, self._format_filename(), sequence_store)
 
 class SerializeTwoCodonSingleTranscript():
 
@@ -51,11 +67,13 @@ class SerializeTwoCodonSingleTranscript():
                  codon_comp: Tuple, 
                  trna_proportion: Tuple, 
                  seed: Optional[int] = 4, 
+                 compat: bool = True,
                  **kwargs):
         self.transcript_len = transcript_len
         self.codon1, self.codon2 = codon_comp
         self.trna1, self.trna2 = trna_proportion
         self.seed = seed
+        self.compat = compat
         self.params = kwargs
         self.params["transcript_data"] = [{}]
         self.params["trna_proportion"] = {"TTT": self.trna1, "ATA": self.trna2}
@@ -65,9 +83,9 @@ class SerializeTwoCodonSingleTranscript():
         self.params["transcript_data"][0]["transcript_name"] = "proteinX"
 
     def _format_transcript(self):
-        codons = ["AAA"] * round(self.transcript_len * self.codon1) + ["TAT"] * round(self.transcript_len * self.codon2)
-        random.Random(self.seed).shuffle(codons)
-        return "A"*30 + "".join(codons) + "A"*20
+        codons, = generate_sequences(TWO_CODONS, [self.transcript_len], [(self.codon1, self.codon2)],
+                                     self.seed, self.compat)
+        return "A"*30 + codons + "A"*20
 
     def _format_filename(self):
         base = "two_codon_single_transcript"
@@ -76,9 +94,8 @@ class SerializeTwoCodonSingleTranscript():
     def filename(self):
         return self._format_filename()
 
-    def serialize(self, dir: str):
-        with open(f"{dir}/{self._format_filename()}", "w") as stream:
-            yaml.dump(self.params, stream)
+    def serialize(self, dir: str, sequence_store: Optional[str] = None):
+        _dump(self.params, dir, self._format_filename(), sequence_store)
 
 
 class SerializeTwoCodonMultiTranscript():
@@ -89,27 +106,28 @@ class SerializeTwoCodonMultiTranscript():
                  codon_comps: List, 
                  trna_proportion: Tuple, 
                  seed: Optional[int] = 4, 
+                 compat: bool = True,
                  **kwargs):
         self.transcript_lens = transcript_lens
         self.codon_comps = codon_comps
         self.trna1, self.trna2 = trna_proportion
         self.seed = seed
+        self.compat = compat
         self.params = kwargs
         self.params["transcript_data"] = []
         self.params["trna_proportion"] = {"TTT": self.trna1, "ATA": self.trna2}
         self.params["config_filename"] = self._format_filename()
-        for (len, codon_comp, name) in zip(transcript_lens, codon_comps, transcript_names):
+        # all transcripts are generated in one batch
+        sequences = generate_sequences(TWO_CODONS, transcript_lens, codon_comps, seed, compat)
+        for (len, codons, name) in zip(transcript_lens, sequences, transcript_names):
             data = {}
-            data["transcript_seq"] = self._format_transcript(len, codon_comp)
+            data["transcript_seq"] = self._format_transcript(codons)
             data["transcript_len"] = len
             data["transcript_name"] = name
             self.params["transcript_data"].append(data)
 
-    def _format_transcript(self, len, codon_comp):
-        codon1, codon2 = codon_comp
-        codons = ["AAA"] * round(len * codon1) + ["TAT"] * round(len * codon2)
-        random.Random(self.seed).shuffle(codons)
-        return "A"*30 + "".join(codons) + "A"*20
+    def _format_transcript(self, codons):
+        return "A"*30 + codons + "A"*20
 
     def _format_filename(self):
         base = "two_codon_multi_transcript"
@@ -121,6 +139,67 @@ class SerializeTwoCodonMultiTranscript():
     def filename(self):
         return self._format_filename()
 
-    def serialize(self, dir: str):
-        with open(f"{dir}/{self._format_filename()}", "w") as stream:
-            yaml.dump(self.params, stream)
+    def serialize(self, dir: str, sequence_store: Optional[str] = None):
+        _dump(self.params, dir, self._format_filename(), sequence_store)
+
+
+class SerializeMultiCodonMultiTranscript():
+    """
+    Config for transcripts drawn from codon usage tables, read by any number
+    of tRNA species. codon_usages holds one table (codon -> fraction) per
+    transcript; codon_table maps each codon to the anticodons that read it
+    (default: one Watson-Crick tRNA per codon) and trna_proportion each
+    anticodon to its share of the tRNA. The config stores the codon table in
+    the form pinetree takes, and each transcript's codon counts.
+
+    Tables are too big for the filename, so configs are named by `name` and a
+    hash of their contents.
+    """
+
+    def __init__(self, 
+                 name: str,
+                 transcript_lens: List, 
+                 transcript_names: List,
+                 codon_usages: List[Dict], 
+                 trna_proportion: Dict, 
+                 codon_table: Optional[Dict] = None,
+                 seed: Optional[int] = 4, 
+                 compat: bool = True,
+                 **kwargs):
+        self.name = name
+        codons = sorted({codon for usage in codon_usages for codon in usage})
+        codon_table = codon_table if codon_table is not None else complement_codon_table(codons)
+        for codon in codons:
+            if codon not in codon_table:
+                raise ValueError(f"no tRNA reads codon {codon}")
+        for anticodons in codon_table.values():
+            for anticodon in anticodons:
+                if anticodon not in trna_proportion:
+                    raise ValueError(f"no proportion given for tRNA {anticodon}")
+        self.seed = seed
+        self.params = kwargs
+        self.params["codon_table"] = {codon: list(anticodons) for (codon, anticodons) in codon_table.items()}
+        self.params["trna_proportion"] = dict(trna_proportion)
+        self.params["transcript_data"] = []
+        comps = [[usage.get(codon, 0.0) for codon in codons] for usage in codon_usages]
+        sequences = generate_sequences(codons, transcript_lens, comps, seed, compat, exact_length=True)
+        for (len, comp, sequence, name) in zip(transcript_lens, comps, sequences, transcript_names):
+            data = {}
+            data["transcript_seq"] = "A"*30 + sequence + "A"*20
+            data["transcript_len"] = len
+            data["transcript_name"] = name
+            data["codon_counts"] = {codon: count for (codon, count) in zip(codons, apportion(len, comp)) if count}
+            self.params["transcript_data"].append(data)
+        self.params["config_filename"] = self._format_filename()
+
+    def _format_filename(self):
+        base = "multi_codon_multi_transcript"
+        contents = json.dumps([self.params["codon_table"], self.params["trna_proportion"],
+                               self.params["transcript_data"]], sort_keys=True)
+        return f"{base}_{self.name}_{hashlib.sha256(contents.encode()).hexdigest()[:8]}.yaml"
+    
+    def filename(self):
+        return self._format_filename()
+
+    def serialize(self, dir: str, sequence_store: Optional[str] = None):
+        _dump(self.params, dir, self._format_filename(), sequence_store)
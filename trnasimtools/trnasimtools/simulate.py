@@ -1,9 +1,311 @@
-import yaml
-from typing import Optional, Tuple, List
+import os
+import json
+import hashlib
+from typing import Optional, Tuple, List, Dict, Union, Sequence
 import pinetree as pt
-from trnasimtools.common import add_transcripts, add_two_trna_species
+from trnasimtools.common import add_transcripts, add_two_trna_species, add_trna_species, \
+                                trna_params, multi_trna_params
+from trnasimtools.config import load_config
+from trnasimtools.output import output_complete, output_filename, simulate_piped, RecordFilter, COMPRESSED_FORMATS
+from trnasimtools.summary import write_summary, summary_filename
+from trnasimtools.profiling import RunProfile
+from trnasimtools.steady import SteadyStateMonitor, simulate_until_steady, write_steady, read_steady, \
+                                steady_filename
+from trnasimtools.fork import fork_each
 
-class SimulateSingleCodonSingleTranscript():
+class SimulateBase():
+    """
+    Run logic shared by the Simulate* classes. Subclasses load their config in
+    __init__, build the model in _add_transcripts/_add_trna/_add_ribosomes and
+    name their output in _format_filename. CONFIG_ATTRIBUTE names the
+    attribute the loaded config is kept in.
+
+    The pinetree model (self.model) is only made when it is first used, so
+    a simulator that is not run just reads its config: params(), species()
+    and filenames cost no model. pinetree allows one live model per process:
+    it keeps species in a global tracker that every new pt.Model() clears.
+    So a simulator can only build and run its model while it is the last
+    one to have made a model. Its model is built once, and simulated at most
+    once (pinetree starts a model over on each simulate() call);
+    simulate_seeds() only runs it in forked children, so it can be called
+    again. Anything else raises RuntimeError: make a new Simulate* object
+    per run.
+    """
+
+    CONFIG_ATTRIBUTE = "simulation_data"
+    _model = None
+    _built = False
+    _simulated = False
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = _new_model(self.cell_volume)
+        return self._model
+
+    def _config(self):
+        return getattr(self, self.CONFIG_ATTRIBUTE)
+
+    def _load_config(self, config_file):
+        return load_config(config_file)
+
+    def filename(self):
+        return self._format_filename()
+
+    def output_filename(self, output_format: str = "tsv"):
+        return output_filename(self._format_filename(), output_format)
+
+    def _outfile(self, output_dir, output_format):
+        # the file the run writes: pinetree's TSV, compressed or not, which columnar formats convert afterwards
+        return f"{output_dir}/{self.output_filename(output_format if output_format in COMPRESSED_FORMATS else 'tsv')}"
+
+    def species(self) -> List[str]:
+        """
+        Every species a run of this model can write, read from its config and
+        sorted: its proteins and their ribosome binding sites
+        (__<protein>_rbs), charged and uncharged tRNA, and free ribosomes
+        (__ribosome). A protein's rows only start once it has been made.
+        """
+        proteins = [transcript["transcript_name"] for transcript in self._config()["transcript_data"]]
+        return sorted(proteins + [f"__{protein}_rbs" for protein in proteins] +
+                      [f"{anticodon}_{state}" for anticodon in self._anticodons() for state in ("charged", "uncharged")] +
+                      ["__ribosome"])
+
+    def _anticodons(self):
+        return list(self._config()["trna_proportion"])
+
+    def params(self):
+        """
+        Returns this run's full parameter set as a flat dict (one value per key),
+        for labelling summaries and catalog entries.
+        """
+        raise NotImplementedError
+
+    def run_params(self, time_limit: Optional[int] = None, time_step: Optional[float] = None):
+        """
+        params() plus the time_limit and time_step the run uses (by default,
+        those in the config).
+        """
+        time_limit, time_step = self._resolve_times(time_limit, time_step)
+        return {**self.params(), "time_limit": time_limit, "time_step": time_step}
+
+    def _resolve_times(self, time_limit, time_step):
+        config = self._config()
+        for (name, value) in (("time_limit", time_limit), ("time_step", time_step)):
+            if value is None and name not in config:
+                raise ValueError(f"no {name} given and none in config {config['config_filename']}")
+        if time_limit is None:
+            time_limit = config["time_limit"]
+        if time_step is None:
+            time_step = config["time_step"]
+        return time_limit, time_step
+
+    def is_complete(self, 
+                    output_dir: str, 
+                    time_limit: Optional[int] = None, 
+                    time_step: Optional[float] = None,
+                    output_format: str = "tsv",
+                    record_interval: Optional[float] = None):
+        """
+        Checks whether this run's output already exists in output_dir and
+        reached time_limit, or the time an adaptive run stopped at. Pass the
+        run's record_interval, if it had one, as its output is that coarse.
+        """
+        time_limit, time_step = self._resolve_times(time_limit, time_step)
+        steady = read_steady(steady_filename(f"{output_dir}/{self._format_filename()}"))
+        if steady is not None and steady["time_limit"] == time_limit:
+            time_limit = steady["end_time"]
+        return output_complete(f"{output_dir}/{self.output_filename(output_format)}", time_limit,
+                               record_interval or time_step)
+
+    def simulate(self, 
+                 output_dir: str, 
+                 time_limit: Optional[int] = None, 
+                 time_step: Optional[float] = None,
+                 skip_complete: bool = False,
+                 output_format: str = "tsv",
+                 summary_window: Optional[float] = None,
+                 profile_file: Optional[str] = None,
+                 steady_window: Optional[float] = None,
+                 steady_tolerance: float = 0.05,
+                 record_species: Optional[Sequence[str]] = None,
+                 record_interval: Optional[float] = None):
+        """
+        Runs the simulation, writing output to output_dir. With skip_complete,
+        a run whose complete output already exists is not repeated. Returns
+        whether the simulation ran.
+
+        output_format "tsv.gz" or "tsv.zst" compresses pinetree's TSV as it is
+        written (zstd needs the zstandard package). "parquet" or "feather"
+        converts the TSV to a compressed wide table (one column per species)
+        once the run finishes; the TSV is removed.
+
+        With summary_window, per-species statistics over the last
+        summary_window seconds are written to <output>.summary.tsv, labelled
+        with this run's params().
+
+        Each phase of the run is timed in self.profile (a RunProfile), and
+        self.timings splits the wall time into model setup and the rest. With
+        profile_file, the profile is also appended to that file as a JSON line
+        labelled with run_params().
+
+        With steady_window, the run is adaptive: it is watched as it runs
+        and stops early once charged tRNA, free ribosomes and protein
+        production rates have held steady (within steady_tolerance) for
+        steady_window seconds (see steady.SteadyStateMonitor). Where it
+        stopped is written to <output>.steady.json and kept in
+        self.steady_time (None if it ran to time_limit without settling).
+        summary_window then counts back from the stopping time.
+
+        record_species and record_interval cut down what is written: only the
+        rows of the listed species (e.g. ["GFP", "TTT_charged", "__ribosome"]),
+        and only every record_interval seconds, a multiple of time_step. The
+        run still simulates every time_step; rows are filtered as pinetree
+        writes them, so the rest never reach the disk.
+        """
+        time_limit, time_step = self._resolve_times(time_limit, time_step)
+        record = _record_filter(record_species, record_interval, time_step)
+        if skip_complete and self.is_complete(output_dir, time_limit, time_step, output_format, record_interval):
+            return False
+        self.profile = RunProfile()
+        if self._simulated:
+            raise RuntimeError("this simulator's model has already run; make a new Simulate* object per run")
+        self._build()
+        self._simulated = True
+        outfile = self._outfile(output_dir, output_format)
+        end_time = self._run(outfile, time_limit, time_step, steady_window, steady_tolerance, record)
+        self._finish(outfile, output_dir, time_limit, time_step, end_time, output_format, summary_window, profile_file)
+        return True
+
+    def _run(self, outfile, time_limit, time_step, steady_window, steady_tolerance, record=None):
+        end_time = time_limit
+        with self.profile.phase("simulate", output=outfile):
+            if steady_window is None and (record is not None or not outfile.endswith(".tsv")):
+                simulate_piped(self.model, outfile, time_limit, time_step, record)
+            elif steady_window is None:
+                self.model.simulate(time_limit=time_limit, time_step=time_step, output=outfile)
+            else:
+                monitor = SteadyStateMonitor(steady_window, steady_tolerance)
+                end_time = simulate_until_steady(self.model, outfile, time_limit, time_step, monitor,
+                                                 record=record)
+                self.steady_time = monitor.steady_time
+                write_steady(steady_filename(outfile), time_limit, monitor, end_time)
+        return end_time
+
+    def _build(self):
+        if self.model is not _latest_model:
+            raise RuntimeError("another pinetree model was created after this simulator's, which "
+                               "invalidates it; build and run one Simulate* object at a time")
+        with self.profile.phase("seed"):
+            self.model.seed(self.seed)
+        if self._built:
+            return
+        self._built = True
+        with self.profile.phase("add_transcripts"):
+            self._add_transcripts()
+        with self.profile.phase("add_trna"):
+            self._add_trna()
+        with self.profile.phase("add_ribosomes"):
+            self._add_ribosomes()
+
+    def _finish(self, outfile, output_dir, time_limit, time_step, end_time, output_format, summary_window, profile_file):
+        if summary_window is not None:
+            with self.profile.phase("summary"):
+                write_summary(outfile, summary_filename(outfile), self.params(), end_time - summary_window)
+        if output_format not in ("tsv",) + COMPRESSED_FORMATS:
+            # pandas is only needed for columnar output
+            from trnasimtools.io import convert_output
+            converted = os.path.join(output_dir, output_filename(os.path.basename(outfile), output_format))
+            with self.profile.phase("convert", output=converted):
+                convert_output(outfile, output_format)
+        self.timings = self.profile.timings()
+        if profile_file is not None:
+            self.profile.write(profile_file, self.run_params(time_limit, time_step))
+
+    def simulate_seeds(self,
+                       output_dir: str,
+                       seeds: List[int],
+                       time_limit: Optional[int] = None,
+                       time_step: Optional[float] = None,
+                       skip_complete: bool = False,
+                       output_format: str = "tsv",
+                       summary_window: Optional[float] = None,
+                       profile_file: Optional[str] = None,
+                       steady_window: Optional[float] = None,
+                       steady_tolerance: float = 0.05,
+                       record_species: Optional[Sequence[str]] = None,
+                       record_interval: Optional[float] = None,
+                       max_children: Optional[int] = None) -> Dict[int, bool]:
+        """
+        Runs this model once per seed, building it only once: each run is a
+        forked copy of this process that reseeds the built model and
+        simulates it, sharing the model with the others copy-on-write. Model
+        construction does not draw random numbers, so every run writes the
+        same output as simulate() with its seed. Takes the options of
+        simulate(); with max_children 1 the runs take turns on one core.
+
+        Returns whether each seed's run ran. Raises RuntimeError if any run
+        failed (their tracebacks go to stderr).
+        """
+        ran = self._simulate_seeds(output_dir, seeds, time_limit, time_step, skip_complete, output_format,
+                                   summary_window, profile_file, steady_window, steady_tolerance,
+                                   record_species, record_interval, max_children)
+        failed = [seed for seed in seeds if ran[seed] is None]
+        if failed:
+            raise RuntimeError(f"runs with seeds {failed} failed")
+        return ran
+
+    def _simulate_seeds(self, output_dir, seeds, time_limit=None, time_step=None, skip_complete=False,
+                        output_format="tsv", summary_window=None, profile_file=None, steady_window=None,
+                        steady_tolerance=0.05, record_species=None, record_interval=None, max_children=None):
+        # as simulate_seeds, but failed seeds map to None instead of raising
+        time_limit, time_step = self._resolve_times(time_limit, time_step)
+        record = _record_filter(record_species, record_interval, time_step)
+        pending = self._pending_seeds(seeds, skip_complete, lambda: self.is_complete(
+            output_dir, time_limit, time_step, output_format, record_interval))
+        if not pending:
+            return {seed: False for seed in seeds}
+        self.profile = RunProfile()
+        self._build()
+
+        def run(seed):
+            self.seed = seed
+            self.model.seed(seed)
+            outfile = self._outfile(output_dir, output_format)
+            end_time = self._run(outfile, time_limit, time_step, steady_window, steady_tolerance, record)
+            self._finish(outfile, output_dir, time_limit, time_step, end_time, output_format,
+                         summary_window, profile_file)
+
+        succeeded = fork_each(pending, run, max_children)
+        return {seed: (succeeded[seed] or None) if seed in pending else False for seed in seeds}
+
+    def _pending_seeds(self, seeds, skip_complete, is_complete):
+        # the seeds still to run; is_complete() is called with self.seed set to each seed in turn
+        base_seed = self.seed
+        pending = []
+        for seed in seeds:
+            self.seed = seed
+            if not (skip_complete and is_complete()):
+                pending.append(seed)
+        self.seed = base_seed
+        return pending
+
+# the last model made, the only one pinetree can run
+_latest_model = None
+
+def _new_model(cell_volume):
+    global _latest_model
+    _latest_model = pt.Model(cell_volume=cell_volume)
+    return _latest_model
+
+def _record_filter(record_species, record_interval, time_step):
+    if record_species is None and record_interval is None:
+        return None
+    return RecordFilter(record_species, record_interval, time_step)
+
+class SimulateSingleCodonSingleTranscript(SimulateBase):
+
+    CONFIG_ATTRIBUTE = "sim_data"
 
     def __init__(self, 
                 config_file: str, 
@@ -14,12 +316,7 @@ class SimulateSingleCodonSingleTranscript():
         self.sim_data = self._load_config(config_file)
         self.seed = seed
         self.ribosome_params = ribosome_params
-        self.model = pt.Model(cell_volume=cell_volume)
-
-    def _load_config(self, config_file):
-        with open(config_file, "r") as stream:
-            data = yaml.safe_load(stream)
-        return data
+        self.cell_volume = cell_volume
 
     def _add_transcripts(self):
         add_transcripts(self.ribosome_params,
@@ -28,6 +325,9 @@ class SimulateSingleCodonSingleTranscript():
                         self.sim_data["ribosome_binding_rate"],
                         self.model)
     
+    def _anticodons(self):
+        return ["TTT"]
+
     def _add_trna(self):
         tRNA = {"AAA": {"TTT": {"charged": self.sim_data["total_trna"], "uncharged": 0}},}
         self.model.add_trna(tRNA, self.sim_data["trna_charging_rate"])
@@ -39,20 +339,25 @@ class SimulateSingleCodonSingleTranscript():
     def _format_filename(self):
         base = self.sim_data["config_filename"].split(".yaml")[0]
         return f"{base}_{self.seed}.tsv"
-    
-    def filename(self):
-        return self._format_filename()
 
-    def simulate(self, output_dir: str, time_limit: int, time_step: float):
-        self.model.seed(self.seed)
-        self._add_transcripts()
-        self._add_trna()
-        self._add_ribosomes()
-        outfile = self._format_filename()
-        self.model.simulate(time_limit=time_limit, time_step=time_step, output=f"{output_dir}/{outfile}")
+    def params(self):
+        speed, footprint = self.ribosome_params
+        return {"config_filename": self.sim_data["config_filename"],
+                "seed": self.seed,
+                "transcript_copy_number": self.sim_data["transcript_copy_number"],
+                "ribosome_copy_number": self.sim_data["ribosome_copy_number"],
+                "total_trna": self.sim_data["total_trna"],
+                "ribosome_binding_rate": self.sim_data["ribosome_binding_rate"],
+                "trna_charging_rate": self.sim_data["trna_charging_rate"],
+                "ribosome_speed": speed,
+                "ribosome_footprint": footprint,
+                "cell_volume": self.cell_volume}
+    
+    def simulate(self, output_dir: str, time_limit: int, time_step: float, **kwargs):
+        return super().simulate(output_dir, time_limit, time_step, **kwargs)
 
         
-class SimulateTwoCodonSingleTranscript():
+class SimulateTwoCodonSingleTranscript(SimulateBase):
 
     def __init__(self, 
                 config_file: str, 
@@ -68,7 +373,7 @@ class SimulateTwoCodonSingleTranscript():
         self.simulation_data = self._load_config(config_file)
         self.seed = seed
         self.ribosome_params = ribosome_params
-        self.model = pt.Model(cell_volume=cell_volume)
+        self.cell_volume = cell_volume
         
         self.transcript_copy_number = transcript_copy_number if transcript_copy_number \
                                  is not None else self.simulation_data["transcript_copy_number"]
@@ -81,11 +386,6 @@ class SimulateTwoCodonSingleTranscript():
         self.ribosome_copy_number = ribosome_copy_number if ribosome_copy_number \
                                  is not None else self.simulation_data["ribosome_copy_number"]
 
-    def _load_config(self, config_file):
-        with open(config_file, "r") as stream:
-            data = yaml.safe_load(stream)
-        return data
-
     def _add_transcripts(self):
         add_transcripts(self.ribosome_params,
                         self.simulation_data["transcript_data"][0],
@@ -107,24 +407,21 @@ class SimulateTwoCodonSingleTranscript():
         base = self.simulation_data["config_filename"].split(".yaml")[0]
         return f"{base}_{self.transcript_copy_number}_{self.ribosome_copy_number}_{self.total_trna}_" + \
                f"{self.ribosome_binding_rate}_{self.trna_charging_rates[0]}_{self.trna_charging_rates[0]}_{self.seed}.tsv"
-    
-    def filename(self):
-        return self._format_filename()
-
-    def simulate(self, output_dir: str, time_limit: Optional[int] = None, time_step: Optional[float] = None):
-        if time_limit is None:
-            time_limit = self.simulation_data["time_limit"]
-        if time_step is None:
-            time_step = self.simulation_data["time_step"]
-        self.model.seed(self.seed)
-        self._add_transcripts()
-        self._add_trna()
-        self._add_ribosomes()
-        outfile = self._format_filename()
-        self.model.simulate(time_limit=time_limit, time_step=time_step, output=f"{output_dir}/{outfile}")
 
+    def params(self):
+        speed, footprint = self.ribosome_params
+        params = {"config_filename": self.simulation_data["config_filename"],
+                  "seed": self.seed,
+                  "transcript_copy_number": self.transcript_copy_number,
+                  "ribosome_copy_number": self.ribosome_copy_number,
+                  "total_trna": self.total_trna,
+                  "ribosome_binding_rate": self.ribosome_binding_rate}
+        params.update(trna_params(self.simulation_data, self.trna_charging_rates))
+        params.update({"ribosome_speed": speed, "ribosome_footprint": footprint, "cell_volume": self.cell_volume})
+        return params
+    
 
-class SimulateTwoCodonMultiTranscript():
+class SimulateTwoCodonMultiTranscript(SimulateBase):
 
     def __init__(self, 
                 config_file: str, 
@@ -140,7 +437,7 @@ class SimulateTwoCodonMultiTranscript():
         self.simulation_data = self._load_config(config_file)
         self.seed = seed
         self.ribosome_params = ribosome_params
-        self.model = pt.Model(cell_volume=cell_volume)
+        self.cell_volume = cell_volume
         
         self.transcript_copy_numbers = transcript_copy_numbers if transcript_copy_numbers \
                                  is not None else self.simulation_data["transcript_copy_numbers"]
@@ -153,11 +450,6 @@ class SimulateTwoCodonMultiTranscript():
         self.ribosome_copy_number = ribosome_copy_number if ribosome_copy_number \
                                  is not None else self.simulation_data["ribosome_copy_number"]
 
-    def _load_config(self, config_file):
-        with open(config_file, "r") as stream:
-            data = yaml.safe_load(stream)
-        return data
-
     def _add_transcripts(self):
         for (transcript_cn, rbs, transcript_data) in \
         zip(self.transcript_copy_numbers, self.ribosome_binding_rates, self.simulation_data["transcript_data"]):
@@ -185,18 +477,67 @@ class SimulateTwoCodonMultiTranscript():
             rbs_str = rbs_str + f"{rbs}_"
         return f"{base}_{transcript_str}{self.ribosome_copy_number}_{self.total_trna}_" + \
                f"{rbs_str}{self.trna_charging_rates[0]}_{self.trna_charging_rates[0]}_{self.seed}.tsv"
-    
-    def filename(self):
-        return self._format_filename()
 
-    def simulate(self, output_dir: str, time_limit: Optional[int] = None, time_step: Optional[float] = None):
-        if time_limit is None:
-            time_limit = self.simulation_data["time_limit"]
-        if time_step is None:
-            time_step = self.simulation_data["time_step"]
-        self.model.seed(self.seed)
-        self._add_transcripts()
-        self._add_trna()
-        self._add_ribosomes()
-        outfile = self._format_filename()
-        self.model.simulate(time_limit=time_limit, time_step=time_step, output=f"{output_dir}/{outfile}")
+    def params(self):
+        speed, footprint = self.ribosome_params
+        params = {"config_filename": self.simulation_data["config_filename"], "seed": self.seed}
+        for (transcript_cn, rbs, transcript_data) in \
+        zip(self.transcript_copy_numbers, self.ribosome_binding_rates, self.simulation_data["transcript_data"]):
+            params[f"{transcript_data['transcript_name']}_copy_number"] = transcript_cn
+            params[f"{transcript_data['transcript_name']}_binding_rate"] = rbs
+        params.update({"ribosome_copy_number": self.ribosome_copy_number, "total_trna": self.total_trna})
+        params.update(self._trna_params())
+        params.update({"ribosome_speed": speed, "ribosome_footprint": footprint, "cell_volume": self.cell_volume})
+        return params
+
+    def _trna_params(self):
+        return trna_params(self.simulation_data, self.trna_charging_rates)
+
+
+class SimulateMultiCodonMultiTranscript(SimulateTwoCodonMultiTranscript):
+    """
+    Runs a SerializeMultiCodonMultiTranscript config. trna_charging_rates is a
+    dict of charging rate per anticodon, or one rate for every tRNA species.
+    """
+
+    def __init__(self, 
+                config_file: str, 
+                seed: int,
+                trna_charging_rates: Optional[Union[Dict, float]] = None,
+                ribosome_binding_rates: Optional[List] = None,
+                transcript_copy_numbers: Optional[List] = None,
+                ribosome_copy_number: Optional[int] = None,
+                total_trna: Optional[int] = None,
+                ribosome_params: Optional[Tuple] = (1, 15), # speed, footprint
+                cell_volume: Optional[float] = 8e-16,
+                ):
+        super().__init__(config_file, seed, trna_charging_rates, ribosome_binding_rates, transcript_copy_numbers,
+                         ribosome_copy_number, total_trna, ribosome_params, cell_volume)
+        if not isinstance(self.trna_charging_rates, dict):
+            self.trna_charging_rates = {anticodon: self.trna_charging_rates
+                                        for anticodon in self.simulation_data["trna_proportion"]}
+
+    def _add_trna(self):
+        add_trna_species(self.simulation_data["codon_table"],
+                         self.simulation_data["trna_proportion"],
+                         self.total_trna,
+                         self.trna_charging_rates,
+                         self.model)
+
+    def _format_filename(self):
+        base = self.simulation_data["config_filename"].split(".yaml")[0]
+        transcript_str, rbs_str = ("", "")
+        for (transcript_cn, rbs) in zip(self.transcript_copy_numbers, self.ribosome_binding_rates):
+            transcript_str = transcript_str + f"{transcript_cn}_"
+            rbs_str = rbs_str + f"{rbs}_"
+        rates = set(self.trna_charging_rates.values())
+        if len(rates) == 1:
+            rates_str = f"{rates.pop()}"
+        else:
+            # too many rates to spell out
+            rates_str = "rates-" + hashlib.sha256(json.dumps(self.trna_charging_rates, sort_keys=True).encode()).hexdigest()[:8]
+        return f"{base}_{transcript_str}{self.ribosome_copy_number}_{self.total_trna}_" + \
+               f"{rbs_str}{rates_str}_{self.seed}.tsv"
+
+    def _trna_params(self):
+        return multi_trna_params(self.simulation_data, self.trna_charging_rates)
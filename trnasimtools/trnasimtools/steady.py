@@ -0,0 +1,201 @@
+import io
+import os
+import sys
+import json
+import math
+import shutil
+import signal
+import threading
+import traceback
+from typing import Optional, Sequence
+from trnasimtools.output import output_stem, open_output, open_pipe, RecordFilter
+
+STEADY_SUFFIX = ".steady.json"
+
+def steady_filename(output_path: str) -> str:
+    return output_stem(output_path) + STEADY_SUFFIX
+
+def is_product(species: str) -> bool:
+    # proteins only accumulate, so it is their production rate that settles
+    return not species.startswith("__") and not species.endswith(("_charged", "_uncharged"))
+
+def is_watched(species: str) -> bool:
+    return species.endswith("_charged") or species == "__ribosome" or is_product(species)
+
+class SteadyStateMonitor():
+    """
+    Decides from a run's output, as it is written, when the run has reached
+    steady state. The watched quantities are the counts of charged tRNA and
+    free ribosomes (__ribosome) and the production rate of each protein, or
+    those of the given species only. A run is at steady state once, over the
+    last `window` seconds, every quantity in the second half of the window is
+    within `tolerance` (relative) of the first half: the mean, for counts, or
+    the rate of increase, for proteins. Changes are taken relative to at least
+    `min_scale`, so a quantity near zero does not count as drifting.
+    """
+
+    def __init__(self,
+                 window: float,
+                 tolerance: float = 0.05,
+                 species: Optional[Sequence[str]] = None,
+                 min_scale: float = 1.0):
+        self.window = window
+        self.tolerance = tolerance
+        self.species = set(species) if species is not None else None
+        self.min_scale = min_scale
+        self.series = {}
+        self.start_time = None
+        self.steady_time = None
+
+    def _watched(self, species):
+        return species in self.species if self.species is not None else is_watched(species)
+
+    def add_lines(self, lines, header: str):
+        """
+        Adds lines of a pinetree output TSV with the given header line.
+        """
+        fields = header.rstrip("\n").split("\t")
+        time_i, species_i, protein_i = [fields.index(field) for field in ("time", "species", "protein")]
+        for line in lines:
+            row = line.rstrip("\n").split("\t")
+            time = float(row[time_i])
+            if self.start_time is None:
+                self.start_time = time
+            if self._watched(row[species_i]):
+                self.series.setdefault(row[species_i], []).append((time, float(row[protein_i])))
+
+    def _level(self, species, points):
+        if is_product(species):
+            if len(points) < 2 or points[-1][0] == points[0][0]:
+                return None
+            return (points[-1][1] - points[0][1]) / (points[-1][0] - points[0][0])
+        return sum(x for (_, x) in points) / len(points) if points else None
+
+    def check(self) -> bool:
+        """
+        Whether the run is at steady state, given the output added so far. The
+        first time it is, the last output time is recorded as steady_time.
+        """
+        if not self.series:
+            return False
+        end = max(points[-1][0] for points in self.series.values())
+        start = end - self.window
+        if start < self.start_time:
+            return False
+        middle = start + self.window / 2
+        steady = True
+        for (species, points) in self.series.items():
+            # older points are never looked at again
+            points[:] = [point for point in points if point[0] >= start]
+            first = self._level(species, [point for point in points if point[0] <= middle])
+            second = self._level(species, [point for point in points if point[0] >= middle])
+            if first is None or second is None or \
+               abs(second - first) > self.tolerance * max(abs(first), abs(second), self.min_scale):
+                steady = False
+        if steady and self.steady_time is None:
+            self.steady_time = end
+        return steady
+
+def simulate_until_steady(model, output: str, time_limit: int, time_step: float,
+                          monitor: SteadyStateMonitor, interval: Optional[float] = None,
+                          record: Optional[RecordFilter] = None) -> float:
+    """
+    Runs a pinetree model to time_limit, stopping once the monitor finds
+    steady state. A pinetree run cannot be paused and continued (each
+    simulate() call starts the model over), so the run is a single
+    simulate() call, in a forked child writing into a named pipe. Its output
+    is read as it comes and checked every `interval` simulated seconds
+    (default: a quarter of the monitor's window); at the first check that
+    finds steady state, the child is killed. Everything up to there is
+    written to `output` (compressed, if it ends in .gz or .zst), so it is
+    exactly what an uninterrupted run writes up to that time, keeping only
+    the rows `record` keeps; the monitor sees them all. `output` is written
+    under a temporary name and renamed once the run stops. Returns the last
+    time written, or time_limit if the run was not stopped. POSIX only.
+    """
+    if interval is None:
+        interval = monitor.window / 4
+    tmp = f"{output}.tmp"
+    # opened first, so a missing codec fails before anything runs
+    out = open_output(tmp, "wt", codec_of=output)
+    pipe, source, held_open = open_pipe(os.path.dirname(output) or ".")
+    # anything still buffered would be written again by the child
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            model.simulate(time_limit=time_limit, time_step=time_step, output=pipe)
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+    statuses = []
+
+    def reap():
+        statuses.append(os.waitpid(pid, 0)[1])
+        os.close(held_open)
+
+    reaper = threading.Thread(target=reap, daemon=True)
+    reaper.start()
+    end, stopped = (time_limit, False)
+    try:
+        with io.TextIOWrapper(source) as stream, out:
+            header = stream.readline()
+            out.write(header)
+            lines, next_check, last_time = ([], interval, None)
+            for line in stream:
+                time = float(line.split("\t", 1)[0])
+                # lines come a time point at a time, so this is the start of one
+                if time >= next_check:
+                    monitor.add_lines(lines, header)
+                    lines = []
+                    next_check = (math.floor(time / interval) + 1) * interval
+                    if monitor.check():
+                        end, stopped = (last_time, True)
+                        break
+                if record is None or record.keep(line):
+                    out.write(line)
+                lines.append(line)
+                last_time = time
+            if lines and not stopped:
+                monitor.add_lines(lines, header)
+                monitor.check()
+    finally:
+        if not statuses:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        reaper.join()
+        shutil.rmtree(os.path.dirname(pipe))
+    status = statuses[0]
+    if not stopped and not (os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0):
+        os.remove(tmp)
+        raise RuntimeError(f"simulation for {output} failed")
+    os.replace(tmp, output)
+    return end
+
+def write_steady(path: str, time_limit: float, monitor: SteadyStateMonitor, end_time: float):
+    """
+    Records where an adaptive run stopped: steady_time is when steady state
+    was reached (null if it never was, and the run went to time_limit).
+    """
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as stream:
+        json.dump({"steady_time": monitor.steady_time,
+                   "end_time": end_time,
+                   "time_limit": time_limit,
+                   "window": monitor.window,
+                   "tolerance": monitor.tolerance}, stream)
+    os.replace(tmp, path)
+
+def read_steady(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as stream:
+        return json.load(stream)
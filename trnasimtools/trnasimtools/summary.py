@@ -0,0 +1,84 @@
+import os
+import csv
+import math
+from typing import Dict
+from trnasimtools.output import output_stem, open_output
+
+SUMMARY_SUFFIX = ".summary.tsv"
+STAT_FIELDS = ["species", "n", "mean", "variance", "slope", "ribo_density"]
+
+def summary_filename(output_path: str) -> str:
+    return output_stem(output_path) + SUMMARY_SUFFIX
+
+class _SpeciesStats():
+
+    def __init__(self):
+        self.n = 0
+        self.sum_t = 0.0
+        self.sum_x = 0.0
+        self.sum_tt = 0.0
+        self.sum_xx = 0.0
+        self.sum_tx = 0.0
+        self.sum_density = 0.0
+
+    def add(self, t, x, density):
+        self.n += 1
+        self.sum_t += t
+        self.sum_x += x
+        self.sum_tt += t * t
+        self.sum_xx += x * x
+        self.sum_tx += t * x
+        self.sum_density += density
+
+    def result(self):
+        n = self.n
+        mean = self.sum_x / n
+        variance, slope = (math.nan, math.nan)
+        if n > 1:
+            variance = max(self.sum_xx - n * mean * mean, 0.0) / (n - 1)
+            denominator = n * self.sum_tt - self.sum_t * self.sum_t
+            if denominator > 0:
+                slope = (n * self.sum_tx - self.sum_t * self.sum_x) / denominator
+        return {"n": n, "mean": mean, "variance": variance, "slope": slope,
+                "ribo_density": self.sum_density / n}
+
+def summarize_output(path: str, start_time: float) -> Dict[str, dict]:
+    """
+    Reduces a pinetree output TSV to statistics per species over the time
+    points at or after start_time: the number of time points, the mean and
+    (sample) variance of the count, its least-squares slope over time (for a
+    protein, its production rate) and the mean ribosome density. The file is
+    streamed, so the whole trajectory is never held in memory. Compressed
+    TSVs are decompressed on the fly.
+    """
+    stats = {}
+    with open_output(path, "rt") as stream:
+        reader = csv.reader(stream, delimiter="\t")
+        header = next(reader)
+        time_i, species_i, protein_i, density_i = [header.index(field) for field in
+                                                   ("time", "species", "protein", "ribo_density")]
+        for row in reader:
+            time = float(row[time_i])
+            if time < start_time:
+                continue
+            species = row[species_i]
+            if species not in stats:
+                stats[species] = _SpeciesStats()
+            # shift time to the window start to keep the sums well conditioned
+            stats[species].add(time - start_time, float(row[protein_i]), float(row[density_i]))
+    return {species: species_stats.result() for (species, species_stats) in stats.items()}
+
+def write_summary(output_path: str, summary_path: str, params: dict, start_time: float):
+    """
+    Writes the summary of a run's output as a small TSV: one row per species,
+    with the run's parameters in the leading columns.
+    """
+    stats = summarize_output(output_path, start_time)
+    fields = list(params) + STAT_FIELDS
+    tmp = f"{summary_path}.tmp"
+    with open(tmp, "w", newline="") as stream:
+        writer = csv.DictWriter(stream, fieldnames=fields, delimiter="\t")
+        writer.writeheader()
+        for (species, species_stats) in stats.items():
+            writer.writerow({**params, "species": species, **species_stats})
+    os.replace(tmp, summary_path)
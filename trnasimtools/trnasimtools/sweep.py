@@ -0,0 +1,175 @@
+import os
+import math
+import argparse
+import itertools
+import yaml
+from typing import Optional, List
+from trnasimtools.serialize import SerializeSingleCodonSingleTranscript, \
+                                   SerializeTwoCodonSingleTranscript, \
+                                   SerializeTwoCodonMultiTranscript, \
+                                   SerializeMultiCodonMultiTranscript
+from trnasimtools.batch import Task, SIMULATORS, format_launcher_line, write_sweep_spec
+from trnasimtools.costmodel import write_slurm
+
+# the Serialize* class that writes configs for each Simulate* class
+SERIALIZERS = {"SimulateSingleCodonSingleTranscript": SerializeSingleCodonSingleTranscript,
+               "SimulateTwoCodonSingleTranscript": SerializeTwoCodonSingleTranscript,
+               "SimulateTwoCodonMultiTranscript": SerializeTwoCodonMultiTranscript,
+               "SimulateMultiCodonMultiTranscript": SerializeMultiCodonMultiTranscript}
+
+def expand(fixed: Optional[dict], grid: Optional[dict]) -> List[dict]:
+    """
+    Every combination of the values in grid (a mapping of argument to a list
+    of values), each merged with the fixed arguments. The last grid argument
+    varies fastest.
+    """
+    fixed, grid = (fixed or {}, grid or {})
+    names = list(grid)
+    return [{**fixed, **dict(zip(names, values))} for values in itertools.product(*grid.values())]
+
+class Sweep():
+    """
+    A parameter sweep declared in YAML, replacing the nested loops that used
+    to write configs and launcher files from notebooks:
+
+        name: june-02-2024
+        simulator: SimulateTwoCodonMultiTranscript
+        seeds: 3
+        config_dir: ./yaml/june-02-2024
+        sequence_store: ./yaml/sequences   # optional, see trnasimtools.sequences
+        output_dir: /scratch/07227/hilla3/output/june-02-2024/speed_{ribosome_params[0]}
+        config:                     # Serialize* arguments
+          transcript_lens: [1000, 300]
+          ...
+        config_grid:                # one config per combination
+          codon_comps: [[[0.2, 0.8], [0.7, 0.3]], [[0.4, 0.6], [0.7, 0.3]]]
+        run:                        # Simulate* arguments
+          ribosome_copy_number: 500
+          ...
+        run_grid:                   # one run per config, combination and seed
+          ribosome_params: [[0.125, 15], [0.25, 15]]
+          trna_charging_rates: [[10.0, 10.0], [30.0, 30.0]]
+        options:                    # Task options, e.g. skip_complete, output_format
+          skip_complete: true
+        launcher:
+          dir: ./tacc/launcher
+          chunk_size: 1             # tasks per launcher line
+          shards: 1                 # launcher files (and SLURM jobs) to split the lines over
+        slurm:
+          template: ./tacc/slurm/june-02-2024.bash
+          dir: ./tacc/slurm
+          tasks_per_node: 128
+          hours: 5
+
+    output_dir is formatted with each run's config and run arguments. Paths
+    are written as given, so they should be relative to the launcher's
+    working directory (the repository root).
+    """
+
+    def __init__(self, spec: dict):
+        self.spec = spec
+        self.name = spec["name"]
+        self.simulator = SIMULATORS[spec["simulator"]]
+        self.config_dir = spec.get("config_dir", f"./yaml/{self.name}")
+        self.launcher = {"dir": "./tacc/launcher", "chunk_size": 1, "shards": 1, "python": "python3",
+                         **spec.get("launcher", {})}
+        self.slurm = {"dir": "./tacc/slurm", "tasks_per_node": 128, **spec.get("slurm", {})}
+
+    @classmethod
+    def from_file(cls, path: str):
+        with open(path, "r") as stream:
+            return cls(yaml.safe_load(stream))
+
+    def _seeds(self):
+        seeds = self.spec.get("seeds", 1)
+        return list(range(1, seeds + 1)) if isinstance(seeds, int) else seeds
+
+    def write_configs(self) -> List[dict]:
+        """
+        Serializes one config per config_grid combination into config_dir.
+        Returns each config's path along with its arguments.
+        """
+        os.makedirs(self.config_dir, exist_ok=True)
+        configs = []
+        for config_args in expand(self.spec.get("config"), self.spec.get("config_grid")):
+            serializer = SERIALIZERS[self.simulator.__name__](**config_args)
+            serializer.serialize(self.config_dir, self.spec.get("sequence_store"))
+            configs.append({"path": f"{self.config_dir}/{serializer.filename()}", "args": config_args})
+        return configs
+
+    def tasks(self, configs: List[dict]) -> List[Task]:
+        tasks = []
+        options = self.spec.get("options", {})
+        for config in configs:
+            for run_args in expand(self.spec.get("run"), self.spec.get("run_grid")):
+                output_dir = self.spec["output_dir"].format(**config["args"], **run_args)
+                for seed in self._seeds():
+                    tasks.append(Task(self.simulator, config["path"], seed, output_dir, **options, **run_args))
+        return tasks
+
+    def launcher_lines(self, tasks: List[Task]) -> List[str]:
+        """
+        One line per task with chunk_size 1, in the scripts' argv format.
+        Otherwise tasks are grouped chunk_size at a time into sweep specs
+        under <launcher dir>/<name>/, each run by one batch process, so a
+        chunk pays for Python startup and imports once.
+        """
+        python, chunk_size = (self.launcher["python"], self.launcher["chunk_size"])
+        if chunk_size == 1:
+            return [format_launcher_line(task, python) for task in tasks]
+        chunk_dir = f"{self.launcher['dir']}/{self.name}"
+        os.makedirs(chunk_dir, exist_ok=True)
+        lines = []
+        for (i, start) in enumerate(range(0, len(tasks), chunk_size)):
+            path = f"{chunk_dir}/chunk_{i:05d}.yaml"
+            write_sweep_spec(tasks[start:start + chunk_size], path)
+            lines.append(f"{python} -m trnasimtools.batch {path} -n 1")
+        return lines
+
+    def write(self, make_output_dirs: bool = False) -> List[str]:
+        """
+        Writes configs, launcher files and (with a slurm template) SLURM
+        scripts. Lines are dealt round-robin over the shards, so each shard
+        gets an even mix of the grid. Returns the launcher files written.
+        """
+        tasks = self.tasks(self.write_configs())
+        if make_output_dirs:
+            for output_dir in sorted({task.output_dir for task in tasks}):
+                os.makedirs(output_dir, exist_ok=True)
+        lines = self.launcher_lines(tasks)
+        shards = self.launcher["shards"]
+        os.makedirs(self.launcher["dir"], exist_ok=True)
+        launcher_files = []
+        for shard in range(shards):
+            name = self.name if shards == 1 else f"{self.name}_shard{shard}"
+            launcher_file = f"{self.launcher['dir']}/{name}.txt"
+            shard_lines = lines[shard::shards]
+            with open(launcher_file, "w") as stream:
+                stream.writelines(line + "\n" for line in shard_lines)
+            launcher_files.append(launcher_file)
+            if "template" in self.slurm:
+                tasks_per_node = self.slurm["tasks_per_node"]
+                nodes = self.slurm.get("nodes", math.ceil(len(shard_lines) / tasks_per_node))
+                os.makedirs(self.slurm["dir"], exist_ok=True)
+                write_slurm(self.slurm["template"], f"{self.slurm['dir']}/{name}.bash", launcher_file,
+                            nodes, min(len(shard_lines), nodes * tasks_per_node), self.slurm["hours"] * 3600)
+        return launcher_files
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Write the configs, launcher files and SLURM scripts of a YAML sweep.")
+    parser.add_argument("spec", help="YAML sweep spec")
+    parser.add_argument("--chunk-size", type=int, default=None, help="tasks per launcher line")
+    parser.add_argument("--shards", type=int, default=None, help="launcher files (and SLURM jobs) to write")
+    parser.add_argument("--mkdir", action="store_true", help="create the output directories")
+    args = parser.parse_args(argv)
+
+    sweep = Sweep.from_file(args.spec)
+    if args.chunk_size is not None:
+        sweep.launcher["chunk_size"] = args.chunk_size
+    if args.shards is not None:
+        sweep.launcher["shards"] = args.shards
+    for launcher_file in sweep.write(make_output_dirs=args.mkdir):
+        print(launcher_file)
+
+if __name__ == "__main__":
+    main()